@@ -0,0 +1,61 @@
+"""
+Compare looking up config models by name in NameIndex with the previous linear scan.
+
+Usage:
+    python dev_tests/benchmark_name_index.py [--sizes 1000 10000]
+
+Every benchmark looks up each of the models once, as the services do when they resolve
+docker_image_ref of every job and pipeline.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+
+from wanna.core.utils.name_index import NameIndex
+
+
+@dataclass
+class Model:
+    name: str
+
+
+def find_by_name_baseline(models: list[Model], name: str) -> Model:
+    """The implementation before the name index."""
+    matched = list(filter(lambda i: i.name.strip() == name.strip(), models))
+    if len(matched) == 0:
+        raise ValueError(f"No model with name {name} found")
+    elif len(matched) > 1:
+        raise ValueError(f"Multiple models with name {name} found, please use unique names")
+    return matched[0]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = arg_parser.parse_args()
+
+    for size in args.sizes:
+        models = [Model(name=f"model-{i}") for i in range(size)]
+        names = [m.name for m in models]
+
+        start = time.perf_counter()
+        for name in names:
+            find_by_name_baseline(models, name)
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = NameIndex(models, "model")
+        built = time.perf_counter() - start
+        for name in names:
+            index.get(name)
+        indexed = time.perf_counter() - start
+
+        print(
+            f"{size:>6} models  baseline {baseline:8.3f}s  "
+            f"index {indexed:8.4f}s (build {built:.4f}s)  {baseline / indexed:8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
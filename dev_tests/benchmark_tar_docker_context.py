@@ -0,0 +1,87 @@
+"""
+Compare the docker context archive builder with the previous single-threaded implementation.
+
+Usage:
+    python dev_tests/benchmark_tar_docker_context.py [context_dir] [--repeat 3]
+
+Without context_dir a synthetic context (sources, a vendored virtualenv-like tree that
+is ignored, and a few larger binary files) is generated in a temporary directory.
+"""
+
+import argparse
+import os
+import random
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+import igittigitt
+
+from wanna.core.utils.io import tar_docker_context
+
+IGNORE_PATTERNS = [".venv/", "*.pyc", "__pycache__/", "*.log"]
+
+
+def tar_docker_context_baseline(
+    source_dir: Path, target_tar_file: Path, ignore_patterns: list[str] = []
+):
+    """The implementation before the parallel archive builder."""
+    parser = igittigitt.IgnoreParser()
+    for pattern in ignore_patterns:
+        parser.add_rule(pattern, source_dir)
+
+    os.makedirs(target_tar_file.parent.absolute(), exist_ok=True)
+    with tarfile.open(target_tar_file, "w:gz") as the_tar_file:
+        for root, _, files in os.walk(source_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                if parser.match(file_path):
+                    continue
+                the_tar_file.add(file_path, arcname=os.path.relpath(file_path, source_dir))
+
+
+def make_context(root: Path) -> None:
+    rnd = random.Random(42)
+    for i in range(2000):
+        path = root / "src" / f"pkg{i % 50}" / f"module{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(f"value_{j} = {rnd.random()}" for j in range(200)))
+    for i in range(5000):
+        path = root / ".venv" / "lib" / f"dep{i % 100}" / f"file{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+    for i in range(4):
+        # half random, half repetitive content to get a realistic compression ratio
+        (root / f"model{i}.bin").write_bytes(rnd.randbytes(8_000_000) + bytes(8_000_000))
+    (root / "Dockerfile").write_text("FROM python:3.12\nCOPY . /app\n")
+
+
+def bench(name, func, context_dir, target, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(context_dir, target, IGNORE_PATTERNS)
+        timings.append(time.perf_counter() - start)
+    size = target.stat().st_size / 1024 / 1024
+    print(f"{name:<10} best {min(timings):6.2f}s  mean {sum(timings) / repeat:6.2f}s  {size:.1f} MiB")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("context_dir", nargs="?", type=Path)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        context_dir = args.context_dir
+        if context_dir is None:
+            context_dir = Path(tmp) / "context"
+            make_context(context_dir)
+        print(f"context {context_dir}, {os.cpu_count()} CPUs")
+        bench("baseline", tar_docker_context_baseline, context_dir, Path(tmp) / "a.tgz", args.repeat)
+        bench("parallel", tar_docker_context, context_dir, Path(tmp) / "b.tgz", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
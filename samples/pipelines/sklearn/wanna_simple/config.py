@@ -2,9 +2,12 @@ import json
 import os
 from datetime import datetime
 
-# Env exported from wanna pipeline cli command
-PIPELINE_NAME_PREFIX = (
-    "WANNA_SKLEARN_SAMPLE"  # snake_cased pipeline name in wanna config
+# Env exported from wanna pipeline cli command, only for the pipeline being compiled
+# snake_cased pipeline names in wanna config, both pipelines share this config
+PIPELINE_NAME_PREFIX = next(
+    prefix
+    for prefix in ("WANNA_SKLEARN_SAMPLE_EVAL", "WANNA_SKLEARN_SAMPLE")
+    if f"{prefix}_PIPELINE_NAME" in os.environ
 )
 
 PROJECT_ID = os.getenv(f"{PIPELINE_NAME_PREFIX}_PROJECT_ID")
@@ -29,6 +29,14 @@ push_mode_option: PushMode = typer.Option(
     "Use all for dev",
 )
 
+compile_cache_option: bool = typer.Option(
+    True,
+    "--compile-cache/--no-compile-cache",
+    envvar="WANNA_PIPELINE_COMPILE_CACHE",
+    help="Reuse the compiled pipeline spec when the pipeline sources, params "
+    "and env params did not change since the last build.",
+)
+
 
 def instance_name_option(instance_type: str, operation: str, help: str | None = None):
     return typer.Option(
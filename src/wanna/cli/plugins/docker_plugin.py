@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import typer
+
+from wanna.cli.plugins.base_plugin import BasePlugin
+from wanna.cli.plugins.common_options import profile_name_option, wanna_file_option
+from wanna.core.utils.config_loader import load_config_from_yaml
+
+
+class DockerPlugin(BasePlugin):
+    """
+    Manage docker build artifacts.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.register_many(
+            [
+                self.gc,
+            ]
+        )
+
+    @staticmethod
+    def gc(
+        file: Path = wanna_file_option,
+        profile_name: str = profile_name_option,
+        max_age_days: int = typer.Option(
+            30,
+            "--max-age-days",
+            envvar="WANNA_DOCKER_CONTEXT_MAX_AGE_DAYS",
+            help="Delete context archives not used by any build for this many days",
+        ),
+        dry_run: bool = typer.Option(
+            False, "--dry-run", help="Only list the archives that would be deleted"
+        ),
+    ) -> None:
+        """
+        Delete docker context archives uploaded for GCP Cloud Build that are no longer used.
+
+        Archives are stored in the bucket of the GCP profile under build/docker/ctx/
+        and are shared by all builds with the same content of the context directory.
+        """
+        config = load_config_from_yaml(file, gcp_profile_name=profile_name)
+
+        # doing this import here speeds up the CLI app considerably
+        from wanna.core.services.docker import delete_stale_context_archives
+
+        delete_stale_context_archives(
+            bucket_name=config.gcp_profile.bucket, max_age_days=max_age_days, dry_run=dry_run
+        )
@@ -51,8 +51,10 @@ class JobPlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.jobs import JobService
+        from wanna.core.services.session import BuildSession
 
-        job_service = JobService(config=config, workdir=workdir)
+        session = BuildSession(config, workdir)
+        job_service = JobService(config=config, workdir=workdir, session=session)
         job_service.build(instance_name)
 
     @staticmethod
@@ -71,8 +73,12 @@ class JobPlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.jobs import JobService
+        from wanna.core.services.session import BuildSession
 
-        job_service = JobService(config=config, workdir=workdir, version=version, push_mode=mode)
+        session = BuildSession(config, workdir, version)
+        job_service = JobService(
+            config=config, workdir=workdir, version=version, push_mode=mode, session=session
+        )
         manifests = job_service.build(instance_name)
         job_service.push(manifests)
 
@@ -98,8 +104,10 @@ class JobPlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.jobs import JobService
+        from wanna.core.services.session import BuildSession
 
-        job_service = JobService(config=config, workdir=workdir, version=version)
+        session = BuildSession(config, workdir, version)
+        job_service = JobService(config=config, workdir=workdir, version=version, session=session)
         manifests = job_service.build(instance_name)
         job_service.push(manifests, local=False)
         JobService.run(
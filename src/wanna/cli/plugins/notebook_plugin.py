@@ -76,10 +76,12 @@ class NotebookPlugin(BasePlugin):
         workdir = pathlib.Path(file).parent.resolve()
 
         # doing this import here speeds up the CLI app considerably
+        from wanna.core.services.session import BuildSession
         from wanna.core.services.workbench_instance import WorkbenchInstanceService
 
+        session = BuildSession(config, workdir, version)
         nb_service = WorkbenchInstanceService(
-            config=config, workdir=workdir, owner=owner, version=version
+            config=config, workdir=workdir, owner=owner, version=version, session=session
         )
         nb_service.create(instance_name, push_mode=mode)
 
@@ -170,9 +172,13 @@ class NotebookPlugin(BasePlugin):
         workdir = pathlib.Path(file).parent.resolve()
 
         # doing this import here speeds up the CLI app considerably
+        from wanna.core.services.session import BuildSession
         from wanna.core.services.workbench_instance import WorkbenchInstanceService
 
-        nb_service = WorkbenchInstanceService(config=config, workdir=workdir, version=version)
+        session = BuildSession(config, workdir, version)
+        nb_service = WorkbenchInstanceService(
+            config=config, workdir=workdir, version=version, session=session
+        )
         nb_service.build()
 
     @staticmethod
@@ -205,9 +211,13 @@ class NotebookPlugin(BasePlugin):
         workdir = pathlib.Path(file).parent.resolve()
 
         # doing this import here speeds up the CLI app considerably
+        from wanna.core.services.session import BuildSession
         from wanna.core.services.workbench_instance import WorkbenchInstanceService
 
-        nb_service = WorkbenchInstanceService(config=config, workdir=workdir, version=version)
+        session = BuildSession(config, workdir, version)
+        nb_service = WorkbenchInstanceService(
+            config=config, workdir=workdir, version=version, session=session
+        )
         nb_service.push(instance_name=instance_name)
 
     @staticmethod
@@ -230,7 +240,11 @@ class NotebookPlugin(BasePlugin):
         workdir = pathlib.Path(file).parent.resolve()
 
         # doing this import here speeds up the CLI app considerably
+        from wanna.core.services.session import BuildSession
         from wanna.core.services.workbench_instance import WorkbenchInstanceService
 
-        nb_service = WorkbenchInstanceService(config=config, workdir=workdir, version=version)
+        session = BuildSession(config, workdir, version)
+        nb_service = WorkbenchInstanceService(
+            config=config, workdir=workdir, version=version, session=session
+        )
         nb_service.sync(force=force, push_mode=mode)
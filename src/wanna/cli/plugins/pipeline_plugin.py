@@ -5,6 +5,7 @@ import typer
 
 from wanna.cli.plugins.base_plugin import BasePlugin
 from wanna.cli.plugins.common_options import (
+    compile_cache_option,
     instance_name_option,
     profile_name_option,
     push_mode_option,
@@ -46,6 +47,7 @@ class PipelinePlugin(BasePlugin):
         profile_name: str = profile_name_option,
         instance_name: str = instance_name_option("pipeline", "compile"),
         mode: PushMode = push_mode_option,
+        compile_cache: bool = compile_cache_option,
     ) -> None:
         """
         Create a manifest based on the wanna-ml config that can be later pushed, deployed or run.
@@ -55,9 +57,16 @@ class PipelinePlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.pipeline import PipelineService
+        from wanna.core.services.session import BuildSession
 
+        session = BuildSession(config, workdir, version)
         pipeline_service = PipelineService(
-            config=config, workdir=workdir, version=version, push_mode=mode
+            config=config,
+            workdir=workdir,
+            version=version,
+            push_mode=mode,
+            compile_cache=compile_cache,
+            session=session,
         )
         pipeline_service.build(instance_name, params)
 
@@ -74,6 +83,7 @@ class PipelinePlugin(BasePlugin):
         profile_name: str = profile_name_option,
         instance_name: str = instance_name_option("pipeline", "push"),
         mode: PushMode = push_mode_option,
+        compile_cache: bool = compile_cache_option,
     ) -> None:
         """
         Build and push manifest to Cloud Storage.
@@ -83,9 +93,16 @@ class PipelinePlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.pipeline import PipelineService
+        from wanna.core.services.session import BuildSession
 
+        session = BuildSession(config, workdir, version)
         pipeline_service = PipelineService(
-            config=config, workdir=workdir, version=version, push_mode=mode
+            config=config,
+            workdir=workdir,
+            version=version,
+            push_mode=mode,
+            compile_cache=compile_cache,
+            session=session,
         )
         manifests = pipeline_service.build(instance_name, params)
         pipeline_service.push(manifests)
@@ -107,8 +124,12 @@ class PipelinePlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.pipeline import PipelineService
+        from wanna.core.services.session import BuildSession
 
-        pipeline_service = PipelineService(config=config, workdir=workdir, version=version)
+        session = BuildSession(config, workdir, version)
+        pipeline_service = PipelineService(
+            config=config, workdir=workdir, version=version, session=session
+        )
         pipeline_service.deploy(instance_name, env)
 
     @staticmethod
@@ -130,6 +151,7 @@ class PipelinePlugin(BasePlugin):
             "--skip-execution-cache",
             help="configuration to skip kfp execution cache",
         ),
+        compile_cache: bool = compile_cache_option,
     ) -> None:
         """
         Run the pipeline as specified in wanna-ml config. This command puts together build, push and run-manifest steps.
@@ -139,13 +161,17 @@ class PipelinePlugin(BasePlugin):
 
         # doing this import here speeds up the CLI app considerably
         from wanna.core.services.pipeline import PipelineService
+        from wanna.core.services.session import BuildSession
 
+        session = BuildSession(config, workdir, version)
         pipeline_service = PipelineService(
             config=config,
             workdir=workdir,
             version=version,
             push_mode=mode,
             skip_execution_cache=skip_execution_cache,
+            compile_cache=compile_cache,
+            session=session,
         )
         manifests = pipeline_service.build(instance_name)
         pipeline_service.push(manifests, local=False)
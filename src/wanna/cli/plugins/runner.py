@@ -1,5 +1,6 @@
 import typer
 
+from wanna.cli.plugins.docker_plugin import DockerPlugin
 from wanna.cli.plugins.job_plugin import JobPlugin
 from wanna.cli.plugins.notebook_plugin import NotebookPlugin
 from wanna.cli.plugins.pipeline_plugin import PipelinePlugin
@@ -17,6 +18,7 @@ class PluginRunner:
             ("job", JobPlugin()),
             ("tensorboard", TensorboardPlugin()),
             ("notebook", NotebookPlugin()),
+            ("docker", DockerPlugin()),
         ]
         for name, subcommand in typers:
             self.app.add_typer(subcommand.app, name=name, help=subcommand.__doc__)
@@ -1,5 +1,10 @@
 import json
-from typing import Callable
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any
 
 from wanna.core.deployment.io import IOMixin
 from wanna.core.deployment.models import (
@@ -10,45 +15,168 @@ from wanna.core.deployment.models import (
     PushTask,
 )
 from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.utils.gcp import storage_clients
 
 logger = get_logger(__name__)
 
 
+class ArtifactsPushException(Exception):
+    pass
+
+
 class ArtifactsPushMixin(IOMixin):
     def push_artifacts(
-        self, docker_pusher: Callable[[list[str]], None], push_tasks: list[PushTask]
+        self,
+        docker_pusher: Callable[..., None],
+        push_tasks: list[PushTask],
+        max_workers: int | None = None,
+        max_container_workers: int | None = None,
     ) -> PushResult:
-        def push_containers(container_artifacts: list[ContainerArtifact]):
+        """
+        Push containers, files and json manifests of all push tasks.
+
+        Containers are pushed by docker_pusher in a background thread while files are uploaded
+        by a bounded pool of threads. Aliases of a file are copied from its destination
+        (server-side in GCS) after the file is uploaded. Json artifacts (manifests) of a push task are written
+        only when all files of the task and all containers are pushed, so a published manifest
+        never refers to a missing pipeline spec or image. A failed artifact does not stop
+        the others, all failures are reported together at the end.
+
+        Args:
+            docker_pusher: pushes tags of multiple images, accepts max_workers
+            push_tasks: what to push
+            max_workers: how many files are uploaded in parallel,
+                defaults to WANNA_PUSH_MAX_WORKERS env var (8)
+            max_container_workers: how many images are pushed in parallel,
+                defaults to WANNA_DOCKER_PUSH_MAX_WORKERS env var or the docker_pusher default
+
+        Returns:
+            pushed artifacts of every push task
+        """
+        max_workers = max_workers or int(os.getenv("WANNA_PUSH_MAX_WORKERS", "8"))
+        if max_container_workers is None and os.getenv("WANNA_DOCKER_PUSH_MAX_WORKERS"):
+            max_container_workers = int(os.environ["WANNA_DOCKER_PUSH_MAX_WORKERS"])
+
+        lock = threading.Lock()
+        pushed_bytes = 0
+        pushed_files = 0
+        skipped_files = 0
+        errors: list[str] = []
+
+        def push_containers(container_artifacts: list[ContainerArtifact]) -> float:
+            start = time.perf_counter()
+            # all images at once, so the pusher can push them concurrently
             for artifact in container_artifacts:
-                with logger.user_spinner(f"Pushing {artifact.name.lower()} to {artifact.tags}"):
-                    docker_pusher(artifact.tags)
+                logger.user_info(f"Pushing {artifact.name.lower()} to {artifact.tags}")
+            docker_pusher(
+                [artifact.tags for artifact in container_artifacts],
+                max_workers=max_container_workers,
+            )
+            return time.perf_counter() - start
 
-        def push_manifests(manifest_artifacts: list[PathArtifact]):
-            for artifact in manifest_artifacts:
-                with logger.user_spinner(
-                    f"Pushing {artifact.name.lower()} to {artifact.destination}"
-                ):
-                    self.upload_file(artifact.source, artifact.destination)
+        def count(uploaded: bool, size: int) -> None:
+            nonlocal pushed_bytes, pushed_files, skipped_files
+            with lock:
+                if uploaded:
+                    pushed_bytes += size
+                    pushed_files += 1
+                else:
+                    skipped_files += 1
+
+        def push_manifest(artifact: PathArtifact) -> None:
+            logger.user_info(f"Pushing {artifact.name.lower()} to {artifact.destination}")
+            size = os.path.getsize(artifact.source) if os.path.isfile(artifact.source) else 0
+            count(self.upload_file(artifact.source, artifact.destination), size)
+            for alias in artifact.aliases:
+                logger.user_info(f"Copying {artifact.name.lower()} to {alias}")
+                # server-side copies do not transfer any bytes
+                count(self.copy(artifact.destination, alias), 0)
+
+        def push_json(artifact: JsonArtifact) -> None:
+            logger.user_info(f"Pushing {artifact.name.lower()} to {artifact.destination}")
+            body = json.dumps(artifact.json_body)
+            count(self.write(artifact.destination, body), len(body.encode("utf-8")))
 
-        def push_json(artifacts: list[JsonArtifact]):
-            for artifact in artifacts:
-                with logger.user_spinner(
-                    f"Pushing {artifact.name.lower()} to {artifact.destination}"
+        def collect_errors(futures: dict[Future[Any], str]) -> None:
+            for future, name in futures.items():
+                if future.exception() is not None:
+                    errors.append(f"{name}: {future.exception()}")
+
+        container_artifacts = [
+            artifact for push_task in push_tasks for artifact in push_task.container_artifacts
+        ]
+        start = time.perf_counter()
+        with (
+            ThreadPoolExecutor(1, thread_name_prefix="wanna-push-containers") as container_pool,
+            ThreadPoolExecutor(max_workers, thread_name_prefix="wanna-push") as pool,
+        ):
+            containers = (
+                container_pool.submit(push_containers, container_artifacts)
+                if container_artifacts
+                else None
+            )
+            manifests = [
+                {
+                    pool.submit(push_manifest, artifact): artifact.destination
+                    for artifact in push_task.manifest_artifacts
+                }
+                for push_task in push_tasks
+            ]
+            wait([f for task_futures in manifests for f in task_futures])
+            if containers is not None:
+                wait([containers])
+                collect_errors({containers: "containers"})
+
+            json_futures: dict[Future[None], str] = {}
+            for push_task, task_futures in zip(push_tasks, manifests):
+                collect_errors(task_futures)
+                if any(f.exception() is not None for f in task_futures) or (
+                    containers is not None and containers.exception() is not None
                 ):
-                    self.write(artifact.destination, json.dumps(artifact.json_body))
-
-        results: PushResult = []
-
-        for push_task in push_tasks:
-            push_containers(container_artifacts=push_task.container_artifacts)
-            push_manifests(manifest_artifacts=push_task.manifest_artifacts)
-            push_json(artifacts=push_task.json_artifacts)
-            results.append(
-                (
-                    push_task.container_artifacts,
-                    push_task.manifest_artifacts,
-                    push_task.json_artifacts,
-                )
+                    for artifact in push_task.json_artifacts:
+                        logger.user_error(
+                            f"Skipping {artifact.name.lower()} {artifact.destination}, "
+                            "its files or containers were not pushed"
+                        )
+                    continue
+                for artifact in push_task.json_artifacts:
+                    json_futures[pool.submit(push_json, artifact)] = artifact.destination
+            wait(json_futures)
+            collect_errors(json_futures)
+
+        duration = time.perf_counter() - start
+        if pushed_files:
+            mib = pushed_bytes / 1024 / 1024
+            logger.user_info(
+                f"Pushed {pushed_files} files ({mib:.2f} MiB) in {duration:.1f}s "
+                f"({mib / max(duration, 1e-6):.2f} MiB/s)"
+            )
+        if skipped_files:
+            logger.user_info(f"Skipped {skipped_files} files identical to the pushed ones")
+        if containers is not None and containers.exception() is None:
+            logger.user_info(
+                f"Pushed {len(container_artifacts)} container images in {containers.result():.1f}s"
             )
 
-        return results
+        connections = storage_clients.stats()
+        if connections["opened"]:
+            logger.user_info(
+                f"GCS connections: {connections['opened']} opened, "
+                f"{connections['reused']} requests reused a connection"
+            )
+
+        if errors:
+            for error in errors:
+                logger.user_error(f"Failed to push {error}")
+            raise ArtifactsPushException(
+                f"Failed to push {len(errors)} artifacts: " + "; ".join(errors)
+            )
+
+        return [
+            (
+                push_task.container_artifacts,
+                push_task.manifest_artifacts,
+                push_task.json_artifacts,
+            )
+            for push_task in push_tasks
+        ]
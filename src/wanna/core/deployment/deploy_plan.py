@@ -0,0 +1,115 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from wanna.core.loggers.wanna_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DeployException(Exception):
+    pass
+
+
+@dataclass
+class DeployStep:
+    """
+    One resource to create or update.
+
+    Args:
+        key: unique name of the step, steps with the same key are deployed only once
+        run: deploys the resource, gets results of the dependencies by their keys
+        depends_on: keys of the steps which must be deployed first
+    """
+
+    key: str
+    run: Callable[[dict[str, Any]], Any]
+    depends_on: list[str] = field(default_factory=list)
+
+
+class DeployPlan:
+    """
+    DAG of resources to deploy.
+
+    Steps run as soon as all steps they depend on are deployed, so resources that share
+    nothing (eg. resources of different pipelines, a log metric and a cloud function)
+    are deployed concurrently by a pool of threads and long-running operations
+    are awaited together. When a step fails, the steps depending on it are skipped,
+    the others are still deployed, and all failures are reported together at the end.
+    """
+
+    def __init__(self) -> None:
+        self.steps: dict[str, DeployStep] = {}
+
+    def add(
+        self,
+        key: str,
+        run: Callable[[dict[str, Any]], Any],
+        depends_on: list[str] | None = None,
+    ) -> str:
+        """
+        Add a step to the plan, unless a step with the same key is already planned.
+
+        Returns:
+            key of the step
+        """
+        if key not in self.steps:
+            self.steps[key] = DeployStep(key=key, run=run, depends_on=depends_on or [])
+        return key
+
+    def execute(self, max_workers: int | None = None) -> dict[str, Any]:
+        """
+        Deploy all steps of the plan.
+
+        Args:
+            max_workers: how many steps run in parallel,
+                defaults to WANNA_DEPLOY_MAX_WORKERS env var (8)
+
+        Returns:
+            results of the steps by their keys
+        """
+        max_workers = max_workers or int(os.getenv("WANNA_DEPLOY_MAX_WORKERS", "8"))
+        for step in self.steps.values():
+            missing = [key for key in step.depends_on if key not in self.steps]
+            if missing:
+                raise ValueError(f"Deploy step {step.key} depends on unknown steps {missing}")
+
+        results: dict[str, Any] = {}
+        errors: dict[str, str] = {}
+        pending = dict(self.steps)
+        running: dict[Future[Any], str] = {}
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="wanna-deploy") as executor:
+            while pending or running:
+                for key, step in list(pending.items()):
+                    failed = [dep for dep in step.depends_on if dep in errors]
+                    if failed:
+                        errors[key] = f"skipped, {', '.join(failed)} failed"
+                        del pending[key]
+                    elif all(dep in results for dep in step.depends_on):
+                        dependencies = {dep: results[dep] for dep in step.depends_on}
+                        running[executor.submit(step.run, dependencies)] = key
+                        del pending[key]
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"Deploy steps {list(pending)} have cyclic dependencies")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    if future.exception() is not None:
+                        errors[key] = str(future.exception())
+                        logger.user_error(f"Failed to deploy {key}: {future.exception()}")
+                    else:
+                        results[key] = future.result()
+
+        if errors:
+            raise DeployException(
+                f"Failed to deploy {len(errors)} resources: "
+                + "; ".join(f"{key}: {error}" for key, error in errors.items())
+            )
+        return results
@@ -0,0 +1,72 @@
+from collections.abc import Iterable, Sequence
+from typing import Any, Literal
+
+from wanna.core.loggers.wanna_logger import get_logger
+
+logger = get_logger(__name__)
+
+UpsertAction = Literal["create", "update", "unchanged"]
+
+_PLAN_SIGNS: dict[str, str] = {"create": "+", "update": "~", "unchanged": "="}
+
+
+def proto_to_dict(message: Any) -> dict[str, Any]:
+    """
+    Proto-plus message (GCP resource) as dict without the fields set to their default value.
+    """
+    return type(message).to_dict(message, always_print_fields_with_no_presence=False)
+
+
+def _matches(desired: Any, existing: Any, exact: bool) -> bool:
+    if isinstance(desired, dict) and isinstance(existing, dict):
+        if exact and desired.keys() != existing.keys():
+            return False
+        # nested messages only need the fields we set, GCP fills in the others (ids, defaults)
+        return all(
+            key in existing and _matches(value, existing[key], exact)
+            for key, value in desired.items()
+        )
+    if isinstance(desired, list) and isinstance(existing, list):
+        return len(desired) == len(existing) and all(
+            _matches(d, e, exact) for d, e in zip(desired, existing)
+        )
+    return desired == existing
+
+
+def changed_fields(
+    desired: dict[str, Any],
+    existing: dict[str, Any],
+    fields: Iterable[str],
+    exact_fields: Iterable[str] = (),
+) -> list[str]:
+    """
+    Compare the desired state of a GCP resource with the existing one field by field.
+
+    Both states are dicts of the resource proto without default values (see proto_to_dict),
+    so fields missing on one side are the default. Nested messages are compared only by
+    the fields in the desired state, maps like labels or environment variables listed
+    in exact_fields must match exactly, so removed keys are detected too.
+
+    Args:
+        desired: what the resource should look like
+        existing: what the resource looks like in GCP
+        fields: top-level fields wanna manages
+        exact_fields: top-level fields which must match exactly
+
+    Returns:
+        names of the fields that differ
+    """
+    exact = set(exact_fields)
+    return [
+        field
+        for field in fields
+        if not _matches(desired.get(field) or None, existing.get(field) or None, field in exact)
+    ]
+
+
+def log_upsert(kind: str, name: str, action: UpsertAction, fields: Sequence[str] = ()) -> None:
+    """
+    Print a plan-style line about an upserted resource, eg. `~ update alert policy x (labels)`.
+    """
+    details = f" ({', '.join(fields)})" if fields else ""
+    logger.user_info(f"{_PLAN_SIGNS[action]} {action} {kind} {name}{details}")
@@ -1,5 +1,7 @@
 import contextlib
 import json
+import os
+import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
@@ -7,33 +9,162 @@ from lazyimport import Import
 
 if TYPE_CHECKING:  # pragma: no cover
     import google.cloud.storage as gcloud_storage
+    import google.cloud.storage.transfer_manager as gcloud_storage_transfer_manager
     import smart_open
 else:
     gcloud_storage = Import("google.cloud.storage")
+    gcloud_storage_transfer_manager = Import("google.cloud.storage.transfer_manager")
     smart_open = Import("smart_open")
 
 from wanna.core.deployment.credentials import GCPCredentialsMixIn
+from wanna.core.utils.gcp import storage_client
+from wanna.core.utils.hashing import crc32c_bytes, crc32c_file
+
+MiB = 1024 * 1024
+
+
+def _upload_buffer_size() -> int:
+    # whole MiBs, so the buffer is also a valid GCS resumable upload chunk (multiple of 256 KiB)
+    return int(os.getenv("WANNA_UPLOAD_BUFFER_SIZE_MB", "8")) * MiB
+
+
+def _parallel_upload_threshold() -> int:
+    return int(os.getenv("WANNA_PARALLEL_UPLOAD_THRESHOLD_MB", "128")) * MiB
+
+
+def _generation(remote: "gcloud_storage.Blob | None") -> int:
+    # generation 0 means the object must not exist yet
+    return remote.generation if remote is not None and remote.generation else 0
 
 
 class IOMixin(GCPCredentialsMixIn):
     @contextlib.contextmanager
-    def _open(self, uri, mode="r", **kwargs):
+    def _open(self, uri, mode="r", gcs_params: dict[str, Any] | None = None, **kwargs):
         transport_params = (
-            {"client": gcloud_storage.Client(credentials=self.credentials)}
+            {"client": storage_client(self.credentials), **(gcs_params or {})}
             if str(uri).startswith("gs")
             else {}
         )
         with smart_open.open(uri, mode, transport_params=transport_params, **kwargs) as c:
             yield c
 
-    def upload_file(self, source: str, destination: str) -> None:
-        with self._open(source, "rb") as f:
-            with self._open(destination, "wb") as fout:
-                fout.write(f.read())
+    def upload_file(self, source: str, destination: str, buffer_size: int | None = None) -> bool:
+        """
+        Upload a file without loading it into memory.
+
+        Objects already in GCS are copied server-side, large local files are uploaded
+        to GCS in chunks in parallel and everything else is streamed through a buffer
+        of buffer_size bytes. Nothing is uploaded when the GCS destination already has
+        the same CRC32C checksum. The upload fails instead of overwriting the destination
+        when someone else changes it in the meantime.
+
+        Args:
+            source: local path or gs:// uri
+            destination: local path or gs:// uri
+            buffer_size: defaults to WANNA_UPLOAD_BUFFER_SIZE_MB env var (8 MiB)
+
+        Returns:
+            False if the upload was skipped, because the destination is identical
+        """
+        buffer_size = buffer_size or _upload_buffer_size()
+        if not str(destination).startswith("gs://"):
+            self._stream_file(source, destination, buffer_size)
+            return True
+        if str(source).startswith("gs://"):
+            return self.copy(source, destination)
+
+        remote = self._get_blob(destination)
+        if remote is not None and remote.crc32c == crc32c_file(source):
+            return False
+        if os.path.getsize(source) >= _parallel_upload_threshold():
+            # multipart uploads do not support preconditions
+            self._upload_file_concurrently(source, destination, buffer_size)
+        else:
+            self._stream_file(
+                source, destination, buffer_size, if_generation_match=_generation(remote)
+            )
+        return True
+
+    def _stream_file(
+        self,
+        source: str,
+        destination: str,
+        buffer_size: int,
+        if_generation_match: int | None = None,
+    ) -> None:
+        # smart_open buffers 50 MiB parts for GCS by default
+        gcs_params: dict[str, Any] = {"min_part_size": buffer_size}
+        if if_generation_match is not None:
+            gcs_params["blob_open_kwargs"] = {"if_generation_match": if_generation_match}
+        # copy the bytes as they are, smart_open would decompress and compress .gz files again
+        with self._open(source, "rb", compression="disable") as f:
+            with self._open(
+                destination, "wb", gcs_params=gcs_params, compression="disable"
+            ) as fout:
+                shutil.copyfileobj(f, fout, buffer_size)
+
+    def _upload_file_concurrently(self, source: str, destination: str, chunk_size: int) -> None:
+        blob = gcloud_storage.Blob.from_string(
+            destination, client=storage_client(self.credentials)
+        )
+        gcloud_storage_transfer_manager.upload_chunks_concurrently(
+            source,
+            blob,
+            chunk_size=max(chunk_size, 32 * MiB),
+            worker_type=gcloud_storage_transfer_manager.THREAD,
+            max_workers=int(os.getenv("WANNA_PUSH_MAX_WORKERS", "8")),
+        )
+
+    def _get_blob(self, uri: str) -> gcloud_storage.Blob | None:
+        blob = gcloud_storage.Blob.from_string(uri, client=storage_client(self.credentials))
+        return blob.bucket.get_blob(blob.name)
+
+    def copy(self, source: str, destination: str) -> bool:
+        """
+        Copy a file, objects in GCS are copied server-side. Same as upload_file,
+        nothing is copied when the destination is identical.
+
+        Returns:
+            False if the copy was skipped, because the destination is identical
+        """
+        if not (str(source).startswith("gs://") and str(destination).startswith("gs://")):
+            return self.upload_file(source, destination)
+
+        # server-side copy, the object is not downloaded and uploaded again
+        source_blob = self._get_blob(source)
+        if source_blob is None:
+            raise FileNotFoundError(f"{source} does not exist")
+        remote = self._get_blob(destination)
+        if remote is not None and remote.crc32c == source_blob.crc32c:
+            return False
+        destination_blob = gcloud_storage.Blob.from_string(
+            destination, client=storage_client(self.credentials)
+        )
+        generation = _generation(remote)
+        token, _, _ = destination_blob.rewrite(source_blob, if_generation_match=generation)
+        while token is not None:
+            token, _, _ = destination_blob.rewrite(
+                source_blob, token=token, if_generation_match=generation
+            )
+        return True
+
+    def write(self, destination: Path | str, body: str) -> bool:
+        """
+        Write the body to a file, nothing is uploaded when the GCS destination
+        already has the same content, see upload_file.
 
-    def write(self, destination: Path | str, body: str) -> None:
-        with self._open(destination, "w") as fout:
+        Returns:
+            False if the write was skipped, because the destination is identical
+        """
+        gcs_params: dict[str, Any] = {}
+        if str(destination).startswith("gs://"):
+            remote = self._get_blob(str(destination))
+            if remote is not None and remote.crc32c == crc32c_bytes(body.encode("utf-8")):
+                return False
+            gcs_params["blob_open_kwargs"] = {"if_generation_match": _generation(remote)}
+        with self._open(destination, "w", gcs_params=gcs_params) as fout:
             fout.write(body)
+        return True
 
     def read(self, source: Path | str) -> dict[Any, Any]:
         with self._open(source, "r") as fin:
@@ -111,6 +111,8 @@ class PathArtifact(PushArtifact):
     name: str
     source: str
     destination: str
+    # other destinations of the same file, copied from destination once it is pushed
+    aliases: list[str] = []
 
 
 class ContainerArtifact(PushArtifact):
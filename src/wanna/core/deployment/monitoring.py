@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+import threading
+from collections.abc import Callable, Iterable
 from typing import TYPE_CHECKING, Any, cast
 
 from lazyimport import Import
@@ -10,37 +12,103 @@ if TYPE_CHECKING:  # pragma: no cover
     import google.cloud.logging as gcloud_logging
     import google.cloud.monitoring_v3 as gcloud_monitoring_v3
     import google.cloud.pubsub_v1 as gcloud_pubsub_v1
-    import waiting
 else:
     gcloud_exceptions = Import("google.cloud.exceptions")
     gcloud_logging = Import("google.cloud.logging")
     gcloud_monitoring_v3 = Import("google.cloud.monitoring_v3")
     gcloud_pubsub_v1 = Import("google.cloud.pubsub_v1")
-    waiting = Import("waiting")
 
 from wanna.core.deployment.credentials import GCPCredentialsMixIn
+from wanna.core.deployment.diff import changed_fields, log_upsert, proto_to_dict
 from wanna.core.deployment.models import (
     AlertPolicyResource,
     LogMetricResource,
     NotificationChannelResource,
 )
 from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.utils.polling import wait_for
 
 logger = get_logger(__name__)
 
+# fields of alert policies managed by wanna, the others are left as they are
+ALERT_POLICY_FIELDS = [
+    "display_name",
+    "user_labels",
+    "conditions",
+    "alert_strategy",
+    "combiner",
+    "enabled",
+    "notification_channels",
+]
+
+
+class MonitoringInventory:
+    """
+    Monitoring resources (notification channels, alert policies) of GCP projects
+    indexed by their display name.
+
+    Every project is listed only once per run, on the first lookup. Resources created
+    or updated later in the run are put into the inventory, so following upserts
+    do not have to list all resources of the project again.
+
+    Args:
+        list_resources: lists all resources of the project
+    """
+
+    def __init__(self, list_resources: Callable[[str], Iterable[Any]]):
+        self._list_resources = list_resources
+        self._projects: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _resources(self, project: str) -> dict[str, Any]:
+        # listing under the lock, concurrent upserts wait for one listing of the project
+        with self._lock:
+            if project not in self._projects:
+                resources: dict[str, Any] = {}
+                for resource in self._list_resources(project):
+                    resources.setdefault(resource.display_name, resource)
+                self._projects[project] = resources
+            return self._projects[project]
+
+    def get(self, project: str, display_name: str) -> Any | None:
+        return self._resources(project).get(display_name)
+
+    def put(self, project: str, display_name: str, resource: Any) -> None:
+        resources = self._resources(project)
+        with self._lock:
+            resources[display_name] = resource
+
+
+class MonitoringInventories:
+    """
+    Inventories of notification channels and alert policies of one deploy run.
+
+    Create one per deploy run and pass it to all upserts of the run, so every project
+    is listed only once and nothing is cached between runs.
+
+    Args:
+        credentials: credentials used to list the resources
+    """
+
+    def __init__(self, credentials: Any):
+        self.notification_channels = MonitoringInventory(
+            lambda project: gcloud_monitoring_v3.NotificationChannelServiceClient(
+                credentials=credentials
+            ).list_notification_channels(name=f"projects/{project}")
+        )
+        self.alert_policies = MonitoringInventory(
+            lambda project: gcloud_monitoring_v3.AlertPolicyServiceClient(
+                credentials=credentials
+            ).list_alert_policies(name=f"projects/{project}")
+        )
+
 
 class MonitoringMixin(GCPCredentialsMixIn):
-    @staticmethod
-    def _get_notification_channel(
-        client: gcloud_monitoring_v3.NotificationChannelServiceClient,
-        project: str,
-        display_name: str,
-    ) -> gcloud_monitoring_v3.NotificationChannel | None:
-        channels = list(client.list_notification_channels(name=f"projects/{project}"))
-        channels = [channel for channel in channels if channel.display_name == display_name]
-        if channels:
-            return channels[0]
-        return None
+    def monitoring_inventories(self) -> MonitoringInventories:
+        """
+        New inventories of monitoring resources for one deploy run.
+        """
+        return MonitoringInventories(self.credentials)
 
     def require_pubsub_topic(self, project_id: str, topic_id: str) -> None:
         """
@@ -63,14 +131,17 @@ class MonitoringMixin(GCPCredentialsMixIn):
             logger.user_info(f"Pubsub topic not found: {topic_path}")
             raise e
 
-    def upsert_notification_channel(self, resource: NotificationChannelResource):
+    def upsert_notification_channel(
+        self,
+        resource: NotificationChannelResource,
+        inventories: MonitoringInventories | None = None,
+    ):
         client = gcloud_monitoring_v3.NotificationChannelServiceClient(
             credentials=self.credentials
         )
+        channels = (inventories or self.monitoring_inventories()).notification_channels
 
-        channel = MonitoringMixin._get_notification_channel(
-            client, resource.project, resource.name
-        )
+        channel = channels.get(resource.project, resource.name)
         if resource.type_ == "pubsub" and "topic" in resource.config:
             topic_path = resource.config["topic"]
             parts = topic_path.split("/")
@@ -80,26 +151,37 @@ class MonitoringMixin(GCPCredentialsMixIn):
                 self.require_pubsub_topic(project_id, topic_id)
 
         if not channel:
-            with logger.user_spinner(f"Creating notification channel: {resource.name}"):
-                notification_channel = gcloud_monitoring_v3.NotificationChannel(
-                    type_=resource.type_,
-                    display_name=resource.name,
-                    description=resource.description,
-                    labels=resource.config,
-                    user_labels=resource.labels,
-                    verification_status=gcloud_monitoring_v3.NotificationChannel.VerificationStatus.VERIFIED,
-                    enabled=True,
-                )
-                return client.create_notification_channel(
-                    name=f"projects/{resource.project}",
-                    notification_channel=notification_channel,
-                )
+            logger.user_info(f"Creating notification channel: {resource.name}")
+            notification_channel = gcloud_monitoring_v3.NotificationChannel(
+                type_=resource.type_,
+                display_name=resource.name,
+                description=resource.description,
+                labels=resource.config,
+                user_labels=resource.labels,
+                verification_status=gcloud_monitoring_v3.NotificationChannel.VerificationStatus.VERIFIED,
+                enabled=True,
+            )
+            channel = client.create_notification_channel(
+                name=f"projects/{resource.project}",
+                notification_channel=notification_channel,
+            )
+            channels.put(resource.project, resource.name, channel)
+            return channel
         else:
             logger.user_info(f"Found existing notification channel: {resource.name}")
             return channel
 
-    def upsert_alert_policy(self, resource: AlertPolicyResource):
+    def upsert_alert_policy(
+        self,
+        resource: AlertPolicyResource,
+        inventories: MonitoringInventories | None = None,
+    ):
         client = gcloud_monitoring_v3.AlertPolicyServiceClient(credentials=self.credentials)
+        # single line with single spaces, as GCP returns it, so unchanged policies compare equal
+        condition_filter = (
+            f'metric.type="logging.googleapis.com/user/{resource.logging_metric_type}" '
+            f'AND resource.type="{resource.resource_type}"'
+        )
 
         alert_policy = {
             "display_name": resource.display_name,
@@ -110,10 +192,7 @@ class MonitoringMixin(GCPCredentialsMixIn):
                     "condition_threshold": {
                         # https://issuetracker.google.com/issues/143436657?pli=1
                         # resource.type must be defined based on the resource type from log metric
-                        "filter": f"""
-                            metric.type="logging.googleapis.com/user/{resource.logging_metric_type}"
-                            AND resource.type="{resource.resource_type}"
-                            """,
+                        "filter": condition_filter,
                         "aggregations": [
                             {
                                 "alignment_period": "600s",
@@ -140,18 +219,32 @@ class MonitoringMixin(GCPCredentialsMixIn):
             gcloud_monitoring_v3.AlertPolicy,
             gcloud_monitoring_v3.AlertPolicy.from_json(json.dumps(alert_policy)),
         )
-        policies = client.list_alert_policies(name=f"projects/{resource.project}")
-        policy = [policy for policy in policies if policy.display_name == resource.name]
+        policies = (inventories or self.monitoring_inventories()).alert_policies
+        policy = policies.get(resource.project, resource.name)
         if policy:
-            policy = policy[0]
             alert_policy.name = policy.name
-            with logger.user_spinner(f"Updating alert policy: {alert_policy.name}"):
-                client.update_alert_policy(alert_policy=alert_policy)
+            fields = changed_fields(
+                proto_to_dict(alert_policy),
+                proto_to_dict(policy),
+                fields=ALERT_POLICY_FIELDS,
+                exact_fields=["user_labels"],
+            )
+            if not fields:
+                log_upsert("alert policy", resource.name, "unchanged")
+                return
+            log_upsert("alert policy", resource.name, "update", fields)
+            policies.put(
+                resource.project,
+                resource.name,
+                client.update_alert_policy(alert_policy=alert_policy),
+            )
         else:
-            with logger.user_spinner(f"Creating alert policy: {alert_policy.name}"):
-                client.create_alert_policy(
-                    name=f"projects/{resource.project}", alert_policy=alert_policy
-                )
+            log_upsert("alert policy", resource.name, "create")
+            created = client.create_alert_policy(
+                name=f"projects/{resource.project}", alert_policy=alert_policy
+            )
+            # the created policy has its name (id), the next upsert of it is an update
+            policies.put(resource.project, resource.name, created)
 
     def upsert_log_metric(self, resource: LogMetricResource) -> dict[str, Any]:
         client = gcloud_logging.Client(credentials=self.credentials)
@@ -167,15 +260,20 @@ class MonitoringMixin(GCPCredentialsMixIn):
                 filter_=resource.filter_,
                 description=resource.description,
             )
-            with logger.user_spinner(f"Creating log metric: {resource.name}"):
-                waiting.wait(
-                    lambda: client.metrics_api.metric_get(
+            logger.user_info(f"Creating log metric: {resource.name}")
+
+            def get_created_metric() -> dict[str, Any] | None:
+                try:
+                    return client.metrics_api.metric_get(
                         project=resource.project, metric_name=resource.name
-                    ),
-                    timeout_seconds=120,
-                    sleep_seconds=5,
-                    waiting_for="Log metric",
-                )
-            return client.metrics_api.metric_get(
-                project=resource.project, metric_name=resource.name
+                    )
+                except gcloud_exceptions.NotFound:
+                    return None
+
+            return wait_for(
+                f"log metric {resource.name}",
+                get_created_metric,
+                timeout=120,
+                initial_delay=1,
+                max_delay=10,
             )
@@ -1,28 +1,26 @@
 import atexit
 import json
 import os
-import zipfile
+import tempfile
+from collections.abc import Callable
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from lazyimport import Import
 
 if TYPE_CHECKING:  # pragma: no cover
-    import google.api_core.exceptions as gapi_core_exceptions
     import google.cloud.aiplatform as gcloud_aiplatform
-    import google.cloud.functions_v1 as gcloud_functions_v1
     from google.cloud import logging
     from google.cloud.aiplatform.compat.types import (
         pipeline_state_v1 as gca_pipeline_state_v1,
     )
 else:
-    gapi_core_exceptions = Import("google.api_core.exceptions")
     logging = Import("google.cloud.logging")
     gcloud_aiplatform = Import("google.cloud.aiplatform")
     gca_pipeline_state_v1 = Import("google.cloud.aiplatform.compat.types.pipeline_state_v1")
-    gcloud_functions_v1 = Import("google.cloud.functions_v1")
 
 from wanna.core.deployment.artifacts_push import ArtifactsPushMixin
+from wanna.core.deployment.deploy_plan import DeployPlan
 from wanna.core.deployment.models import (
     AlertPolicyResource,
     CloudFunctionResource,
@@ -31,6 +29,7 @@ from wanna.core.deployment.models import (
     NotificationChannelResource,
     PipelineResource,
 )
+from wanna.core.deployment.monitoring import MonitoringInventories
 from wanna.core.deployment.vertex_scheduling import VertexSchedulingMixIn
 from wanna.core.loggers.wanna_logger import get_logger
 from wanna.core.models.notification_channel import (
@@ -40,6 +39,7 @@ from wanna.core.models.notification_channel import (
 from wanna.core.services.path_utils import PipelinePaths
 from wanna.core.utils import templates
 from wanna.core.utils.gcp import is_gcs_path
+from wanna.core.utils.io import write_reproducible_zip
 from wanna.core.utils.loaders import load_yaml_path
 from wanna.core.utils.time import get_timestamp, update_time_template
 
@@ -122,6 +122,36 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
         version: str,
         env: str,
     ) -> None:
+        plan = DeployPlan()
+        self.plan_pipeline_deployment(plan, resource, pipeline_paths, version, env)
+        plan.execute()
+
+    def plan_pipeline_deployment(
+        self,
+        plan: DeployPlan,
+        resource: PipelineResource,
+        pipeline_paths: PipelinePaths,
+        version: str,
+        env: str,
+        inventories: MonitoringInventories | None = None,
+    ) -> None:
+        """
+        Add all resources of the pipeline deployment to the plan.
+
+        Notification channels are shared by all pipelines of the plan, the cloud function
+        and the cloud scheduler wait for them, while the log metric, the alert policy
+        and the SLA monitoring are deployed independently of the function.
+
+        Args:
+            plan: where to add the resources
+            resource: manifest of the pipeline
+            pipeline_paths: paths of the pipeline
+            version: deployed version
+            env: environment to deploy to
+            inventories: monitoring resources shared by all pipelines of the plan,
+                new ones if not set
+        """
+        inventories = inventories or self.monitoring_inventories()
         schedule = (
             next(
                 iter([s for s in resource.schedule if s.environment == env]),
@@ -144,14 +174,14 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
         }
 
         # Create notification channels
-        channels = []
+        channel_resources = []
         for config in resource.notification_channels:
             if isinstance(config, EmailNotificationChannel):
                 for email in config.emails:
                     channel_config = {"email_address": str(email)}
                     name = email.split("@")[0].replace(".", "-")
-                    channel = self.upsert_notification_channel(
-                        resource=NotificationChannelResource(
+                    channel_resources.append(
+                        NotificationChannelResource(
                             type_=config.type,
                             description=config.description,
                             name=f"{name}-wanna-email-channel",
@@ -160,13 +190,12 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
                             **base_resource,
                         )
                     )
-                    channels.append(channel.name)
             elif isinstance(config, PubSubNotificationChannel):
                 for topic in config.topics:
                     project_id = resource.compile_env_params.get("project_id")
                     channel_config = {"topic": f"projects/{project_id}/topics/{topic}"}
-                    channel = self.upsert_notification_channel(
-                        resource=NotificationChannelResource(
+                    channel_resources.append(
+                        NotificationChannelResource(
                             type_=config.type,
                             description=config.description,
                             name=f"{topic}-wanna-alert-topic-channel",
@@ -175,28 +204,50 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
                             **base_resource,
                         )
                     )
-                    channels.append(channel.name)
             else:
                 raise ValueError(
                     f"Validation error notification config {config} can't be handled by wanna-ml"
                 )
 
-        function = self.upsert_cloud_function(
-            resource=CloudFunctionResource(
-                name=resource.pipeline_name,
-                build_dir=pipeline_paths.get_local_pipeline_deployment_path(version),
-                resource_root=pipeline_paths.get_gcs_pipeline_deployment_path(version),
-                resource_function_template="scheduler_cloud_function.py",
-                resource_requirements_template="scheduler_cloud_function_requirements.txt",
-                template_vars=resource.model_dump(),
-                env_params=resource.compile_env_params,
-                labels=resource.labels,
-                network=resource.network,
-                notification_channels=channels,
-                **base_resource,
+        def upsert_channel(channel: NotificationChannelResource) -> Callable[[Any], str]:
+            return lambda _: (
+                self.upsert_notification_channel(resource=channel, inventories=inventories).name
+            )
+
+        # the same channel is upserted once, concurrent upserts would create duplicates
+        channel_keys = [
+            plan.add(
+                f"notification-channel/{channel.project}/{channel.name}", upsert_channel(channel)
+            )
+            for channel in channel_resources
+        ]
+
+        def channel_names(results: dict[str, Any]) -> list[str]:
+            return [results[key] for key in channel_keys]
+
+        prefix = f"pipeline/{pipeline_paths.pipeline_name}"
+        function_key = plan.add(
+            f"{prefix}/cloud-function",
+            lambda results: self.upsert_cloud_function(
+                resource=CloudFunctionResource(
+                    name=resource.pipeline_name,
+                    build_dir=pipeline_paths.get_local_pipeline_deployment_path(version),
+                    # packages are content addressed and shared by all versions of the pipeline
+                    resource_root=pipeline_paths.gcs_pipeline_path,
+                    resource_function_template="scheduler_cloud_function.py",
+                    resource_requirements_template="scheduler_cloud_function_requirements.txt",
+                    template_vars=resource.model_dump(),
+                    env_params=resource.compile_env_params,
+                    labels=resource.labels,
+                    network=resource.network,
+                    notification_channels=channel_names(results),
+                    **base_resource,
+                ),
+                env=env,
+                version=version,
+                inventories=inventories,
             ),
-            env=env,
-            version=version,
+            depends_on=channel_keys,
         )
 
         if schedule:
@@ -207,18 +258,23 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
                 "enable_caching": resource.enable_caching,
             }  # TODO extend with execution_date(now) ?
 
-            self.upsert_cloud_scheduler(
-                function=function,
-                resource=CloudSchedulerResource(
-                    name=resource.pipeline_name,
-                    body=body,
-                    cloud_scheduler=schedule,
-                    labels=resource.labels,
-                    notification_channels=channels,
-                    **base_resource,
+            plan.add(
+                f"{prefix}/cloud-scheduler",
+                lambda results: self.upsert_cloud_scheduler(
+                    function=results[function_key],
+                    resource=CloudSchedulerResource(
+                        name=resource.pipeline_name,
+                        body=body,
+                        cloud_scheduler=schedule,
+                        labels=resource.labels,
+                        notification_channels=channel_names(results),
+                        **base_resource,
+                    ),
+                    env=env,
+                    version=version,
+                    inventories=inventories,
                 ),
-                env=env,
-                version=version,
+                depends_on=[function_key, *channel_keys],
             )
 
         else:
@@ -228,36 +284,48 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
 
         logging_metric_ref = f"{resource.pipeline_name}-ml-pipeline-error"
         gcp_resource_type = "aiplatform.googleapis.com/PipelineJob"
-        self.upsert_log_metric(
-            LogMetricResource(
-                project=resource.project,
-                name=logging_metric_ref,
-                location=resource.location,
-                filter_=f"""
+        log_metric_key = plan.add(
+            f"{prefix}/log-metric",
+            lambda _: self.upsert_log_metric(
+                LogMetricResource(
+                    project=resource.project,
+                    name=logging_metric_ref,
+                    location=resource.location,
+                    filter_=f"""
             resource.type="{gcp_resource_type}"
             AND severity >= WARNING
             AND resource.labels.pipeline_job_id:"{resource.pipeline_name}"
             """,
-                description=f"Log metric for {resource.pipeline_name} vertex ai pipeline",
-            )
+                    description=f"Log metric for {resource.pipeline_name} vertex ai pipeline",
+                )
+            ),
         )
         logging_policy_name = f"{resource.pipeline_name}-{env}-ml-pipeline-alert-policy"
-        self.upsert_alert_policy(
-            AlertPolicyResource(
-                name=logging_policy_name,
-                project=resource.project,
-                location=resource.location,
-                logging_metric_type=logging_metric_ref,
-                resource_type=gcp_resource_type,
-                display_name=logging_policy_name,
-                labels=resource.labels,
-                notification_channels=channels,
-            )
+        plan.add(
+            f"{prefix}/alert-policy",
+            lambda results: self.upsert_alert_policy(
+                AlertPolicyResource(
+                    name=logging_policy_name,
+                    project=resource.project,
+                    location=resource.location,
+                    logging_metric_type=logging_metric_ref,
+                    resource_type=gcp_resource_type,
+                    display_name=logging_policy_name,
+                    labels=resource.labels,
+                    notification_channels=channel_names(results),
+                ),
+                inventories,
+            ),
+            depends_on=[log_metric_key, *channel_keys],
         )
 
         if "wanna_sla_hours" in resource.labels:
-            self.upsert_sink(resource)
-            self.upsert_sla_function(resource, version, env)
+            sink_key = plan.add(f"{prefix}/sink", lambda _: self.upsert_sink(resource))
+            plan.add(
+                f"{prefix}/sla-function",
+                lambda _: self.upsert_sla_function(resource, version, env),
+                depends_on=[sink_key],
+            )
 
     def upsert_sink(self, resource: PipelineResource):
         """Creates a sink to export logs to the given Cloud Storage bucket.
@@ -287,9 +355,10 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
             f"Deploying {resource.pipeline_name} SLA monitoring function with version {version} to env {env}"
         )
         parent = f"projects/{resource.project}/locations/{resource.location}"
-        local_functions_package = "sla.zip"
-        functions_gcs_path_dir = f"{resource.pipeline_bucket}/wanna-pipelines/{resource.pipeline_name}/deployment/{version}/functions"
-        functions_gcs_path = f"{functions_gcs_path_dir}/sla.zip"
+        # packages are content addressed and shared by all versions of the pipeline
+        functions_gcs_path_dir = (
+            f"{resource.pipeline_bucket}/wanna-pipelines/{resource.pipeline_name}/functions"
+        )
         function_name = f"{resource.pipeline_name}-{env}-{version}"
         function_path = f"{parent}/functions/{function_name}"
 
@@ -300,32 +369,28 @@ class VertexPipelinesMixInVertex(VertexSchedulingMixIn, ArtifactsPushMixin):
 
         requirements = templates.render_template(Path("sla_cloud_function_requirements.txt"))
 
-        with zipfile.ZipFile(local_functions_package, "w") as z:
-            z.writestr("main.py", cloud_function)
-            z.writestr("requirements.txt", requirements)
-
         if not is_gcs_path(functions_gcs_path_dir):
             os.makedirs(functions_gcs_path_dir, exist_ok=True)
 
-        self.upload_file(str(local_functions_package), functions_gcs_path)
-
-        cf = gcloud_functions_v1.CloudFunctionsServiceClient(credentials=self.credentials)
-
-        function = {
-            "name": function_path,
-            "description": f"wanna {resource.pipeline_name} function for {env} pipeline",
-            "source_archive_url": functions_gcs_path,
-            "entry_point": "main",
-            "runtime": "python312",
-            "event_trigger": {
-                "event_type": "google.storage.object.finalize",
-                "resource": f"projects/{resource.project}/buckets/"
-                + f"{resource.pipeline_bucket}"[5:],
-            },
-            "service_account_email": resource.service_account,
-            "labels": resource.labels,
-        }
-        try:
-            cf.create_function({"location": parent, "function": function}).result()
-        except gapi_core_exceptions.AlreadyExists:
-            logger.user_error(f"Function {function_name} already exists, no need to re-deploy")
+        # pipelines are deployed concurrently, each packages its function in its own directory
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_functions_package = Path(tmp_dir) / "sla.zip"
+            package_hash = write_reproducible_zip(
+                local_functions_package,
+                {"main.py": cloud_function, "requirements.txt": requirements},
+            )
+            function = {
+                "name": function_path,
+                "description": f"wanna {resource.pipeline_name} function for {env} pipeline",
+                "source_archive_url": f"{functions_gcs_path_dir}/sla-{package_hash}.zip",
+                "entry_point": "main",
+                "runtime": "python312",
+                "event_trigger": {
+                    "event_type": "google.storage.object.finalize",
+                    "resource": f"projects/{resource.project}/buckets/"
+                    + f"{resource.pipeline_bucket}"[5:],
+                },
+                "service_account_email": resource.service_account,
+                "labels": resource.labels,
+            }
+            self.upsert_function(parent, function, local_functions_package)
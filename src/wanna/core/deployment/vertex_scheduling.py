@@ -1,25 +1,27 @@
 import json
 import os
-import zipfile
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from caseconverter import snakecase
 from lazyimport import Import
 
 if TYPE_CHECKING:  # pragma: no cover
     import google.api_core.exceptions as gapi_core_exceptions
+    import google.api_core.operation as gapi_core_operation
     import google.cloud.exceptions as gcloud_exceptions
     import google.cloud.functions_v1 as gcloud_functions_v1
     import google.protobuf.duration_pb2 as gprotobuf_duration_pb2
     from google.cloud import scheduler_v1
 else:
     gapi_core_exceptions = Import("google.api_core.exceptions")
+    gapi_core_operation = Import("google.api_core.operation")
     scheduler_v1 = Import("google.cloud.scheduler_v1")
     gcloud_exceptions = Import("google.cloud.exceptions")
     gcloud_functions_v1 = Import("google.cloud.functions_v1")
     gprotobuf_duration_pb2 = Import("google.protobuf.duration_pb2")
 
+from wanna.core.deployment.diff import changed_fields, log_upsert, proto_to_dict
 from wanna.core.deployment.io import IOMixin
 from wanna.core.deployment.models import (
     AlertPolicyResource,
@@ -27,10 +29,12 @@ from wanna.core.deployment.models import (
     CloudSchedulerResource,
     LogMetricResource,
 )
-from wanna.core.deployment.monitoring import MonitoringMixin
+from wanna.core.deployment.monitoring import MonitoringInventories, MonitoringMixin
 from wanna.core.loggers.wanna_logger import get_logger
 from wanna.core.utils import templates
 from wanna.core.utils.gcp import is_gcs_path
+from wanna.core.utils.io import write_reproducible_zip
+from wanna.core.utils.polling import wait_for
 
 logger = get_logger(__name__)
 
@@ -42,6 +46,7 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
         resource: CloudSchedulerResource,
         version: str,
         env: str,
+        inventories: MonitoringInventories | None = None,
     ) -> None:
         client = scheduler_v1.CloudSchedulerClient(credentials=self.credentials)
         parent = f"projects/{resource.project}/locations/{resource.location}"
@@ -79,22 +84,24 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
             # TODO: "attempt_deadline"
         }
 
+        update_mask = ["schedule", "http_target", "time_zone"]
         try:
-            _ = client.get_job({"name": job_name})
-            logger.user_info(f"Found {job_name} cloud scheduler job, updating it")
-            client.update_job(
-                {
-                    "job": job,
-                    "update_mask": {"paths": ["schedule", "http_target", "time_zone"]},
-                }
-            )
-
+            existing_job = client.get_job({"name": job_name})
         except gcloud_exceptions.NotFound:
             # Does not exist let's create it
-            logger.user_info(
-                f"Creating {job_name} with deployment manifest for {env} with version {version}"
-            )
+            log_upsert("cloud scheduler", job_name, "create")
             client.create_job({"parent": parent, "job": job})
+        else:
+            fields = changed_fields(
+                proto_to_dict(scheduler_v1.Job(job)),
+                proto_to_dict(existing_job),
+                fields=update_mask,
+            )
+            if fields:
+                log_upsert("cloud scheduler", job_name, "update", fields)
+                client.update_job({"job": job, "update_mask": {"paths": update_mask}})
+            else:
+                log_upsert("cloud scheduler", job_name, "unchanged")
 
         logging_metric_ref = f"{job_id}-cloud-scheduler-errors"
         gcp_resource_type = "cloud_scheduler_job"
@@ -120,11 +127,16 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
                 display_name=f"{job_id}-cloud-scheduler-alert-policy",
                 labels=resource.labels,
                 notification_channels=resource.notification_channels,
-            )
+            ),
+            inventories,
         )
 
     def upsert_cloud_function(
-        self, resource: CloudFunctionResource, version: str, env: str
+        self,
+        resource: CloudFunctionResource,
+        version: str,
+        env: str,
+        inventories: MonitoringInventories | None = None,
     ) -> tuple[str, str]:
         logger.user_info(
             f"Deploying {resource.name} cloud function with version {version} to env {env}"
@@ -134,7 +146,6 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
         os.makedirs(pipeline_functions_dir, exist_ok=True)
         local_functions_package = pipeline_functions_dir / "package.zip"
         functions_gcs_path_dir = f"{resource.resource_root}/functions"
-        functions_gcs_path = f"{functions_gcs_path_dir}/package.zip"
         function_name = f"{resource.name}-{env}"
         function_path = f"{parent}/functions/{function_name}"
 
@@ -149,16 +160,16 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
             manifest=resource.template_vars,
         )
 
-        with zipfile.ZipFile(local_functions_package, "w") as z:
-            z.writestr("main.py", cloud_function)
-            z.writestr("requirements.txt", requirements)
+        package_hash = write_reproducible_zip(
+            local_functions_package,
+            {"main.py": cloud_function, "requirements.txt": requirements},
+        )
+        # content addressed, the function is redeployed only when its source changes
+        functions_gcs_path = f"{functions_gcs_path_dir}/package-{package_hash}.zip"
 
         if not is_gcs_path(functions_gcs_path_dir):
             os.makedirs(functions_gcs_path_dir, exist_ok=True)
 
-        self.upload_file(str(local_functions_package), functions_gcs_path)
-
-        cf = gcloud_functions_v1.CloudFunctionsServiceClient(credentials=self.credentials)
         function_url = (
             f"https://{resource.location}-{resource.project}.cloudfunctions.net/{function_name}"
         )
@@ -180,14 +191,7 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
             "available_memory_mb": 512,
             "timeout": timeout,
         }
-
-        try:
-            cf.get_function({"name": function_path})
-            cf.update_function({"function": function}).result()
-        # it can raise denied on resource 'projects/{project_id}/locations/{loaction}/functions/{function_name}'
-        # (or resource may not exist).
-        except (gcloud_exceptions.NotFound, gapi_core_exceptions.PermissionDenied):
-            cf.create_function({"location": parent, "function": function}).result()
+        self.upsert_function(parent, function, local_functions_package)
 
         logging_metric_ref = f"{function_name}-cloud-function-errors"
         gcp_resource_type = "cloud_function"
@@ -214,10 +218,83 @@ class VertexSchedulingMixIn(MonitoringMixin, IOMixin):
                 display_name=f"{function_name}-cloud-function-alert-policy",
                 labels=resource.labels,
                 notification_channels=resource.notification_channels,
-            )
+            ),
+            inventories,
         )
 
         return (
             function_path,
             function_url,
         )
+
+    def upsert_function(self, parent: str, function: dict[str, Any], package: Path) -> None:
+        """
+        Create a cloud function or update it when it differs from the desired state.
+
+        The package is uploaded to the source_archive_url of the function, unless the deployed
+        function already runs from it. Packages should be stored at content addressed paths
+        (see write_reproducible_zip), then an unchanged source is never uploaded
+        nor rebuilt by GCP.
+
+        Args:
+            parent: projects/{project}/locations/{location} of the function
+            function: desired state of the function, see CloudFunction
+            package: local zip with the source of the function
+        """
+        cf = gcloud_functions_v1.CloudFunctionsServiceClient(credentials=self.credentials)
+        function_path = function["name"]
+        try:
+            existing_function = cf.get_function({"name": function_path})
+        # it can raise denied on resource 'projects/{project_id}/locations/{loaction}/functions/{function_name}'
+        # (or resource may not exist).
+        except (gcloud_exceptions.NotFound, gapi_core_exceptions.PermissionDenied):
+            existing_function = None
+
+        if (
+            existing_function is None
+            or existing_function.source_archive_url != function["source_archive_url"]
+        ):
+            self.upload_file(str(package), function["source_archive_url"])
+
+        if existing_function is None:
+            log_upsert("cloud function", function_path, "create")
+            self._wait_for_function(
+                function_path, cf.create_function({"location": parent, "function": function})
+            )
+            return
+
+        fields = changed_fields(
+            proto_to_dict(gcloud_functions_v1.CloudFunction(function)),
+            proto_to_dict(existing_function),
+            fields=list(function),
+            exact_fields=["labels", "environment_variables"],
+        )
+        if existing_function.status != gcloud_functions_v1.CloudFunctionStatus.ACTIVE:
+            fields.append("status")
+        if fields:
+            log_upsert("cloud function", function_path, "update", fields)
+            self._wait_for_function(function_path, cf.update_function({"function": function}))
+        else:
+            log_upsert("cloud function", function_path, "unchanged")
+
+    @staticmethod
+    def _wait_for_function(function_path: str, operation: gapi_core_operation.Operation) -> None:
+        """
+        Wait for a cloud function deployment, polling with a backoff.
+
+        Args:
+            function_path: full resource name of the function
+            operation: long-running create or update operation of the function
+
+        Raises:
+            PollingTimeout: the function is not deployed in 10 minutes
+        """
+        wait_for(
+            f"cloud function {function_path}",
+            operation.done,
+            timeout=600,
+            initial_delay=5,
+            max_delay=30,
+        )
+        # raises the error of a failed deployment
+        operation.result()
@@ -9,6 +9,7 @@ from wanna.core.loggers.wanna_logger import get_logger
 from wanna.core.models.base_instance import BaseInstanceModel
 from wanna.core.utils.env import gcp_access_allowed
 from wanna.core.utils.gcp import convert_project_id_to_project_number, get_network_info
+from wanna.core.utils.name_index import NameIndex
 
 logger = get_logger(__name__)
 
@@ -29,8 +30,18 @@ class BaseService(ABC, Generic[T]):
         self,
         instance_type: str,
     ):
-        self.instances: list[T] = []
         self.instance_type = instance_type
+        self.instances = []
+
+    @property
+    def instances(self) -> list[T]:
+        return self._instances
+
+    @instances.setter
+    def instances(self, instances: list[T]) -> None:
+        # fails on duplicate names already when the config is loaded
+        self.instances_by_name = NameIndex(instances, self.instance_type)
+        self._instances = instances
 
     def create(self, instance_name: str, **kwargs) -> None:
         """
@@ -108,7 +119,11 @@ class BaseService(ABC, Generic[T]):
                 )
                 exit(1)
         else:
-            instances = [nb for nb in self.instances if nb.name == instance_name]
+            instances = (
+                [self.instances_by_name.get(instance_name)]
+                if instance_name in self.instances_by_name
+                else []
+            )
         if not instances:
             logger.user_error(
                 f"{self.instance_type} with name {instance_name} not found in your wanna-ml yaml config.",
@@ -141,7 +156,7 @@ class BaseService(ABC, Generic[T]):
 
         if instance_name == "all":
             labels = f";labels=wanna_project:{wanna_project},wanna_resource:{wanna_resource}"
-        elif instance_name not in [nb.name for nb in self.instances]:
+        elif instance_name not in self.instances_by_name:
             logger.user_error(
                 f"{self.instance_type} with name {instance_name} not found in your wanna-ml yaml config.",
             )
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import re
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
+import requests
 from caseconverter import kebabcase
-from dirhash import dirhash
 from lazyimport import Import
 
 if TYPE_CHECKING:  # pragma: no cover
     import google.api_core.client_options as gapi_core_client_options
-    import google.api_core.future.polling as gapi_core_future_polling
     import google.cloud.devtools.cloudbuild_v1 as cloudbuild_v1
     import google.cloud.devtools.cloudbuild_v1.services.cloud_build as gcloud_devtools_cloudbuild_v1_services_cloud_build
     import google.cloud.devtools.cloudbuild_v1.types as gcloud_devtools_cloudbuild_v1_types
@@ -20,7 +26,6 @@ if TYPE_CHECKING:  # pragma: no cover
     import python_on_whales
 else:
     gapi_core_client_options = Import("google.api_core.client_options")
-    gapi_core_future_polling = Import("google.api_core.future.polling")
     gcloud_devtools_cloudbuild_v1_services_cloud_build = Import(
         "google.cloud.devtools.cloudbuild_v1.services.cloud_build"
     )
@@ -42,17 +47,29 @@ from wanna.core.models.docker import (
 )
 from wanna.core.models.gcp_profile import GCPProfileModel
 from wanna.core.utils import loaders
+from wanna.core.utils.cloud_build import CloudBuildException, CloudBuildJob, CloudBuildPoller
 from wanna.core.utils.credentials import get_credentials
 from wanna.core.utils.env import cloud_build_access_allowed, gcp_access_allowed, get_env_bool
 from wanna.core.utils.gcp import (
     convert_project_id_to_project_number,
+    storage_client,
     upload_file_to_gcs,
+    upload_stream_to_gcs,
 )
-from wanna.core.utils.io import tar_docker_context
+from wanna.core.utils.hashing import hash_context_dir, index_files
+from wanna.core.utils.io import list_docker_context, stream_docker_context, tar_docker_context
+from wanna.core.utils.name_index import NameIndex
+from wanna.core.utils.registry import RegistryClient, RegistryException
 from wanna.core.utils.templates import render_template
 
 logger = get_logger(__name__)
 
+# docker contexts uploaded for Cloud Build, named by the checksum of their content
+CONTEXT_ARCHIVE_PREFIX = "build/docker/ctx/"
+# images are labeled and tagged by the checksum of the context they were built from
+CONTEXT_DIGEST_LABEL = "wanna.context-digest"
+CONTEXT_CACHE_TAG_PREFIX = "ctx-"
+
 
 class DockerClientException(Exception):
     pass
@@ -73,6 +90,23 @@ class DockerService:
         self.image_store: dict[
             str, tuple[DockerImageModel, python_on_whales.Image | None, list[str]]
         ] = {}
+        # seconds until the image was ready, for Cloud Build until the build finished
+        self.image_timings: dict[str, float] = {}
+        # perf_counter when get_images started to prepare the image
+        self._image_started: dict[str, float] = {}
+        # images whose Cloud Build build is awaited by the poller of get_images
+        self._awaited_builds: set[str] = set()
+        # local (uncompressed) image size in bytes and seconds spent pushing it, by the first tag
+        self.push_stats: dict[str, tuple[int, float]] = {}
+        self._image_store_lock = threading.Lock()
+        self._image_locks: dict[str, threading.Lock] = {}
+        self._context_upload_locks: dict[str, threading.Lock] = {}
+        self.max_workers = int(os.getenv("WANNA_DOCKER_BUILD_MAX_WORKERS", "4"))
+        # Cloud Build clients per api_endpoint and the poller of builds submitted by get_images
+        self._cloud_build_clients: dict[
+            str, gcloud_devtools_cloudbuild_v1_services_cloud_build.CloudBuildClient
+        ] = {}
+        self._cloud_build_poller: CloudBuildPoller | None = None
 
         # Artifactory mirrors to different registry/projectid/repository combo
         registry_suffix = os.getenv("WANNA_DOCKER_REGISTRY_SUFFIX")
@@ -120,9 +154,21 @@ class DockerService:
             "You need running docker client on your machine to use WANNA cli with local docker build"
         )
         self.overwrite_images = get_env_bool(os.environ.get("WANNA_OVERWRITE_DOCKER_IMAGE"), True)
+        self.stream_context_upload = get_env_bool(
+            os.environ.get("WANNA_DOCKER_STREAM_CONTEXT_UPLOAD"), True
+        )
         self.always_overwrite_tags = os.environ.get(
             "WANNA_ALWAYS_OVERWRITE_DOCKER_TAGS", "latest"
         ).split(",")
+        # checks tags in the registry over HTTP, results are cached for the whole run
+        self.registry = RegistryClient()
+        self.remote_build_cache = gcp_access_allowed and get_env_bool(
+            os.environ.get("WANNA_DOCKER_REMOTE_BUILD_CACHE"), False
+        )
+        # image tag -> tag marking the build inputs of the image, pushed along with the image
+        self._context_cache_tags: dict[str, str] = {}
+        # image tag -> tag of the same build found in the registry, the tag is created on push
+        self._remote_builds: dict[str, str] = {}
 
     def _read_build_config(self, config_path: Path | str) -> DockerBuildConfigModel | None:
         """
@@ -201,11 +247,26 @@ class DockerService:
         """
 
         ignore_patterns = self._get_ignore_patterns(context_dir)
+        hash_cache_dir = self.build_dir / docker_image_ref
 
         # skip builds if we are in quick mode or the checksumdir of docker contex_dir has not changed
-        skip_build = self._should_skip_build(
-            self.build_dir / docker_image_ref, context_dir, ignore_patterns
+        # the context is listed and hashed only once, the same files are uploaded to Cloud Build
+        # the hash index may live in the context dir (notebook_ready_image), it is never uploaded
+        context_files = (
+            None
+            if self.quick_mode
+            else list_docker_context(
+                context_dir,
+                ignore_patterns,
+                exclude=index_files(self._get_index_path(hash_cache_dir)),
+            )
+        )
+        context_hash = (
+            None
+            if context_files is None
+            else self._get_dirhash(context_dir, ignore_patterns, hash_cache_dir, context_files)
         )
+        skip_build = self._should_skip_build(hash_cache_dir, context_hash)
 
         if skip_build:
             logger.user_info(
@@ -213,37 +274,147 @@ class DockerService:
             )
             return None
 
+        # an image built from the same inputs by any previous run is reused from the registry
+        cache_tag = (
+            self._context_cache_tag(tags[0], context_hash, file_path, build_args, docker_image_ref)
+            if context_hash and self.remote_build_cache
+            else None
+        )
+        if cache_tag and self._use_remote_build(cache_tag, tags, docker_image_ref):
+            return None if self.cloud_build else python_on_whales.docker.image.inspect(tags[0])
+
         if self.cloud_build:
             logger.user_info(text=f"Building {docker_image_ref} docker image in Cloud build")
             self._build_image_on_gcp_cloud_build(
                 context_dir=context_dir,
                 file_path=file_path,
                 docker_image_ref=docker_image_ref,
-                tags=tags,
+                tags=tags + ([cache_tag] if cache_tag else []),
                 ignore_patterns=ignore_patterns,
+                context_hash=context_hash,
+                context_files=context_files,
             )
             return None
         else:
             logger.user_info(
                 text=f"Building {docker_image_ref} docker image locally with {build_args}"
             )
+            if cache_tag:
+                build_args["labels"] = {
+                    **(build_args.get("labels") or {}),
+                    CONTEXT_DIGEST_LABEL: context_hash,
+                }
+                # pushed together with the tags of the image, see push_image
+                self._context_cache_tags[tags[0]] = cache_tag
             image = python_on_whales.docker.build(
-                context_dir, file=file_path, load=True, tags=tags, **build_args
-            )
-            self._write_context_dir_checksum(
-                self.build_dir / docker_image_ref, context_dir, ignore_patterns
+                context_dir,
+                file=file_path,
+                load=True,
+                tags=tags + ([cache_tag] if cache_tag else []),
+                **build_args,
             )
+            self._write_context_dir_checksum(hash_cache_dir, context_hash)
             return image  # type: ignore
 
+    def _context_cache_tag(
+        self,
+        tag: str,
+        context_hash: str,
+        file_path: Path,
+        build_args: dict[str, Any],
+        docker_image_ref: str,
+    ) -> str | None:
+        """
+        Tag of the image in the registry that marks everything the image was built from:
+        the context, the Dockerfile, the build config and the digests of the base images.
+
+        Args:
+            tag: one of the tags of the image
+            context_hash: checksum of the context_dir
+            file_path: Path to the Dockerfile
+            build_args: Additional build arguments
+            docker_image_ref: Name of the image
+
+        Returns:
+            the tag, None if the Dockerfile or its base images can not be resolved
+        """
+        try:
+            dockerfile = Path(file_path).read_text(encoding="utf-8")
+            base_images = dockerfile_base_images(dockerfile, build_args.get("build_args"))
+            if base_images is None:
+                raise RegistryException("base image depends on a build arg without value")
+            digests = {image: self.registry.digest(image) for image in base_images}
+        except (OSError, RegistryException, requests.RequestException) as e:
+            logger.user_info(text=f"Remote build cache of {docker_image_ref} not used: {e}")
+            return None
+
+        inputs = {
+            "context": context_hash,
+            "dockerfile": dockerfile,
+            "build_config": build_args,
+            "base_images": digests,
+        }
+        build_hash = hashlib.sha256(
+            json.dumps(inputs, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{tag.rsplit(':', 1)[0]}:{CONTEXT_CACHE_TAG_PREFIX}{build_hash}"
+
+    def _use_remote_build(self, cache_tag: str, tags: list[str], docker_image_ref: str) -> bool:
+        """
+        Look up the image built from the same inputs in the registry. When building locally,
+        it is pulled and tagged in the local daemon. The tags are created in the registry
+        only when the image is pushed, see push_image.
+
+        Args:
+            cache_tag: tag marking the build inputs of the image, see _context_cache_tag
+            tags: tags the image should get
+            docker_image_ref: Name of the image
+
+        Returns:
+            True if the already built image is used and the build can be skipped
+        """
+        try:
+            if not self.registry.tag_exists(cache_tag):
+                return False
+            if not self.cloud_build:
+                python_on_whales.docker.image.pull(cache_tag, quiet=True)
+                for tag in tags:
+                    python_on_whales.docker.image.tag(cache_tag, tag)
+        except (
+            RegistryException,
+            requests.RequestException,
+            python_on_whales.DockerException,
+        ) as e:
+            logger.user_info(text=f"Remote build cache of {docker_image_ref} not used: {e}")
+            return False
+
+        logger.user_info(
+            text=f"Skipping build of {docker_image_ref}, image with the same inputs found "
+            f"in registry as {cache_tag}"
+        )
+        self._remote_builds.update(dict.fromkeys(tags, cache_tag))
+        return True
+
     def _pull_image(self, image_url: str) -> python_on_whales.Image | None:
         if self.cloud_build or self.quick_mode:
             # TODO: verify that images exists remotely but dont pull them to local
             return None
         else:
-            with logger.user_spinner("Pulling image locally"):
-                image = python_on_whales.docker.pull(image_url, quiet=True)
+            # no spinner here, images can be pulled concurrently from get_images
+            logger.user_info(text=f"Pulling image {image_url} locally")
+            image = python_on_whales.docker.pull(image_url, quiet=True)
             return image  # type: ignore
 
+    @property
+    def image_models(self) -> list[DockerImageModel]:
+        return self._image_models
+
+    @image_models.setter
+    def image_models(self, image_models: list[DockerImageModel]) -> None:
+        # fails on duplicate names already when the config is loaded
+        self._image_models_by_name = NameIndex(image_models, "docker image")
+        self._image_models = image_models
+
     def find_image_model_by_name(self, image_name: str) -> DockerImageModel:
         """
         Finds a DockerImageModel with given image_name from self.image_models
@@ -253,43 +424,135 @@ class DockerService:
         Returns:
             DockerImageModel
         """
-        matched_image_models = list(
-            filter(lambda i: i.name.strip() == image_name.strip(), self.image_models)
-        )
-        if len(matched_image_models) == 0:
-            raise ValueError(f"No docker image with name {image_name} found")
-        elif len(matched_image_models) > 1:
-            raise ValueError(
-                f"Multiple docker images with name {image_name} found, please use unique names"
-            )
-        else:
-            return matched_image_models[0]
+        return self._image_models_by_name.get(image_name)
 
     def get_image(
         self,
         docker_image_ref: str,
+        docker_image_model: DockerImageModel | None = None,
     ) -> tuple[DockerImageModel, python_on_whales.Image | None, list[str]]:
         """
-        A wrapper around _get_image that checks if the docker image has been already build / pulled
+        A wrapper around _get_image that checks if the docker image has been already build / pulled.
+        It is safe to call from multiple threads, every image is built at most once.
 
         Args:
             docker_image_ref: Name of the image to get
+            docker_image_model: Already resolved model of the image, looked up by name if not set
 
         Returns:
             tuple of DockerImageModel, Image and image tag
 
         """
+        with self._image_store_lock:
+            image_lock = self._image_locks.setdefault(docker_image_ref, threading.Lock())
+
+        with image_lock:
+            image = self.image_store.get(docker_image_ref)
+            if not image:
+                image = self._get_image(
+                    docker_image_ref=docker_image_ref, docker_image_model=docker_image_model
+                )
+                self.image_store.update({docker_image_ref: image})
+
+        return image
 
-        image = self.image_store.get(docker_image_ref)
-        if not image:
-            image = self._get_image(docker_image_ref=docker_image_ref)
-            self.image_store.update({docker_image_ref: image})
+    def get_images(
+        self,
+        docker_image_refs: list[str],
+        max_workers: int | None = None,
+    ) -> list[tuple[DockerImageModel, python_on_whales.Image | None, list[str]]]:
+        """
+        Get multiple docker images at once, independent images are built / pulled concurrently
+        in a bounded pool of worker threads. Results are kept in image_store, so later calls
+        to get_image are served from there.
+
+        Args:
+            docker_image_refs: Names of the images to get
+            max_workers: Maximal number of images prepared in parallel,
+                defaults to WANNA_DOCKER_BUILD_MAX_WORKERS env var (4)
 
+        Returns:
+            list of tuples of DockerImageModel, Image and image tag in the order of docker_image_refs
+        """
+        refs = list(dict.fromkeys(docker_image_refs))
+        # resolve the models upfront, so an unknown image name fails before any build starts
+        pending = {
+            ref: self.find_image_model_by_name(ref) for ref in refs if ref not in self.image_store
+        }
+        workers = min(max_workers or self.max_workers, len(pending))
+        errors: list[BaseException] = []
+
+        # Cloud Build builds are only submitted by the workers and then awaited together
+        self._cloud_build_poller = CloudBuildPoller() if self.cloud_build else None
+        try:
+            if workers <= 1:
+                for ref, model in pending.items():
+                    self._get_image_timed(ref, model)
+            elif pending:
+                with ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="wanna-docker"
+                ) as executor:
+                    futures = {
+                        executor.submit(self._get_image_timed, ref, model): ref
+                        for ref, model in pending.items()
+                    }
+                    for future in as_completed(futures):
+                        error = future.exception()
+                        if error:
+                            logger.user_error(
+                                f"Failed to get docker image {futures[future]}: {error}"
+                            )
+                            errors.append(error)
+        finally:
+            poller, self._cloud_build_poller = self._cloud_build_poller, None
+            if poller:
+                failed = poller.wait()
+                self._awaited_builds.clear()
+                for job in failed:
+                    self.image_store.pop(job.name, None)
+                    errors.append(CloudBuildException(f"Build failed {job.link}"))
+
+        if errors:
+            raise errors[0]
+
+        return [self.image_store[ref] for ref in refs]
+
+    def _get_image_timed(
+        self, docker_image_ref: str, docker_image_model: DockerImageModel
+    ) -> tuple[DockerImageModel, python_on_whales.Image | None, list[str]]:
+        start = self._image_started[docker_image_ref] = time.perf_counter()
+        image = self.get_image(docker_image_ref, docker_image_model=docker_image_model)
+        if docker_image_ref in self._awaited_builds:
+            # the timing is recorded when the build finishes, see _finish_cloud_build
+            logger.user_info(
+                text=f"Docker image {docker_image_ref} submitted to Cloud Build in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+        else:
+            self._record_image_timing(docker_image_ref)
         return image
 
+    def _record_image_timing(self, docker_image_ref: str) -> None:
+        self.image_timings[docker_image_ref] = (
+            time.perf_counter() - self._image_started[docker_image_ref]
+        )
+        logger.user_info(
+            text=f"Docker image {docker_image_ref} ready in "
+            f"{self.image_timings[docker_image_ref]:.1f}s"
+        )
+
+    def _finish_cloud_build(self, docker_image_ref: str, context_hash: str | None) -> None:
+        """
+        Called once the Cloud Build build of the image succeeds.
+        """
+        self._write_context_dir_checksum(self.build_dir / docker_image_ref, context_hash)
+        if docker_image_ref in self._image_started:
+            self._record_image_timing(docker_image_ref)
+
     def _get_image(
         self,
         docker_image_ref: str,
+        docker_image_model: DockerImageModel | None = None,
     ) -> tuple[DockerImageModel, python_on_whales.Image | None, list[str]]:
         """
         Given the docker_image_ref, this function prepares the image for you.
@@ -298,11 +561,13 @@ class DockerService:
 
         Args:
             docker_image_ref: Name of the image to get
+            docker_image_model: Already resolved model of the image, looked up by name if not set
 
         Returns:
 
         """
-        docker_image_model = self.find_image_model_by_name(docker_image_ref)
+        if docker_image_model is None:
+            docker_image_model = self.find_image_model_by_name(docker_image_ref)
 
         build_dir = self.work_dir / Path("build") / "docker" / docker_image_model.name
         os.makedirs(build_dir, exist_ok=True)
@@ -354,18 +619,34 @@ class DockerService:
         )
 
     @staticmethod
-    def _get_dirhash(directory: Path, ignore_patterns: list[str] | None = None) -> str:
+    def _get_dirhash(
+        directory: Path,
+        ignore_patterns: list[str] | None = None,
+        hash_cache_dir: Path | None = None,
+        context_files: list[str] | None = None,
+    ) -> str:
         """
         Get the checksum of the directory.
 
         Args:
             directory: Path to the directory to be checksummed
             ignore_patterns: list of patterns to ignore
+            hash_cache_dir: Path to the directory where the per-file hash index is stored,
+                only files that changed since the last run are rehashed
+            context_files: files of the directory not excluded by ignore_patterns
 
         Returns:
             Checksum of the directory
         """
-        return dirhash(directory, "sha256", ignore=set(ignore_patterns or []))
+        index_path = DockerService._get_index_path(hash_cache_dir) if hash_cache_dir else None
+        return hash_context_dir(directory, ignore_patterns, index_path, context_files)
+
+    @staticmethod
+    def _get_index_path(hash_cache_dir: Path) -> Path:
+        """
+        Path to the per-file hash index of the context, see FileHashIndex.
+        """
+        return hash_cache_dir / "context-index.json"
 
     def _get_cache_path(self, hash_cache_dir: Path) -> Path:
         """
@@ -380,53 +661,45 @@ class DockerService:
         os.makedirs(hash_cache_dir, exist_ok=True)
         return hash_cache_dir / f"{kebabcase(self.docker_repository)}-{version}-cache.sha256"
 
-    def _should_skip_build(
-        self, hash_cache_dir: Path, context_dir: Path, ignore_patterns: list[str]
-    ) -> bool:
+    def _should_skip_build(self, hash_cache_dir: Path, context_hash: str | None) -> bool:
         """
         Check if the context_dir has changed since the last build or if quick mode is enabled
         to decide if wanna should build the image again.
 
         Args:
             hash_cache_dir: Path to the directory where the cache file is stored
-            context_dir: Path to the directory to check
-            ignore_patterns: list of patterns to ignore
+            context_hash: Current checksum of the context_dir, None in quick mode
 
         Returns:
-            True if the context_dir has changed, False otherwise
+            True if the build should be skipped, False otherwise
         """
-        cache_file = self._get_cache_path(hash_cache_dir)
-        sha256hash = self._get_dirhash(context_dir, ignore_patterns)
-        context_dir_hash_match = False
+        if self.quick_mode:
+            return True
 
+        cache_file = self._get_cache_path(hash_cache_dir)
         if cache_file.exists():
             with open(cache_file, encoding="utf-8") as f:
                 old_hash = f.read().replace("\n", "")
-                context_dir_hash_match = old_hash == sha256hash
+                return old_hash == context_hash
 
-        return self.quick_mode or context_dir_hash_match
+        return False
 
-    def _write_context_dir_checksum(
-        self,
-        hash_cache_dir: Path,
-        context_dir: Path,
-        ignore_patterns: list[str] | None = None,
-    ) -> None:
+    def _write_context_dir_checksum(self, hash_cache_dir: Path, context_hash: str | None) -> None:
         """
         Write the checksum of the context_dir to a file.
 
         Args:
             hash_cache_dir: Path to the directory where the cache file is stored
-            context_dir: Path to the directory to check
-            ignore_patterns: list of patterns to ignore
+            context_hash: Checksum of the context_dir the image was built from
         Returns:
             None
         """
+        if context_hash is None:
+            return
 
         cache_file = self._get_cache_path(hash_cache_dir)
-        sha256hash = self._get_dirhash(context_dir, ignore_patterns)
         with open(cache_file, "w", encoding="utf-8") as f:
-            f.write(sha256hash)
+            f.write(context_hash)
 
     def _build_image_on_gcp_cloud_build(
         self,
@@ -435,6 +708,8 @@ class DockerService:
         tags: list[str],
         docker_image_ref: str,
         ignore_patterns: list[str] | None = None,
+        context_hash: str | None = None,
+        context_files: list[str] | None = None,
     ) -> None:
         """
         Build a docker container in GCP Cloud Build and push the images to registry.
@@ -446,28 +721,34 @@ class DockerService:
             tags: list of tags for the image
             docker_image_ref: Name of the image
             ignore_patterns: list of patterns to ignore
+            context_hash: checksum of the context_dir written after a successful build
+            context_files: files of the context_dir not excluded by ignore_patterns
 
         Returns:
             None
 
         """
 
-        # Set the pooling timeout to self.cloud_build_timeout seconds
-        # since often large GPUs builds exceed the 900s limit
+        # Builds often exceed the default 900s timeout (eg. large GPU images)
         timeout = gprotobuf_duration_pb2.Duration(seconds=self.cloud_build_timeout)
-        gapi_core_future_polling.DEFAULT_POLLING._timeout = self.cloud_build_timeout
         project_number = convert_project_id_to_project_number(self.project_id)
 
         dockerfile = os.path.relpath(file_path, context_dir)
-        blob = self._upload_context_dir_to_gcs(context_dir, docker_image_ref, ignore_patterns)
+        blob = self._upload_context_dir_to_gcs(
+            context_dir, docker_image_ref, ignore_patterns, context_hash, context_files
+        )
 
         tags_args = " ".join([f"--destination={t}" for t in tags]).split()
+        label_args = [f"--label={CONTEXT_DIGEST_LABEL}={context_hash}"] if context_hash else []
         kaniko_build_args = (
-            tags_args + self.docker_model.cloud_build_kaniko_flags + ["--dockerfile", dockerfile]
+            tags_args
+            + label_args
+            + self.docker_model.cloud_build_kaniko_flags
+            + ["--dockerfile", dockerfile]
         )
 
-        options, api_endpoint = (
-            (None, "cloudbuild.googleapis.com")
+        options, api_endpoint, location = (
+            (None, "cloudbuild.googleapis.com", "global")
             if not self.cloud_build_workerpool
             else (
                 gcloud_devtools_cloudbuild_v1_types.BuildOptions(
@@ -476,6 +757,7 @@ class DockerService:
                     )
                 ),
                 f"{self.cloud_build_workerpool_location}-cloudbuild.googleapis.com",
+                self.cloud_build_workerpool_location,
             )
         )
 
@@ -494,10 +776,7 @@ class DockerService:
             timeout=timeout,
             options=options,
         )
-        client = gcloud_devtools_cloudbuild_v1_services_cloud_build.CloudBuildClient(
-            credentials=get_credentials(),
-            client_options=gapi_core_client_options.ClientOptions(api_endpoint=api_endpoint),
-        )
+        client = self._get_cloud_build_client(api_endpoint)
         request = cloudbuild_v1.CreateBuildRequest(project_id=self.project_id, build=build)
 
         op = client.create_build(request=request)
@@ -511,16 +790,51 @@ class DockerService:
 
         logger.user_info(text=f"Build started {link}")
 
-        try:
-            op.result()
-            self._write_context_dir_checksum(
-                self.build_dir / docker_image_ref, context_dir, ignore_patterns
-            )
-        except:
-            raise Exception(f"Build failed {link}")
+        job = CloudBuildJob(
+            name=docker_image_ref,
+            client=client,
+            project_id=self.project_id,
+            build_id=build_id,
+            build_name=f"projects/{self.project_id}/locations/{location}/builds/{build_id}",
+            link=link,
+            timeout=self.cloud_build_timeout,
+            on_success=lambda: self._finish_cloud_build(docker_image_ref, context_hash),
+        )
+        if self._cloud_build_poller:
+            # get_images waits for all submitted builds at once
+            self._awaited_builds.add(docker_image_ref)
+            self._cloud_build_poller.add(job)
+        else:
+            poller = CloudBuildPoller()
+            poller.add(job)
+            if poller.wait():
+                raise CloudBuildException(f"Build failed {link}")
+
+    def _get_cloud_build_client(
+        self, api_endpoint: str
+    ) -> gcloud_devtools_cloudbuild_v1_services_cloud_build.CloudBuildClient:
+        """
+        Get a Cloud Build client for the api_endpoint, clients are reused for the whole run.
 
-    @staticmethod
-    def remote_image_tag_exists(tag: str) -> bool:
+        Args:
+            api_endpoint: global or regional (workerpool) Cloud Build endpoint
+
+        Returns:
+            CloudBuildClient
+        """
+        with self._image_store_lock:
+            if api_endpoint not in self._cloud_build_clients:
+                self._cloud_build_clients[api_endpoint] = (
+                    gcloud_devtools_cloudbuild_v1_services_cloud_build.CloudBuildClient(
+                        credentials=get_credentials(),
+                        client_options=gapi_core_client_options.ClientOptions(
+                            api_endpoint=api_endpoint
+                        ),
+                    )
+                )
+            return self._cloud_build_clients[api_endpoint]
+
+    def remote_image_tag_exists(self, tag: str) -> bool:
         """
         Checks if the image tag exists in the registry.
 
@@ -530,20 +844,15 @@ class DockerService:
         Returns: true if the image tag exists, false otherwise
 
         """
-        try:
-            python_on_whales.docker.manifest.inspect(tag)
-            return True
-        except python_on_whales.DockerException as e:
-            if hasattr(e, "stderr") and e.stderr is not None and "no such manifest" in e.stderr:
-                return False
-            raise e
+        return self.registry.tag_exists(tag)
 
     def push_image(
         self, image_or_tags: python_on_whales.Image | list[str], quiet: bool = False
     ) -> None:
         """
         Push a docker image to the registry (image must have tags)
-        If you are in the cloud_build mode, nothing is pushed, images already live in cloud.
+        Images reused from the registry by the remote build cache are only tagged there.
+        If you are in the cloud_build mode, nothing else is pushed, images already live in cloud.
 
         Args:
             image_or_tags: what docker resource to push
@@ -552,28 +861,130 @@ class DockerService:
         Returns:
             None
         """
-        if not self.cloud_build:
-            tags = (
-                image_or_tags.repo_tags
-                if isinstance(image_or_tags, python_on_whales.Image)
-                else image_or_tags
+        tags = (
+            image_or_tags.repo_tags
+            if isinstance(image_or_tags, python_on_whales.Image)
+            else image_or_tags
+        )
+        if self.cloud_build:
+            tags = [tag for tag in tags if tag in self._remote_builds]
+        else:
+            # the pulled cache tag is already in the registry
+            cache_tags = set(self._remote_builds.values())
+            tags = [tag for tag in tags if tag not in cache_tags]
+            # local images can already carry their cache tag
+            tags = list(
+                dict.fromkeys(
+                    tags
+                    + [self._context_cache_tags[t] for t in tags if t in self._context_cache_tags]
+                )
             )
-            for tag in tags:
+
+        # Check if tags are already pushed, all tags at once
+        tags_to_check = (
+            []
+            if self.overwrite_images
+            else [
+                tag
+                for tag in tags
                 # the tag suffix (part after the last ':')
-                tag_suffix = tag.split(":")[-1] if ":" in tag else ""
-
-                # Check if tags are already pushed
-                if (
-                    (not self.overwrite_images)
-                    and tag_suffix not in self.always_overwrite_tags
-                    and self.remote_image_tag_exists(tag)
-                ):
-                    logger.user_info(
-                        text=f"Skipping push for {tag} as it already exists in registry"
-                    )
-                    continue
+                if (tag.split(":")[-1] if ":" in tag else "") not in self.always_overwrite_tags
+            ]
+        )
+        existing_tags = self.registry.tags_exist(tags_to_check) if tags_to_check else {}
+
+        retags: dict[str, list[str]] = {}
+        for tag in tags:
+            if existing_tags.get(tag):
+                logger.user_info(text=f"Skipping push for {tag} as it already exists in registry")
+            elif tag in self._remote_builds:
+                retags.setdefault(self._remote_builds[tag], []).append(tag)
+            else:
                 logger.user_info(text=f"Pushing docker image {tag}")
                 python_on_whales.docker.image.push(tag, quiet)
+                self.registry.remember(tag)
+
+        for cache_tag, targets in retags.items():
+            logger.user_info(text=f"Tagging {cache_tag} as {targets} in registry")
+            self.registry.retag(cache_tag, targets)
+
+    def push_images(self, images_tags: list[list[str]], max_workers: int | None = None) -> None:
+        """
+        Push multiple docker images to the registry, distinct images are pushed concurrently.
+
+        Artifacts that are the same local image (same image id) are merged and their tags
+        are pushed in order by one worker, so the tags after the first one send just
+        the manifest. Layers shared by different images are deduplicated by the docker daemon.
+        Local image size and duration of every push is logged and kept in push_stats.
+        If you are in the cloud_build mode, only images reused from the registry
+        by the remote build cache are tagged, other images already live in cloud.
+
+        Args:
+            images_tags: tags of every image to push
+            max_workers: Maximal number of images pushed in parallel,
+                defaults to WANNA_DOCKER_BUILD_MAX_WORKERS env var (4)
+
+        Returns:
+            None
+        """
+        if self.cloud_build:
+            for tags in images_tags:
+                self.push_image(tags)
+            return
+
+        images: dict[str, list[str]] = {}
+        sizes: dict[str, int] = {}
+        for tags in images_tags:
+            if not tags:
+                continue
+            image_id, size = self._inspect_local_image(tags[0])
+            key = image_id or tags[0]
+            merged = images.setdefault(key, [])
+            merged.extend(tag for tag in tags if tag not in merged)
+            sizes[key] = size
+
+        workers = min(max_workers or self.max_workers, len(images))
+        errors: list[BaseException] = []
+
+        if workers <= 1:
+            for key, tags in images.items():
+                self._push_image_timed(tags, sizes[key])
+        elif images:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="wanna-docker-push"
+            ) as executor:
+                futures = {
+                    executor.submit(self._push_image_timed, tags, sizes[key]): tags
+                    for key, tags in images.items()
+                }
+                for future in as_completed(futures):
+                    error = future.exception()
+                    if error:
+                        logger.user_error(
+                            f"Failed to push docker image {futures[future]}: {error}"
+                        )
+                        errors.append(error)
+
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _inspect_local_image(tag: str) -> tuple[str | None, int]:
+        try:
+            image = python_on_whales.docker.image.inspect(tag)
+        except python_on_whales.DockerException:
+            return None, 0
+        return image.id, image.size or 0
+
+    def _push_image_timed(self, tags: list[str], size: int) -> None:
+        start = time.perf_counter()
+        self.push_image(tags)
+        self.push_stats[tags[0]] = (size, time.perf_counter() - start)
+        # the daemon does not report the pushed bytes, layers already in the registry are skipped
+        logger.user_info(
+            text=f"Pushed {tags[0]} (local image size {size / 1024 / 1024:.1f} MiB) "
+            f"in {self.push_stats[tags[0]][1]:.1f}s"
+        )
 
     @staticmethod
     def remove_image(image: python_on_whales.Image, force=False, prune=True) -> None:
@@ -637,6 +1048,8 @@ class DockerService:
             model, image, tags = self.get_image(docker_image_ref=docker_image_ref)
             if image:
                 self.push_image(image)
+            elif self.cloud_build:
+                self.push_image(tags)
             # TODO: give option to use latest
             image_url = tags[0]
         return image_url
@@ -678,23 +1091,154 @@ class DockerService:
         context_dir: Path,
         docker_image_ref: str,
         ignore_patterns: list[str] | None = None,
+        context_hash: str | None = None,
+        context_files: list[str] | None = None,
     ) -> gcloud_storage.Blob:
         """
         Tar the context_dir and upload it to GCS.
 
+        With context_hash the archive is stored as build/docker/ctx/<context_hash>.tar.gz
+        and an already uploaded archive with the same content is reused without uploading.
+
         Args:
             context_dir: Path to the directory to be tarred and uploaded
             docker_image_ref: Name of the image
             ignore_patterns: list of patterns to ignore whilst tarring
+            context_hash: checksum of the context_dir
+            context_files: files of the context_dir not excluded by ignore_patterns
 
         Returns:
             Blob
         """
-        tar_filename = self.work_dir / "build" / "docker" / f"{docker_image_ref}.tar.gz"
-        tar_docker_context(context_dir, tar_filename, ignore_patterns or [])
+        if not context_hash:
+            tar_filename = self.work_dir / "build" / "docker" / f"{docker_image_ref}.tar.gz"
+            return self._upload_context_archive(
+                context_dir, tar_filename, ignore_patterns, context_files
+            )
+
+        # images sharing the context dir are uploaded only once
+        with self._image_store_lock:
+            upload_lock = self._context_upload_locks.setdefault(context_hash, threading.Lock())
+
+        with upload_lock:
+            tar_filename = self.work_dir / CONTEXT_ARCHIVE_PREFIX / f"{context_hash}.tar.gz"
+            blob_name = os.path.relpath(tar_filename, self.work_dir).replace("\\", "/")
+            blob = storage_client().bucket(self.bucket).get_blob(blob_name)
+            if blob is not None:
+                logger.user_info(
+                    text=f"Context of {docker_image_ref} is unchanged, "
+                    f"reusing gs://{self.bucket}/{blob_name}"
+                )
+            else:
+                blob = self._upload_context_archive(
+                    context_dir, tar_filename, ignore_patterns, context_files
+                )
+
+            # custom_time marks when the archive was used last, for `wanna docker gc`
+            # and bucket lifecycle rules with daysSinceCustomTime
+            now = datetime.now(timezone.utc)
+            if not blob.custom_time or blob.custom_time < now - timedelta(days=1):
+                blob.custom_time = now
+                blob.patch()
+            return blob
 
+    def _upload_context_archive(
+        self,
+        context_dir: Path,
+        tar_filename: Path,
+        ignore_patterns: list[str] | None = None,
+        context_files: list[str] | None = None,
+    ) -> gcloud_storage.Blob:
         blob_name = os.path.relpath(tar_filename, self.work_dir).replace("\\", "/")
+
+        if self.stream_context_upload:
+            # tar+gzip straight into a resumable upload, nothing is written to local disk
+            return upload_stream_to_gcs(
+                lambda f: stream_docker_context(
+                    context_dir, f, ignore_patterns or [], files=context_files
+                ),
+                bucket_name=self.bucket,
+                blob_name=blob_name,
+            )
+
+        tar_docker_context(context_dir, tar_filename, ignore_patterns or [], files=context_files)
         blob = upload_file_to_gcs(
             filename=tar_filename, bucket_name=self.bucket, blob_name=blob_name
         )
         return blob
+
+
+def delete_stale_context_archives(
+    bucket_name: str, max_age_days: int, dry_run: bool = False
+) -> list[str]:
+    """
+    Delete docker context archives uploaded for GCP Cloud Build
+    that were not used by any build in the last max_age_days.
+
+    Args:
+        bucket_name: GCS bucket with the archives
+        max_age_days: archives not used for longer than this are deleted
+        dry_run: only list the archives that would be deleted
+
+    Returns:
+        names of the deleted blobs
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    deleted = []
+    for blob in storage_client().list_blobs(bucket_name, prefix=CONTEXT_ARCHIVE_PREFIX):
+        last_used = blob.custom_time or blob.time_created
+        if last_used and last_used < cutoff:
+            if not dry_run:
+                blob.delete()
+            deleted.append(blob.name)
+            logger.user_info(
+                f"{'Would delete' if dry_run else 'Deleted'} gs://{bucket_name}/{blob.name}, "
+                f"last used {last_used:%Y-%m-%d}"
+            )
+    return deleted
+
+
+def dockerfile_base_images(
+    dockerfile: str, build_args: dict[str, str] | None = None
+) -> list[str] | None:
+    """
+    List the images the stages of a Dockerfile start from.
+
+    Args:
+        dockerfile: content of the Dockerfile
+        build_args: values of the ARGs declared before the first FROM
+
+    Returns:
+        references of the base images, None if one of them depends on an ARG without value
+    """
+    build_args = build_args or {}
+    args: dict[str, str] = {}
+    stages: set[str] = set()
+    images: list[str] = []
+    seen_from = False
+    for line in re.sub(r"\\[ \t]*\n", " ", dockerfile).splitlines():
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        instruction = words[0].upper()
+        if instruction == "ARG" and not seen_from:
+            for word in words[1:]:
+                name, has_default, default = word.partition("=")
+                if name in build_args:
+                    args[name] = build_args[name]
+                elif has_default:
+                    args[name] = default.strip("\"'")
+        elif instruction == "FROM":
+            seen_from = True
+            words = [w for w in words[1:] if not w.startswith("--")]
+            if not words:
+                continue
+            variables = re.findall(r"\$\{?(\w+)", words[0])
+            if any(v not in args for v in variables):
+                return None
+            image = re.sub(r"\$\{?(\w+)\}?", lambda m: args[m.group(1)], words[0])
+            if image.lower() != "scratch" and image not in stages:
+                images.append(image)
+            if len(words) >= 3 and words[1].upper() == "AS":
+                stages.add(words[2])
+    return images
@@ -40,9 +40,8 @@ from wanna.core.models.training_custom_job import (
 )
 from wanna.core.models.wanna_config import WannaConfigModel
 from wanna.core.services.base import BaseService, T
-from wanna.core.services.docker import DockerService
 from wanna.core.services.path_utils import JobPaths
-from wanna.core.services.tensorboard import TensorboardService
+from wanna.core.services.session import BuildSession
 from wanna.core.utils.env import gcp_access_allowed
 from wanna.core.utils.json import remove_nones
 from wanna.core.utils.loaders import load_yaml_path
@@ -60,6 +59,7 @@ class JobService(BaseService[JobModelTypeAlias]):
         connector: VertexConnector[JobResource[JobModelTypeAlias]] = VertexConnector[
             JobResource[JobModelTypeAlias]
         ](),
+        session: BuildSession | None = None,
     ):
         """
         Service to build, push, deploy and run Vertex AI custom jobs
@@ -67,6 +67,8 @@ class JobService(BaseService[JobModelTypeAlias]):
             config (WannaConfigModel): Loaded wanna.yaml
             workdir (Path): Where wanna will conduct it's work
             version (str): Which version of the jobs are working with
+            session (BuildSession): images and tensorboards shared with other services
+                of the same config, workdir and version, a new session if not set
         """
         super().__init__(
             instance_type="job",
@@ -77,17 +79,12 @@ class JobService(BaseService[JobModelTypeAlias]):
         self.wanna_project = config.wanna_project
         self.bucket_name = config.gcp_profile.bucket
         self.config = config
-        self.tensorboard_service = TensorboardService(config=config)
         self.push_mode = push_mode
         self.workdir = workdir
-        self.docker_service = DockerService(
-            docker_model=config.docker,  # type: ignore
-            gcp_profile=config.gcp_profile,
-            version=version,
-            work_dir=workdir,
-            wanna_project_name=self.wanna_project.name,
-            quick_mode=self.push_mode.is_quick_mode(),
-        )
+        # images and tensorboards are shared with other services using the same session
+        self.session = session or BuildSession(config, workdir, version)
+        self.tensorboard_service = self.session.tensorboard_service
+        self.docker_service = self.session.docker_service(self.push_mode.is_quick_mode())
         self.build_dir = workdir / "build"
         self.version = version
 
@@ -103,11 +100,37 @@ class JobService(BaseService[JobModelTypeAlias]):
             Job Manifests and associated local paths where those were built
         """
         instances = self._filter_instances_by_name(instance_name)
+        # build all referenced images upfront, independent images are built concurrently
+        self.docker_service.get_images(
+            [ref for instance in instances for ref in self._get_docker_image_refs(instance)]
+        )
         return [self._build(instance) for instance in instances]
 
+    @staticmethod
+    def _get_docker_image_refs(instance: JobModelTypeAlias) -> list[str]:
+        """
+        Collects names of all docker images used by the job workers.
+
+        Args:
+            instance: job model from wanna.yaml
+
+        Returns:
+            docker image refs
+        """
+        workers = (
+            [instance.worker] if isinstance(instance, TrainingCustomJobModel) else instance.workers
+        )
+        refs = []
+        for worker in workers:
+            if worker.container:
+                refs.append(worker.container.docker_image_ref)
+            elif worker.python_package:
+                refs.append(worker.python_package.docker_image_ref)
+        return refs
+
     def push(self, manifests: list[Path], local: bool = False) -> PushResult:
         return self.connector.push_artifacts(
-            self.docker_service.push_image,
+            self.docker_service.push_images,
             self._prepare_push(manifests, self.version, local),
         )
 
@@ -125,10 +148,24 @@ class JobService(BaseService[JobModelTypeAlias]):
             paths to gs:// paths where the manifests were pushed
         """
 
+        loaded_manifests = [
+            (
+                str(manifest.resolve()),
+                JobService.read_manifest(self.connector, str(manifest.resolve())),
+            )
+            for manifest in manifests
+        ]
+        if self.push_mode.can_push_containers():
+            self.docker_service.get_images(
+                [
+                    ref
+                    for _, loaded_manifest in loaded_manifests
+                    for ref in loaded_manifest.image_refs
+                ]
+            )
+
         push_tasks = []
-        for manifest in manifests:
-            manifest_path = str(manifest.resolve())
-            loaded_manifest = JobService.read_manifest(self.connector, manifest_path)
+        for manifest_path, loaded_manifest in loaded_manifests:
             job_paths = JobPaths(
                 self.workdir,
                 f"gs://{self.bucket_name}",
@@ -304,9 +341,7 @@ class JobService(BaseService[JobModelTypeAlias]):
             },
             image_refs=list(image_refs),
             # during `run` calls, this means changing TensorboardService init
-            tensorboard=self.tensorboard_service.get_or_create_tensorboard_instance_by_name(
-                job_model.tensorboard_ref
-            )
+            tensorboard=self.session.get_tensorboard(job_model.tensorboard_ref)
             if job_model.tensorboard_ref
             else None,
             network=network,
@@ -386,9 +421,7 @@ class JobService(BaseService[JobModelTypeAlias]):
             job_config=job_model,
             job_payload=job_payload,
             image_refs=[image_ref],
-            tensorboard=self.tensorboard_service.get_or_create_tensorboard_instance_by_name(
-                job_model.tensorboard_ref
-            )
+            tensorboard=self.session.get_tensorboard(job_model.tensorboard_ref)
             if job_model.tensorboard_ref
             else None,
             network=network,
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 import importlib
 import json
+import multiprocessing
 import os
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
 
@@ -19,6 +25,7 @@ else:
     python_on_whales = Import("python_on_whales")
 
 from wanna.core.deployment.artifacts_push import PushResult
+from wanna.core.deployment.deploy_plan import DeployPlan
 from wanna.core.deployment.models import (
     ContainerArtifact,
     JsonArtifact,
@@ -34,15 +41,154 @@ from wanna.core.models.docker import DockerBuildResult, DockerImageModel, ImageB
 from wanna.core.models.pipeline import PipelineModel
 from wanna.core.models.wanna_config import WannaConfigModel
 from wanna.core.services.base import BaseService
-from wanna.core.services.docker import DockerService
 from wanna.core.services.path_utils import PipelinePaths
-from wanna.core.services.tensorboard import TensorboardService
+from wanna.core.services.session import BuildSession
+from wanna.core.utils.compile_cache import PipelineCompileCache, local_source_roots
 from wanna.core.utils.env import gcp_access_allowed
 from wanna.core.utils.loaders import load_yaml_path
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class PipelineCompileTask:
+    """Everything needed to compile one pipeline, independent of the PipelineService."""
+
+    pipeline_function: str
+    pipeline_params: dict[str, Any]
+    package_path: str
+    env: dict[str, str]
+    manifest: PipelineResource
+    manifest_path: str
+    cache: PipelineCompileCache | None = None
+    fingerprint: str | None = None
+
+
+@contextmanager
+def isolated_compile_env(module_name: str, env: dict[str, str]) -> Iterator[None]:
+    """
+    Sandbox for compiling one pipeline in the current process.
+
+    The env params are exported to os.environ only inside the sandbox, the original
+    os.environ is restored afterward. Local modules of the pipeline (see local_source_roots)
+    are removed from sys.modules when entering and leaving the sandbox, so the pipeline
+    module and its local imports are always imported fresh with the env params
+    of the pipeline being compiled and no module level values leak between pipelines.
+
+    Args:
+        module_name: python import path of the pipeline module
+        env: env params of the pipeline
+    """
+    # wanna itself does not depend on the env params and must keep its module state
+    local_packages = set(local_source_roots(module_name)) - {"wanna"}
+
+    def unload_local_modules() -> None:
+        for name in list(sys.modules):
+            if name.split(".")[0] in local_packages:
+                del sys.modules[name]
+
+    saved_environ = os.environ.copy()
+    unload_local_modules()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        unload_local_modules()
+
+
+def compile_pipeline_spec(
+    pipeline_function: str, pipeline_params: dict[str, Any], package_path: str, env: dict[str, str]
+) -> str:
+    """
+    Import the pipeline function and compile it into a Kubeflow V2 pipeline spec
+    inside isolated_compile_env. Runs either in the current process
+    or in a worker process of the compile pool.
+
+    Args:
+        pipeline_function: python import path of the pipeline function, ex: module1.module2.function
+        pipeline_params: Kubeflow pipeline params
+        package_path: where to write the pipeline spec
+        env: env params of the pipeline available in os.environ during the compilation
+
+    Returns:
+        package_path
+    """
+    mod_name, func_name = pipeline_function.rsplit(".", 1)
+    with isolated_compile_env(mod_name, env):
+        module = importlib.import_module(mod_name)
+        logger.user_info(
+            f"Using kfp.v2.compiler.Compiler.compile with function {pipeline_function}"
+        )
+        func = getattr(module, func_name)
+        kfp_v2_compiler.Compiler().compile(
+            pipeline_func=func,
+            pipeline_parameters=pipeline_params,
+            package_path=package_path,
+            type_check=True,
+        )
+    return package_path
+
+
+def compile_pipelines(tasks: list[PipelineCompileTask], workers: int = 1) -> None:
+    """
+    Compile the pipelines one by one or with more workers in a pool of processes.
+    Specs of pipelines whose fingerprint matches an earlier compilation are taken from the cache.
+
+    Every worker is a fresh interpreter (spawned, not forked) that imports the pipeline
+    modules on its own and gets the env params of each pipeline with the task.
+
+    Args:
+        tasks: pipelines to compile
+        workers: how many pipelines are compiled in parallel
+    """
+    pending = []
+    for task in tasks:
+        if (
+            task.cache
+            and task.fingerprint
+            and task.cache.restore(task.fingerprint, task.package_path)
+        ):
+            logger.user_info(
+                text=f"Pipeline {task.manifest.pipeline_name} did not change, "
+                f"reusing the compiled spec from {task.cache.cache_dir}"
+            )
+        else:
+            pending.append(task)
+
+    _compile_pipeline_specs(pending, workers)
+
+    for task in pending:
+        if task.cache and task.fingerprint:
+            task.cache.store(task.fingerprint, task.package_path)
+
+
+def _compile_pipeline_specs(tasks: list[PipelineCompileTask], workers: int) -> None:
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            compile_pipeline_spec(
+                task.pipeline_function, task.pipeline_params, task.package_path, task.env
+            )
+        return
+
+    logger.user_info(text=f"Compiling {len(tasks)} pipelines in {workers} processes")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        # results are gathered in order, the first failed pipeline raises
+        list(
+            executor.map(
+                compile_pipeline_spec,
+                [task.pipeline_function for task in tasks],
+                [task.pipeline_params for task in tasks],
+                [task.package_path for task in tasks],
+                [task.env for task in tasks],
+            )
+        )
+
+
 class PipelineService(BaseService[PipelineModel]):
     def __init__(
         self,
@@ -52,6 +198,8 @@ class PipelineService(BaseService[PipelineModel]):
         push_mode: PushMode = PushMode.all,
         connector: VertexConnector[PipelineResource] = VertexConnector[PipelineResource](),
         skip_execution_cache: bool | None = None,
+        compile_cache: bool = True,
+        session: BuildSession | None = None,
     ):
         super().__init__(
             instance_type="pipeline",
@@ -60,18 +208,15 @@ class PipelineService(BaseService[PipelineModel]):
         self.instances = config.pipelines
         self.config = config
         self.workdir = workdir
-        self.tensorboard_service = TensorboardService(config=config)
         self.version = version
         self.push_mode = push_mode
-        self.docker_service = DockerService(
-            docker_model=config.docker,  # type: ignore
-            gcp_profile=config.gcp_profile,
-            version=version,
-            work_dir=workdir,
-            wanna_project_name=self.config.wanna_project.name,
-            quick_mode=push_mode.is_quick_mode(),
-        )
+        # images and tensorboards are shared with other services using the same session
+        self.session = session or BuildSession(config, workdir, version)
+        self.tensorboard_service = self.session.tensorboard_service
+        self.docker_service = self.session.docker_service(push_mode.is_quick_mode())
         self.skip_execution_cache = skip_execution_cache
+        self.compile_workers = int(os.getenv("WANNA_PIPELINE_COMPILE_WORKERS", "1"))
+        self.compile_cache = compile_cache
         self.notification_channels = {
             channel.name: channel for channel in self.config.notification_channels
         }
@@ -86,13 +231,17 @@ class PipelineService(BaseService[PipelineModel]):
                 if present will override one from wanna.yaml
         """
         instances = self._filter_instances_by_name(instance_name)
-        return [
-            self._compile_one_instance(instance, pipeline_params_path) for instance in instances
-        ]
+        # build all referenced images upfront, independent images are built concurrently
+        self.docker_service.get_images(
+            [ref for instance in instances for ref in instance.docker_image_ref]
+        )
+        tasks = [self._prepare_compile(instance, pipeline_params_path) for instance in instances]
+        compile_pipelines(tasks, self.compile_workers)
+        return [self._write_manifest(task) for task in tasks]
 
     def push(self, manifests: list[Path], local: bool = False) -> PushResult:
         return self.connector.push_artifacts(
-            self.docker_service.push_image,
+            self.docker_service.push_images,
             self._prepare_push(manifests, self.version, local),
         )
 
@@ -134,27 +283,32 @@ class PipelineService(BaseService[PipelineModel]):
                     version
                 )
 
-                for v in [version, "latest"]:
-                    wanna_manifest_publish_path, kubeflow_json_spec_publish_path = (
-                        pipeline_paths.get_wanna_manifest_path(v),
-                        pipeline_paths.get_wanna_pipeline_json_spec_path(v),
-                    )
+                spec_publish_path = pipeline_paths.get_wanna_pipeline_json_spec_path(version)
+                latest_spec_publish_path = pipeline_paths.get_wanna_pipeline_json_spec_path(
+                    "latest"
+                )
 
-                    manifest.json_spec_path = kubeflow_json_spec_publish_path
+                # the spec is uploaded once, latest is copied from the pushed version
+                manifest_artifacts.append(
+                    PathArtifact(
+                        name="Kubeflow V2 pipeline spec",
+                        source=local_kubeflow_json_spec_path,
+                        destination=spec_publish_path,
+                        aliases=[latest_spec_publish_path],
+                    )
+                )
 
+                # each manifest refers to its own copy of the spec
+                for v, json_spec_path in [
+                    (version, spec_publish_path),
+                    ("latest", latest_spec_publish_path),
+                ]:
+                    manifest.json_spec_path = json_spec_path
                     json_artifacts.append(
                         JsonArtifact(
                             name="WANNA pipeline manifest",
                             json_body=manifest.model_dump(),
-                            destination=wanna_manifest_publish_path,
-                        )
-                    )
-
-                    manifest_artifacts.append(
-                        PathArtifact(
-                            name="Kubeflow V2 pipeline spec",
-                            source=local_kubeflow_json_spec_path,
-                            destination=manifest.json_spec_path,
+                            destination=pipeline_paths.get_wanna_manifest_path(v),
                         )
                     )
 
@@ -176,7 +330,18 @@ class PipelineService(BaseService[PipelineModel]):
             return f"gs://{fallback_bucket}"
 
     def deploy(self, instance_name: str, env: str) -> None:
+        """
+        Deploy the pipelines, resources of all pipelines are deployed concurrently,
+        see DeployPlan.
+
+        Args:
+            instance_name: name of the pipeline to deploy, all for all of them
+            env: environment to deploy to
+        """
         instances = self._filter_instances_by_name(instance_name)
+        plan = DeployPlan()
+        # monitoring resources are listed once per project for all pipelines of this run
+        inventories = self.connector.monitoring_inventories()
         for pipeline in instances:
             logger.user_info(f"Deploying {pipeline.name} version {self.version} to env {env}")
             pipeline_bucket = PipelineService.get_pipeline_bucket(
@@ -188,7 +353,10 @@ class PipelineService(BaseService[PipelineModel]):
             manifest = PipelineService.read_manifest(
                 self.connector, pipeline_paths.get_gcs_wanna_manifest_path(self.version)
             )
-            self.connector.deploy_pipeline(manifest, pipeline_paths, self.version, env)
+            self.connector.plan_pipeline_deployment(
+                plan, manifest, pipeline_paths, self.version, env, inventories
+            )
+        plan.execute()
 
     @staticmethod
     def run(
@@ -211,7 +379,7 @@ class PipelineService(BaseService[PipelineModel]):
         tensorboard: str | None,
         network: str | None,
         pipeline_params_path: Path | None = None,
-    ) -> tuple[PipelineEnvParams, dict[Any, Any] | dict[str, Any]]:
+    ) -> tuple[PipelineEnvParams, dict[Any, Any] | dict[str, Any], dict[str, str]]:
         # Prepare env params to be exported
         pipeline_env_params = {
             "project_id": pipeline_instance.project_id,
@@ -238,11 +406,12 @@ class PipelineService(BaseService[PipelineModel]):
         if network:
             pipeline_env_params["pipeline_network"] = network
 
-        # Export Pipeline wanna ENV params to be available during compilation
+        # Pipeline wanna ENV params to be available during compilation
+        compile_env = {}
         pipeline_name_prefix = snakecase(f"{pipeline_instance.name}").upper()
         for key, value in pipeline_env_params.items():
             env_name = snakecase(f"{pipeline_name_prefix}_{key.upper()}").upper()
-            os.environ[env_name] = str(value)
+            compile_env[env_name] = str(value)
 
         for docker_image_model, _, tags in images:
             for tag in tags:
@@ -251,10 +420,10 @@ class PipelineService(BaseService[PipelineModel]):
                     and ":latest" in tag
                 ):
                     env_name = snakecase(f"{docker_image_model.name}_DOCKER_URI_LATEST").upper()
-                    os.environ[env_name] = tag
+                    compile_env[env_name] = tag
                 else:
                     env_name = snakecase(f"{docker_image_model.name}_DOCKER_URI").upper()
-                    os.environ[env_name] = tag
+                    compile_env[env_name] = tag
 
         # Collect pipeline compile params from wanna config
         if pipeline_params_path:
@@ -273,11 +442,22 @@ class PipelineService(BaseService[PipelineModel]):
             else:
                 pipeline_compile_params = {}
 
-        return pipeline_env_params, pipeline_compile_params
+        return pipeline_env_params, pipeline_compile_params, compile_env
 
     def _compile_one_instance(
         self, pipeline: PipelineModel, pipeline_params_path: Path | None = None
     ) -> Path:
+        task = self._prepare_compile(pipeline, pipeline_params_path)
+        compile_pipelines([task])
+        return self._write_manifest(task)
+
+    def _write_manifest(self, task: PipelineCompileTask) -> Path:
+        self.connector.write(task.manifest_path, task.manifest.json())
+        return Path(task.manifest_path).resolve()
+
+    def _prepare_compile(
+        self, pipeline: PipelineModel, pipeline_params_path: Path | None = None
+    ) -> PipelineCompileTask:
         image_tags = [
             self.docker_service.get_image(docker_image_ref=docker_image_ref)
             for docker_image_ref in pipeline.docker_image_ref
@@ -292,9 +472,7 @@ class PipelineService(BaseService[PipelineModel]):
         pipeline_paths = PipelinePaths(self.workdir, pipeline_bucket, pipeline.name)
 
         tensorboard = (
-            self.tensorboard_service.get_or_create_tensorboard_instance_by_name(
-                pipeline.tensorboard_ref
-            )
+            self.session.get_tensorboard(pipeline.tensorboard_ref)
             if pipeline.tensorboard_ref
             and self.push_mode.can_push_gcp_resources(gcp_access_allowed)
             else None
@@ -317,7 +495,7 @@ class PipelineService(BaseService[PipelineModel]):
             labels = {**pipeline.labels, **labels}
         pipeline.labels = labels
         # Collect kubeflow pipeline params for compilation
-        pipeline_env_params, pipeline_params = self._export_pipeline_params(
+        pipeline_env_params, pipeline_params, compile_env = self._export_pipeline_params(
             pipeline_paths,
             pipeline,
             self.version,
@@ -327,20 +505,6 @@ class PipelineService(BaseService[PipelineModel]):
             pipeline_params_path,
         )
 
-        # The current version implies that the pipeline_function is a python import path. ex: module1.module2.function
-        mod_name, func_name = pipeline.pipeline_function.rsplit(".", 1)
-        module = importlib.import_module(mod_name)
-        logger.user_info(
-            f"Using kfp.v2.compiler.Compiler.compile with function {pipeline.pipeline_function}"
-        )
-        func = getattr(module, func_name)
-        kfp_v2_compiler.Compiler().compile(
-            pipeline_func=func,
-            pipeline_parameters=pipeline_params,
-            package_path=pipeline_paths.get_local_pipeline_json_spec_path(self.version),
-            type_check=True,
-        )
-
         docker_refs = [
             DockerBuildResult(
                 name=model.name,
@@ -380,9 +544,27 @@ class PipelineService(BaseService[PipelineModel]):
             experiment=pipeline.experiment,
         )
 
-        manifest_path = pipeline_paths.get_local_wanna_manifest_path(self.version)
-        self.connector.write(manifest_path, deployment_manifest.json())
-        return Path(manifest_path).resolve()
+        return PipelineCompileTask(
+            # the current version implies that the pipeline_function is a python import path
+            pipeline_function=pipeline.pipeline_function,
+            pipeline_params=pipeline_params,
+            package_path=pipeline_paths.get_local_pipeline_json_spec_path(self.version),
+            env=compile_env,
+            manifest=deployment_manifest,
+            manifest_path=pipeline_paths.get_local_wanna_manifest_path(self.version),
+            cache=(
+                PipelineCompileCache(pipeline_paths.local_pipeline_path / ".cache")
+                if self.compile_cache
+                else None
+            ),
+            fingerprint=(
+                PipelineCompileCache.fingerprint(
+                    pipeline.pipeline_function, pipeline_params, compile_env
+                )
+                if self.compile_cache
+                else None
+            ),
+        )
 
     @staticmethod
     def read_manifest(connector: VertexConnector[PipelineResource], path: str) -> PipelineResource:
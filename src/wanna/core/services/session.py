@@ -0,0 +1,77 @@
+import threading
+from pathlib import Path
+
+from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.models.wanna_config import WannaConfigModel
+from wanna.core.services.docker import DockerService
+from wanna.core.services.tensorboard import TensorboardService
+
+logger = get_logger(__name__)
+
+
+class BuildSession:
+    """
+    State shared by the services of one wanna command working with one wanna-ml config.
+
+    Services building pipelines, jobs and workbench instances that are given the same
+    session share the docker image resolution (every image is hashed and built at most once)
+    and the tensorboard lookups. The CLI creates one session per command and every service
+    creates its own session if none is given, so nothing is kept between commands run in one process.
+
+    Args:
+        config: Loaded wanna.yaml
+        workdir: Where wanna will conduct it's work
+        version: Which version of the resources are built
+    """
+
+    def __init__(self, config: WannaConfigModel, workdir: Path, version: str = "dev"):
+        self.config = config
+        self.workdir = workdir
+        self.version = version
+        self.tensorboard_service = TensorboardService(config=config)
+        # docker services by quick_mode, quick mode only computes the tags
+        self._docker_services: dict[bool, DockerService] = {}
+        self._tensorboards: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def docker_service(self, quick_mode: bool = False) -> DockerService:
+        """
+        DockerService shared by all services of the session.
+
+        Args:
+            quick_mode: just return the tags, do not build the images
+
+        Returns:
+            DockerService
+        """
+        with self._lock:
+            if quick_mode not in self._docker_services:
+                self._docker_services[quick_mode] = DockerService(
+                    docker_model=self.config.docker,  # type: ignore
+                    gcp_profile=self.config.gcp_profile,
+                    version=self.version,
+                    work_dir=self.workdir,
+                    wanna_project_name=self.config.wanna_project.name,
+                    quick_mode=quick_mode,
+                )
+            return self._docker_services[quick_mode]
+
+    def get_tensorboard(self, tensorboard_name: str) -> str:
+        """
+        Full resource name of the tensorboard, created if it does not exist yet.
+        Every tensorboard is looked up only once per session.
+
+        Args:
+            tensorboard_name: name of the tensorboard in wanna-ml config
+
+        Returns:
+            full tensorboard resource name
+        """
+        with self._lock:
+            if tensorboard_name not in self._tensorboards:
+                self._tensorboards[tensorboard_name] = (
+                    self.tensorboard_service.get_or_create_tensorboard_instance_by_name(
+                        tensorboard_name
+                    )
+                )
+            return self._tensorboards[tensorboard_name]
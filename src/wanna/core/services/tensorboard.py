@@ -152,18 +152,7 @@ class TensorboardService(BaseService[TensorboardModel]):
         Returns:
             TensorboardModel
         """
-        matched_tb_models: list[TensorboardModel] = list(
-            filter(lambda i: i.name.strip() == tb_name.strip(), self.instances)
-        )
-
-        if len(matched_tb_models) == 0:
-            raise ValueError(f"No tensorboard model with name {tb_name} found")
-        elif len(matched_tb_models) > 1:
-            raise ValueError(
-                f"Multiple tensorboard models with name {tb_name} found, please use unique names"
-            )
-        else:
-            return matched_tb_models[0]
+        return self.instances_by_name.get(tb_name)
 
     def get_or_create_tensorboard_instance_by_name(self, tensorboard_name: str) -> str:
         """
@@ -5,7 +5,6 @@ from typing import TYPE_CHECKING, TypeVar, Union
 
 import typer
 from lazyimport import Import
-from waiting import wait
 
 if TYPE_CHECKING:  # pragma: no cover
     import google.api_core.operation as gapi_core_operation
@@ -22,6 +21,7 @@ from wanna.core.deployment.models import PushMode
 from wanna.core.loggers.wanna_logger import get_logger
 from wanna.core.models.workbench import BaseWorkbenchModel
 from wanna.core.services.base import BaseService
+from wanna.core.utils.polling import wait_for
 
 T = TypeVar("T", bound=BaseWorkbenchModel)
 CreateRequest = Union[
@@ -74,13 +74,14 @@ class BaseWorkbenchService(BaseService[T]):
             nb_instance.result().name
         )  # .result() waits for compute engine behind the notebook to start
         logger.user_info(f"Starting JupyterLab for {instance.name} ...")
-        wait(
+        wait_for(
+            f"JupyterLab in {instance.name}",
             lambda: self._validate_jupyterlab_state(
                 instance_full_name, gcloud_notebooks_v1.Runtime.State.ACTIVE
             ),
-            timeout_seconds=450,
-            sleep_seconds=20,
-            waiting_for="Starting JupyterLab in your instance",
+            timeout=450,
+            initial_delay=5,
+            max_delay=30,
         )
         jupyterlab_link = self._get_jupyterlab_link(instance_full_name)
         logger.user_success(f"JupyterLab for {instance.name} started at {jupyterlab_link}")
@@ -26,8 +26,7 @@ from wanna.core.deployment.models import PushMode
 from wanna.core.loggers.wanna_logger import get_logger
 from wanna.core.models.wanna_config import WannaConfigModel
 from wanna.core.models.workbench import InstanceModel
-from wanna.core.services.docker import DockerService
-from wanna.core.services.tensorboard import TensorboardService
+from wanna.core.services.session import BuildSession
 from wanna.core.services.workbench import BaseWorkbenchService, Instances
 from wanna.core.utils import templates
 from wanna.core.utils.config_enricher import email_fixer
@@ -46,6 +45,7 @@ class WorkbenchInstanceService(BaseWorkbenchService[InstanceModel]):
         workdir: Path,
         owner: str | None = None,
         version: str = "dev",
+        session: BuildSession | None = None,
     ):
         super().__init__(
             instance_type="workbench-instance",
@@ -58,20 +58,12 @@ class WorkbenchInstanceService(BaseWorkbenchService[InstanceModel]):
             gcloud_notebooks_v2_services_notebook_service.NotebookServiceClient()
         )
         self.config = config
-        self.docker_service = (
-            DockerService(
-                docker_model=config.docker,
-                gcp_profile=config.gcp_profile,
-                version=version,
-                work_dir=workdir,
-                wanna_project_name=self.wanna_project.name,
-            )
-            if config.docker
-            else None
-        )
+        # images and tensorboards are shared with other services using the same session
+        self.session = session or BuildSession(config, workdir, version)
+        self.docker_service = self.session.docker_service() if config.docker else None
 
         self.owner = owner
-        self.tensorboard_service = TensorboardService(config=config)
+        self.tensorboard_service = self.session.tensorboard_service
 
     def _delete_instance_client(self, instance: InstanceModel) -> gapi_core_operation.Operation:
         return self.notebook_client.delete_instance(
@@ -345,11 +337,7 @@ class WorkbenchInstanceService(BaseWorkbenchService[InstanceModel]):
             env_vars = {**env_vars, **nb_instance.env_vars}
 
         if nb_instance.tensorboard_ref:
-            tensorboard_resource_name = (
-                self.tensorboard_service.get_or_create_tensorboard_instance_by_name(
-                    nb_instance.tensorboard_ref
-                )
-            )
+            tensorboard_resource_name = self.session.get_tensorboard(nb_instance.tensorboard_ref)
         else:
             tensorboard_resource_name = None
 
@@ -470,6 +458,8 @@ class WorkbenchInstanceService(BaseWorkbenchService[InstanceModel]):
                     image_tag = self.docker_service.get_image(docker_image_ref=docker_image_ref)
                     if image_tag[1]:
                         self.docker_service.push_image(image_tag[1])
+                    elif self.docker_service.cloud_build:
+                        self.docker_service.push_image(image_tag[2])
             else:
                 raise Exception("Docker params in wanna-ml config not defined")
 
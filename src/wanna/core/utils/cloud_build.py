@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+from lazyimport import Import
+
+if TYPE_CHECKING:  # pragma: no cover
+    import google.cloud.devtools.cloudbuild_v1.types as gcloud_devtools_cloudbuild_v1_types
+else:
+    gcloud_devtools_cloudbuild_v1_types = Import("google.cloud.devtools.cloudbuild_v1.types")
+
+from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.utils.polling import Poller, PollTarget
+
+logger = get_logger(__name__)
+
+
+class CloudBuildException(Exception):
+    pass
+
+
+@dataclass
+class CloudBuildJob:
+    """
+    A build submitted to GCP Cloud Build that is tracked by CloudBuildPoller.
+
+    - `name` - name used in logs, usually the docker image ref
+    - `client` - CloudBuildClient the build was submitted with
+    - `project_id` - GCP project the build runs in
+    - `build_id` - Cloud Build id of the build
+    - `build_name` - full resource name of the build, including location
+    - `link` - link to the build in GCP console
+    - `timeout` - seconds to wait for the build to finish since it was submitted
+    - `on_success` - callback called once the build succeeds
+    """
+
+    name: str
+    client: Any
+    project_id: str
+    build_id: str
+    build_name: str
+    link: str
+    timeout: float
+    on_success: Callable[[], None] | None = None
+    status: str = "STATUS_UNKNOWN"
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class CloudBuildPoller:
+    """
+    Tracks many submitted Cloud Build builds with a single polling loop, see Poller.
+    The delay between checks of a build grows exponentially from initial_delay
+    up to max_delay. A build is awaited until its timeout since it was submitted.
+    Every status transition is logged as soon as it is observed.
+
+    Args:
+        initial_delay: seconds between the first and the second check of a build
+        max_delay: maximal number of seconds between checks of a build
+        multiplier: growth of the delay between checks
+        jitter: relative randomization of the delays
+        sleep: function used for waiting between checks
+        clock: monotonic clock the builds were submitted by
+    """
+
+    TERMINAL_STATUSES = {"SUCCESS", "FAILURE", "INTERNAL_ERROR", "TIMEOUT", "CANCELLED", "EXPIRED"}
+
+    def __init__(
+        self,
+        initial_delay: float = 2.0,
+        max_delay: float = 30.0,
+        multiplier: float = 1.5,
+        jitter: float = 0.2,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.poller = Poller(
+            initial_delay=initial_delay,
+            max_delay=max_delay,
+            multiplier=multiplier,
+            jitter=jitter,
+            sleep=sleep,
+            clock=clock,
+        )
+        self.jobs: list[tuple[PollTarget, CloudBuildJob]] = []
+        self._lock = threading.Lock()
+
+    def add(self, job: CloudBuildJob) -> None:
+        """
+        Start tracking a submitted build, safe to call from multiple threads.
+        """
+        target = self.poller.add(
+            f"build of {job.name} {job.link}",
+            lambda: self._poll(job),
+            deadline=job.submitted_at + job.timeout,
+        )
+        with self._lock:
+            self.jobs.append((target, job))
+
+    def _poll(self, job: CloudBuildJob) -> bool:
+        build = job.client.get_build(
+            request={"name": job.build_name, "project_id": job.project_id, "id": job.build_id}
+        )
+        status = gcloud_devtools_cloudbuild_v1_types.Build.Status(build.status).name
+        if status != job.status:
+            logger.user_info(text=f"Build of {job.name} {job.status} -> {status} {job.link}")
+            job.status = status
+        if status == "SUCCESS" and job.on_success:
+            job.on_success()
+        return status in self.TERMINAL_STATUSES
+
+    def wait(self) -> list[CloudBuildJob]:
+        """
+        Wait until all tracked builds finish.
+
+        Returns:
+            builds that failed, timed out or were cancelled. Successful builds
+            have their on_success callback called.
+        """
+        self.poller.wait()
+        with self._lock:
+            jobs = self.jobs
+            self.jobs = []
+        # timed out, failed to get its status, or finished other than successfully
+        return [job for target, job in jobs if not target.done or job.status != "SUCCESS"]
@@ -0,0 +1,196 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import site
+import sys
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from wanna.core.utils.hashing import hash_context_dir, hash_file
+
+CACHE_FORMAT_VERSION = 1
+SOURCE_IGNORE_PATTERNS = ["**/__pycache__/", "**/*.pyc"]
+
+
+def _find_module(name: str, search_paths: list[str]) -> Path | None:
+    # same lookup as the import system does for source modules, without importing anything
+    relpath = Path(*name.split("."))
+    namespace_package = None
+    for entry in search_paths:
+        base = Path(entry or ".")
+        for candidate in (base / relpath.with_suffix(".py"), base / relpath / "__init__.py"):
+            if candidate.is_file():
+                return candidate
+        if namespace_package is None and (base / relpath).is_dir():
+            namespace_package = base / relpath
+    return namespace_package
+
+
+def _installation_dirs() -> list[Path]:
+    prefixes = {sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix}
+    dirs = [*prefixes, *site.getsitepackages(), site.getusersitepackages()]
+    return [Path(d).resolve() for d in dirs]
+
+
+def _imported_modules(path: Path, module_name: str) -> set[str]:
+    is_package = path.name == "__init__.py"
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    names: set[str] = set()
+    for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split(".") if package else []
+                base = ".".join(parts[: len(parts) - node.level + 1])
+                module = ".".join(filter(None, [base, node.module]))
+            else:
+                module = node.module or ""
+            if module:
+                names.add(module)
+            # `from package import module` imports a submodule
+            names.update(
+                f"{module}.{alias.name}" if module else alias.name for alias in node.names
+            )
+    # a module imports all its parent packages
+    return {".".join(n.split(".")[:i]) for n in names for i in range(1, n.count(".") + 2)}
+
+
+def local_source_roots(module_name: str, search_paths: list[str] | None = None) -> dict[str, Path]:
+    """
+    Find local source code the module depends on: the top-level packages (or modules)
+    of the module and of all modules it transitively imports, except the ones installed
+    in the python environment (standard library, site-packages).
+    Imports are found by parsing the source, nothing is imported.
+
+    Args:
+        module_name: python import path, ex: module1.module2
+        search_paths: where to look for modules, defaults to sys.path
+
+    Returns:
+        directories of local top-level packages and files of local top-level modules by their name
+    """
+    search_paths = sys.path if search_paths is None else search_paths
+    installation_dirs = _installation_dirs()
+    roots: dict[str, Path] = {}
+    seen: set[str] = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path = _find_module(name, search_paths)
+        if path is None or any(path.resolve().is_relative_to(d) for d in installation_dirs):
+            continue
+        top_level_name = name.split(".")[0]
+        top_level = _find_module(top_level_name, search_paths)
+        if top_level is not None:
+            roots[top_level_name] = (
+                top_level.parent if top_level.name == "__init__.py" else top_level
+            )
+        if path.is_file():
+            pending.extend(_imported_modules(path, name) - seen)
+    return roots
+
+
+def hash_sources(sources: dict[str, Path]) -> dict[str, str]:
+    """
+    Checksum of every source directory or file, by its name.
+    """
+    return {
+        name: (
+            hash_context_dir(source, SOURCE_IGNORE_PATTERNS)
+            if source.is_dir()
+            else hash_file(source)
+        )
+        for name, source in sorted(sources.items())
+    }
+
+
+class PipelineCompileCache:
+    """
+    Content-addressed cache of compiled Kubeflow pipeline specs of one pipeline.
+
+    The fingerprint covers everything the compilation depends on, the local python
+    sources the pipeline module imports (including data files in their packages, eg. component
+    yaml files), pipeline params, the env params exported for the compilation
+    and versions of kfp and python. When the fingerprint matches an earlier compilation,
+    its pipeline spec is reused instead of compiling the pipeline again.
+
+    Args:
+        cache_dir: where the compiled specs are stored, one file per fingerprint
+        max_entries: how many most recently used specs are kept
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 10):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def fingerprint(
+        pipeline_function: str,
+        pipeline_params: dict[str, Any],
+        env: dict[str, str],
+    ) -> str:
+        """
+        Compute the fingerprint of a pipeline compilation.
+
+        Args:
+            pipeline_function: python import path of the pipeline function
+            pipeline_params: Kubeflow pipeline params
+            env: env params exported for the compilation
+
+        Returns:
+            sha256 of all inputs
+        """
+        module_name = pipeline_function.rsplit(".", 1)[0]
+        inputs = {
+            "version": CACHE_FORMAT_VERSION,
+            "python": list(sys.version_info[:2]),
+            "kfp": metadata.version("kfp"),
+            "pipeline_function": pipeline_function,
+            "pipeline_params": pipeline_params,
+            "env": env,
+            "sources": hash_sources(local_source_roots(module_name)),
+        }
+        serialized = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _entry(self, fingerprint: str) -> Path:
+        return self.cache_dir / f"{fingerprint}.json"
+
+    def restore(self, fingerprint: str, package_path: str) -> bool:
+        """
+        Copy the pipeline spec compiled with the same fingerprint to package_path.
+
+        Returns:
+            True if the spec was found in the cache
+        """
+        entry = self._entry(fingerprint)
+        if not entry.is_file():
+            return False
+        os.makedirs(Path(package_path).parent, exist_ok=True)
+        shutil.copyfile(entry, package_path)
+        # mark as recently used
+        entry.touch()
+        return True
+
+    def store(self, fingerprint: str, package_path: str) -> None:
+        """
+        Store the compiled pipeline spec and evict the least recently used ones.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self._entry(fingerprint)
+        tmp_entry = entry.with_suffix(".tmp")
+        shutil.copyfile(package_path, tmp_entry)
+        os.replace(tmp_entry, entry)
+
+        entries = sorted(
+            self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime_ns, reverse=True
+        )
+        for stale in entries[self.max_entries :]:
+            stale.unlink(missing_ok=True)
@@ -0,0 +1,171 @@
+import fnmatch
+import os
+import posixpath
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class _Rule:
+    pattern: str
+    regex: re.Pattern[str]
+    parts: tuple[str, ...]
+    exclusion: bool
+    dir_only: bool
+
+
+class DockerIgnore:
+    """
+    Compiled .dockerignore patterns.
+
+    Patterns follow the Docker semantics: they are relative to the context root, `*` and `?`
+    do not cross directories, `**` matches any number of directories, a pattern matching
+    a directory matches everything inside it and `!` re-includes previously excluded paths,
+    the last matching pattern wins. On top of that, a pattern ending with `/`
+    matches only directories, as in .gitignore.
+
+    The same instance is used for hashing and tarring the docker context,
+    so both work with exactly the same list of files.
+
+    Args:
+        patterns: lines of .dockerignore without comments and empty lines
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.rules = [rule for rule in map(self._compile, patterns) if rule]
+
+    @staticmethod
+    def _compile(pattern: str) -> _Rule | None:
+        pattern = pattern.strip()
+        exclusion = pattern.startswith("!")
+        if exclusion:
+            pattern = pattern[1:].strip()
+        dir_only = pattern.endswith("/")
+        pattern = posixpath.normpath(pattern.replace("\\", "/")).lstrip("/")
+        if pattern in ("", "."):
+            return None
+
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith("**", i):
+                i += 2
+                if pattern.startswith("/", i):
+                    # `**/` matches zero or more directories
+                    regex += "(?:.*/)?"
+                    i += 1
+                else:
+                    regex += ".*"
+                continue
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "\\" and i + 1 < len(pattern):
+                i += 1
+                regex += re.escape(pattern[i])
+            elif char == "[" and "]" in pattern[i + 1 :]:
+                end = pattern.index("]", i + 1)
+                char_class = pattern[i + 1 : end]
+                if char_class.startswith("!"):
+                    char_class = "^" + char_class[1:]
+                regex += f"[{char_class}]"
+                i = end
+            else:
+                regex += re.escape(char)
+            i += 1
+
+        return _Rule(
+            pattern=pattern,
+            regex=re.compile(f"^{regex}$"),
+            parts=tuple(pattern.split("/")),
+            exclusion=exclusion,
+            dir_only=dir_only,
+        )
+
+    def _match_vector(
+        self, relpath: str, is_dir: bool, parent_vector: tuple[bool, ...] | None
+    ) -> tuple[bool, ...]:
+        # for every rule, whether it matches the path itself or any of its parents
+        if parent_vector is None:
+            parent_vector = (False,) * len(self.rules)
+        return tuple(
+            parent_matched
+            or ((is_dir or not rule.dir_only) and rule.regex.match(relpath) is not None)
+            for rule, parent_matched in zip(self.rules, parent_vector)
+        )
+
+    def _excluded(self, vector: tuple[bool, ...]) -> bool:
+        excluded = False
+        for rule, matched in zip(self.rules, vector):
+            if matched:
+                excluded = not rule.exclusion
+        return excluded
+
+    def _may_include_below(self, relpath: str) -> bool:
+        # can some `!` rule re-include a path inside the (excluded) directory relpath
+        dir_parts = relpath.split("/")
+        for rule in self.rules:
+            if not rule.exclusion:
+                continue
+            for i, part in enumerate(rule.parts):
+                if "**" in part or i >= len(dir_parts):
+                    return True
+                if not fnmatch.fnmatchcase(dir_parts[i], part):
+                    break
+            else:
+                return True
+        return False
+
+    def matches(self, relpath: str, *, is_dir: bool) -> bool:
+        """
+        Check if the path should be ignored.
+
+        Args:
+            relpath: posix path relative to the context root
+            is_dir: whether the path is a directory, rules ending with `/` match only directories
+
+        Returns:
+            True if the path is excluded from the docker context
+        """
+        parts = relpath.strip("/").split("/")
+        vector = None
+        for i in range(1, len(parts)):
+            vector = self._match_vector("/".join(parts[:i]), True, vector)
+        return self._excluded(self._match_vector("/".join(parts), is_dir, vector))
+
+    def walk(self, root: Path) -> list[str]:
+        """
+        List files in root that are not ignored. Excluded directories are not entered,
+        unless a `!` pattern can re-include something inside them.
+
+        Args:
+            root: the docker context directory
+
+        Returns:
+            sorted posix paths relative to root
+        """
+        files = []
+        vectors: dict[str, tuple[bool, ...] | None] = {"": None}
+        for dirpath, dirs, filenames in os.walk(root):
+            reldir = Path(os.path.relpath(dirpath, root)).as_posix()
+            reldir = "" if reldir == "." else reldir
+            parent_vector = vectors.pop(reldir)
+
+            kept_dirs = []
+            for name in dirs:
+                relpath = f"{reldir}/{name}" if reldir else name
+                vector = self._match_vector(relpath, True, parent_vector)
+                if self._excluded(vector) and not self._may_include_below(relpath):
+                    continue
+                vectors[relpath] = vector
+                kept_dirs.append(name)
+            dirs[:] = kept_dirs
+
+            for name in filenames:
+                relpath = f"{reldir}/{name}" if reldir else name
+                if not self._excluded(self._match_vector(relpath, False, parent_vector)):
+                    files.append(relpath)
+        return sorted(files)
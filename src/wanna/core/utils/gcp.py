@@ -1,19 +1,30 @@
 from __future__ import annotations
 
+import os
+import queue
 import re
+import threading
+from collections.abc import Callable, Iterator
 from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import IO, TYPE_CHECKING, Any, cast
 
 from gcloud_config_helper import gcloud_config_helper
 from lazyimport import Import
+from requests.adapters import HTTPAdapter
 
 if TYPE_CHECKING:  # pragma: no cover
+    import google.auth.credentials as google_auth_credentials
+    import google.auth.transport.requests as google_auth_transport_requests
     import google.cloud.compute_v1 as gcloud_compute_v1
     import google.cloud.compute_v1.types as gcloud_compute_v1_types
     import google.cloud.resourcemanager_v3.services.projects as gcloud_resourcemanager_v3_services_projects
     import google.cloud.storage as gcloud_storage
+    from google import auth as google_auth
 else:
+    google_auth = Import("google.auth")
+    google_auth_credentials = Import("google.auth.credentials")
+    google_auth_transport_requests = Import("google.auth.transport.requests")
     gcloud_storage = Import("google.cloud.storage")
     gcloud_compute_v1 = Import("google.cloud.compute_v1")
     gcloud_compute_v1_types = Import("google.cloud.compute_v1.types")
@@ -356,6 +367,117 @@ def upload_file_to_gcs(
     return blob
 
 
+def upload_stream_to_gcs(
+    write_stream: Callable[[IO[bytes]], None],
+    bucket_name: str,
+    blob_name: str,
+    chunk_size: int = 8 * 1024 * 1024,
+    max_buffered_chunks: int = 4,
+) -> gcloud_storage.blob.Blob:
+    """
+    Upload data produced by write_stream to GCS bucket with a resumable upload,
+    without saving it locally as a file.
+
+    write_stream runs in a separate thread and writes into a pipe, which is drained
+    into the upload in chunk_size pieces. Producing the data overlaps with the network
+    transfer and at most max_buffered_chunks chunks are held in memory. The upload is
+    finalized only when write_stream finishes without an error.
+
+    Args:
+        write_stream: function writing the data into the given binary file-like object
+        bucket_name:
+        blob_name:
+        chunk_size: size of the resumable upload chunks, must be a multiple of 256 KiB
+        max_buffered_chunks: how many chunks can wait in memory for the upload
+
+    Returns:
+        storage.blob.Blob
+    """
+    bucket = storage_client().get_bucket(bucket_name)
+    blob = bucket.blob(blob_name)
+    pipe = _ChunkPipe(chunk_size, max_buffered_chunks)
+
+    def produce():
+        try:
+            write_stream(cast(IO[bytes], pipe))
+        except BaseException as e:
+            pipe.close(error=e)
+        else:
+            pipe.close()
+
+    producer = threading.Thread(target=produce, name="wanna-gcs-stream", daemon=True)
+    producer.start()
+    try:
+        writer = blob.open("wb", chunk_size=chunk_size)
+        for chunk in pipe.chunks():
+            writer.write(chunk)
+        writer.close()
+    except BaseException:
+        pipe.cancel()
+        raise
+    finally:
+        producer.join()
+    return blob
+
+
+class _ChunkPipe:
+    """
+    Bounded pipe between a thread writing bytes and a reader consuming them in chunks.
+    """
+
+    def __init__(self, chunk_size: int, max_chunks: int):
+        self.chunk_size = chunk_size
+        self._queue: queue.Queue[bytes | BaseException | None] = queue.Queue(maxsize=max_chunks)
+        self._buffer = bytearray()
+        self._cancelled = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._put(bytes(self._buffer[: self.chunk_size]))
+            del self._buffer[: self.chunk_size]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self, error: BaseException | None = None) -> None:
+        """
+        Signal the reader that no more data will come, optionally because of an error.
+        """
+        try:
+            if error is None and self._buffer:
+                self._put(bytes(self._buffer))
+                self._buffer.clear()
+            self._put(error)
+        except BrokenPipeError:
+            pass
+
+    def cancel(self) -> None:
+        """
+        Stop the writer after the reader failed.
+        """
+        self._cancelled.set()
+
+    def chunks(self) -> Iterator[bytes]:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _put(self, item: bytes | BaseException | None) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise BrokenPipeError("Reader of the stream was closed")
+
+
 def upload_string_to_gcs(data: str, bucket_name: str, blob_name: str) -> gcloud_storage.blob.Blob:
     """
     Upload a string to GCS bucket without saving it locally as a file.
@@ -373,9 +495,96 @@ def upload_string_to_gcs(data: str, bucket_name: str, blob_name: str) -> gcloud_
     return blob
 
 
-@lru_cache(maxsize=1)
-def storage_client() -> gcloud_storage.Client:
-    return gcloud_storage.Client(credentials=get_credentials())
+# scopes of google.cloud.storage.Client
+GCS_SCOPES = (
+    "https://www.googleapis.com/auth/devstorage.full_control",
+    "https://www.googleapis.com/auth/devstorage.read_only",
+    "https://www.googleapis.com/auth/devstorage.read_write",
+)
+
+
+class StorageClientPool:
+    """
+    One GCS client per credentials, shared by everything that talks to GCS.
+
+    Every client gets its own authorized HTTP session keeping its connections alive
+    in a pool of pool_size connections per host, so uploads and reads running one after
+    another (or in parallel threads) reuse the TLS connections and the refreshed credentials
+    instead of opening new ones.
+
+    Args:
+        pool_size: maximal number of kept-alive connections per host
+    """
+
+    def __init__(self, pool_size: int):
+        self.pool_size = pool_size
+        self._clients: dict[int, tuple[Any, gcloud_storage.Client, HTTPAdapter]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, credentials: google_auth_credentials.Credentials | None
+    ) -> gcloud_storage.Client:
+        """
+        Get the client of the credentials, create it on the first call.
+
+        Args:
+            credentials: credentials of the client, None for the default ones
+
+        Returns:
+            gcloud_storage.Client
+        """
+        with self._lock:
+            # the pool keeps a reference to the credentials, so its id is not reused
+            entry = self._clients.get(id(credentials))
+            if entry is None:
+                if credentials is None:
+                    scoped, _ = google_auth.default(scopes=GCS_SCOPES)
+                else:
+                    scoped = google_auth_credentials.with_scopes_if_required(
+                        credentials, GCS_SCOPES
+                    )
+                session = google_auth_transport_requests.AuthorizedSession(scoped)
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                client = gcloud_storage.Client(credentials=scoped, _http=session)
+                entry = self._clients[id(credentials)] = (credentials, client, adapter)
+            return entry[1]
+
+    def stats(self) -> dict[str, int]:
+        """
+        How many connections all clients opened and how many requests reused them.
+
+        Returns:
+            dict with opened, requests and reused counts
+        """
+        opened, requests = 0, 0
+        with self._lock:
+            for _, _, adapter in self._clients.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        requests += pool.num_requests
+        return {"opened": opened, "requests": requests, "reused": max(requests - opened, 0)}
+
+
+storage_clients = StorageClientPool(int(os.getenv("WANNA_GCS_CONNECTION_POOL_SIZE", "16")))
+
+
+def storage_client(
+    credentials: google_auth_credentials.Credentials | None = None,
+) -> gcloud_storage.Client:
+    """
+    Shared GCS client, see StorageClientPool.
+
+    Args:
+        credentials: credentials of the client, defaults to the wanna credentials
+
+    Returns:
+        gcloud_storage.Client
+    """
+    return storage_clients.get(credentials or get_credentials())
 
 
 def download_script_from_gcs(gcs_path: str) -> str:
@@ -0,0 +1,264 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from lazyimport import Import
+
+if TYPE_CHECKING:  # pragma: no cover
+    import google_crc32c
+else:
+    google_crc32c = Import("google_crc32c")
+
+from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.utils.dockerignore import DockerIgnore
+
+logger = get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+CHUNK_SIZE = 2**20
+
+# dirhash protocol separators, see dirhash.Protocol
+_ENTRY_PROPERTY_SEPARATOR = "\000"
+_ENTRY_DESCRIPTOR_SEPARATOR = "\000\000"
+
+
+class FileHashIndex:
+    """
+    Persistent index of file hashes keyed by (path, size, mtime_ns, inode).
+
+    Files whose stat signature did not change since the last run are not read again,
+    only new or modified files are rehashed. Entries whose mtime is not older than
+    the moment the index was saved are never trusted, so a file modified in the same
+    clock tick as the previous scan is always rehashed.
+
+    Args:
+        index_path: path to the JSON file where the index is persisted
+    """
+
+    def __init__(self, index_path: Path):
+        self.index_path = index_path
+        self.entries: dict[str, tuple[int, int, int, str]] = {}
+        self.saved_at_ns = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.debug(f"Ignoring unreadable file hash index {self.index_path}")
+            return
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            return
+        self.saved_at_ns = data.get("saved_at_ns", 0)
+        self.entries = {path: tuple(entry) for path, entry in data.get("files", {}).items()}
+
+    def save(self) -> None:
+        os.makedirs(self.index_path.parent, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": INDEX_FORMAT_VERSION,
+                    "saved_at_ns": time.time_ns(),
+                    "files": self.entries,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.index_path)
+
+    def get_hash(self, relpath: str, path: Path) -> str:
+        """
+        Get the sha256 of a file, reusing the indexed value when the stat signature matches.
+        Executable bits of the file are mixed into the hash, see with_exec_bits.
+
+        Args:
+            relpath: path relative to the hashed directory, used as the index key
+            path: actual path of the file
+
+        Returns:
+            hex digest of the file content and executable bits
+        """
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        entry = self.entries.get(relpath)
+        if entry and entry[:3] == signature and stat.st_mtime_ns < self.saved_at_ns:
+            self.hits += 1
+            # chmod does not change mtime, the mode is always taken from the current stat
+            return with_exec_bits(entry[3], stat.st_mode)
+
+        self.misses += 1
+        file_hash = hash_file(path)
+        self.entries[relpath] = (*signature, file_hash)
+        return with_exec_bits(file_hash, stat.st_mode)
+
+    def prune(self, relpaths: set[str]) -> None:
+        """
+        Drop entries of files that are no longer part of the hashed directory.
+        """
+        self.entries = {k: v for k, v in self.entries.items() if k in relpaths}
+
+
+def hash_file(path: Path) -> str:
+    """
+    Get the sha256 of a file content, reading it in chunks.
+
+    Args:
+        path: path to the file
+
+    Returns:
+        hex digest of the file content
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def with_exec_bits(file_hash: str, mode: int) -> str:
+    """
+    Mix the executable bits of a file into its hash, so a change of only the permissions
+    changes the hash of the docker context. Hashes of non-executable files are unchanged.
+
+    Args:
+        file_hash: sha256 of the file content
+        mode: st_mode of the file
+
+    Returns:
+        hex digest
+    """
+    exec_bits = mode & 0o111
+    if not exec_bits:
+        return file_hash
+    return hashlib.sha256(f"{file_hash}:{exec_bits:o}".encode()).hexdigest()
+
+
+def crc32c_file(path: Path | str) -> str:
+    """
+    Get the CRC32C of a file content, reading it in chunks.
+
+    Args:
+        path: path to the file
+
+    Returns:
+        base64 of the big-endian checksum, same as crc32c in GCS object metadata
+    """
+    checksum = google_crc32c.Checksum()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode("utf-8")
+
+
+def crc32c_bytes(data: bytes) -> str:
+    """
+    Get the CRC32C of data, same format as crc32c_file.
+    """
+    return base64.b64encode(google_crc32c.Checksum(data).digest()).decode("utf-8")
+
+
+def _entry_descriptor(properties: list[str]) -> str:
+    return _ENTRY_PROPERTY_SEPARATOR.join(sorted(properties))
+
+
+def tree_digest(file_hashes: dict[str, str]) -> str:
+    """
+    Aggregate file hashes into a single directory digest.
+    Uses the dirhash protocol with default entry properties (name and data), so for
+    plain file hashes the result equals `dirhash(directory, "sha256")` over the same set
+    of files. hash_context_dir passes hashes that include executable bits (see with_exec_bits)
+    and lists the files by DockerIgnore.walk, which does not follow symlinked directories
+    (os.walk default) while dirhash does, so contexts with executable files or symlinked
+    directories get a different hash than dirhash.
+
+    Args:
+        file_hashes: mapping of posix path relative to the root directory to file sha256
+
+    Returns:
+        hex digest of the directory
+    """
+    if not file_hashes:
+        raise ValueError("Nothing to hash")
+
+    tree: dict[str, Any] = {}
+    for relpath, file_hash in file_hashes.items():
+        *dirs, name = relpath.split("/")
+        node = tree
+        for d in dirs:
+            node = node.setdefault(d, {})
+        node[name] = file_hash
+
+    def digest(node: dict[str, Any]) -> str:
+        descriptors = []
+        for name, value in node.items():
+            if isinstance(value, dict):
+                descriptors.append(_entry_descriptor([f"dirhash:{digest(value)}", f"name:{name}"]))
+            else:
+                descriptors.append(_entry_descriptor([f"data:{value}", f"name:{name}"]))
+        descriptor = _ENTRY_DESCRIPTOR_SEPARATOR.join(sorted(descriptors))
+        return hashlib.sha256(descriptor.encode("utf-8")).hexdigest()
+
+    return digest(tree)
+
+
+def index_files(index_path: Path) -> list[Path]:
+    """
+    Files written by FileHashIndex, they are never part of the hashed directory.
+    """
+    return [index_path, index_path.with_suffix(".tmp")]
+
+
+def hash_context_dir(
+    directory: Path,
+    ignore_patterns: list[str] | None = None,
+    index_path: Path | None = None,
+    files: list[str] | None = None,
+) -> str:
+    """
+    Get the sha256 checksum of the files of a directory not excluded by the .dockerignore
+    patterns, see tree_digest. Executable bits of the files are part of the hash
+    (see with_exec_bits), so it differs from `dirhash(directory, "sha256")` for contexts
+    with executable files.
+    When index_path is given, unchanged files are not read again, see FileHashIndex.
+
+    Args:
+        directory: Path to the directory to be checksummed
+        ignore_patterns: list of .dockerignore patterns
+        index_path: Path to the persistent file hash index
+        files: already listed files of the directory, see DockerIgnore.walk
+
+    Returns:
+        Checksum of the directory
+    """
+    relpaths = files if files is not None else DockerIgnore(ignore_patterns or []).walk(directory)
+    if index_path is None:
+        return tree_digest(
+            {
+                p: with_exec_bits(hash_file(directory / p), os.stat(directory / p).st_mode)
+                for p in relpaths
+            }
+        )
+
+    # the index itself may live inside the context dir (eg. notebook_ready_image)
+    own_files = {
+        os.path.relpath(p, directory).replace(os.sep, "/") for p in index_files(index_path)
+    }
+    relpaths = [p for p in relpaths if p not in own_files]
+
+    index = FileHashIndex(index_path)
+    file_hashes = {p: index.get_hash(p, directory / p) for p in relpaths}
+    index.prune(set(relpaths))
+    index.save()
+    logger.debug(
+        f"Hashed {directory}: {index.misses} files rehashed, {index.hits} reused from index"
+    )
+    return tree_digest(file_hashes)
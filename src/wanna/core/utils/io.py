@@ -1,28 +1,177 @@
+import gzip
 import os
 import tarfile
+import zipfile
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import IO, cast
 
-import igittigitt
+from wanna.core.utils.dockerignore import DockerIgnore
+from wanna.core.utils.hashing import hash_file
 
+# gzip members are compressed independently, bigger blocks compress slightly better
+GZIP_BLOCK_SIZE = 1024 * 1024
 
-def tar_docker_context(source_dir: Path, target_tar_file: Path, ignore_patterns: list[str] = []):
+# entries of reproducible zips get the earliest timestamp the zip format supports
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def tar_docker_context(
+    source_dir: Path,
+    target_tar_file: Path,
+    ignore_patterns: list[str] = [],
+    workers: int | None = None,
+    files: list[str] | None = None,
+):
     """
     Tars a directory recursively while optionally skipping files based on ignore patterns.
 
+    The archive is reproducible, identical inputs give byte-identical output: entries are sorted,
+    modification times and owners are normalized and the gzip headers carry no timestamp.
+    The compression runs on multiple cores, the result is a multi-member gzip file.
+
     :param source_dir: Path to the directory to be tarred.
     :param target_tar_file: Path to the output TAR file.
     :param ignore_patterns: List of file patterns to skip (e.g., ['*.pyc', '*.log']).
+    :param workers: Number of compression threads, defaults to the number of CPUs.
+    :param files: Already listed files of the context, see list_docker_context.
     """
 
-    parser = igittigitt.IgnoreParser()
-    for pattern in ignore_patterns:
-        parser.add_rule(pattern, source_dir)
-
     os.makedirs(target_tar_file.parent.absolute(), exist_ok=True)
-    with tarfile.open(target_tar_file, "w:gz") as the_tar_file:
-        for root, _, files in os.walk(source_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if parser.match(file_path):
-                    continue
-                the_tar_file.add(file_path, arcname=os.path.relpath(file_path, source_dir))
+    with open(target_tar_file, "wb") as f:
+        stream_docker_context(source_dir, f, ignore_patterns, workers, files)
+
+
+def stream_docker_context(
+    source_dir: Path,
+    fileobj: IO[bytes],
+    ignore_patterns: list[str] = [],
+    workers: int | None = None,
+    files: list[str] | None = None,
+):
+    """
+    Same as tar_docker_context, but writes the gzipped TAR as a stream into a file-like object.
+    The fileobj only needs to support write, so it can be a pipe or an upload stream.
+
+    :param source_dir: Path to the directory to be tarred.
+    :param fileobj: Writable binary file-like object for the output TAR.
+    :param ignore_patterns: List of file patterns to skip (e.g., ['*.pyc', '*.log']).
+    :param workers: Number of compression threads, defaults to the number of CPUs.
+    :param files: Already listed files of the context, see list_docker_context.
+    """
+    if files is None:
+        files = list_docker_context(source_dir, ignore_patterns)
+    with ParallelGzipWriter(fileobj, workers=workers) as gz:
+        with tarfile.open(fileobj=cast(IO[bytes], gz), mode="w|") as the_tar_file:
+            for relpath in files:
+                the_tar_file.add(
+                    os.path.join(source_dir, relpath),
+                    arcname=relpath,
+                    recursive=False,
+                    filter=_normalize_tarinfo,
+                )
+
+
+def list_docker_context(
+    source_dir: Path, ignore_patterns: list[str] = [], exclude: Iterable[Path] = ()
+) -> list[str]:
+    """
+    List files of the docker context that are not ignored, sorted by their relative path.
+    Ignored directories are pruned from the walk, files inside them are never visited.
+
+    :param source_dir: Path to the docker context directory.
+    :param ignore_patterns: List of .dockerignore patterns (e.g., ['*.pyc', '**/*.log']).
+    :param exclude: Files left out even if not ignored, e.g. the hash index of the context.
+    :return: posix paths relative to source_dir
+    """
+    files = DockerIgnore(ignore_patterns).walk(source_dir)
+    excluded = {os.path.relpath(p, source_dir).replace(os.sep, "/") for p in exclude}
+    return [f for f in files if f not in excluded] if excluded else files
+
+
+def write_reproducible_zip(target_zip_file: Path, files: dict[str, str]) -> str:
+    """
+    Zips files given by their content, identical files give a byte-identical archive:
+    entries are sorted by name, stored without compression and their timestamps
+    and permissions are fixed.
+
+    :param target_zip_file: Path to the output ZIP file.
+    :param files: content of the files by their name in the archive.
+    :return: sha256 hex digest of the archive
+    """
+    os.makedirs(target_zip_file.parent.absolute(), exist_ok=True)
+    with zipfile.ZipFile(target_zip_file, "w") as z:
+        for name in sorted(files):
+            info = zipfile.ZipInfo(name, date_time=ZIP_EPOCH)
+            info.external_attr = 0o644 << 16
+            z.writestr(info, files[name])
+    return hash_file(target_zip_file)
+
+
+def _normalize_tarinfo(tarinfo: tarfile.TarInfo) -> tarfile.TarInfo:
+    tarinfo.mtime = 0
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = ""
+    return tarinfo
+
+
+class ParallelGzipWriter:
+    """
+    Write-only file-like object compressing the written data into gzip on multiple threads.
+
+    The data is split into blocks of block_size, each block is compressed by zlib (which releases
+    the GIL) into a separate gzip member, and members are written to fileobj in order.
+    Concatenated members are a valid gzip stream (RFC 1952), in the way pigz or multi-frame
+    zstd parallelize compression. The output does not depend on the number of workers.
+    """
+
+    def __init__(
+        self,
+        fileobj: IO[bytes],
+        compresslevel: int = 6,
+        block_size: int = GZIP_BLOCK_SIZE,
+        workers: int | None = None,
+    ):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="wanna-gzip")
+        self._pending: deque[Future[bytes]] = deque()
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self) -> None:
+        try:
+            if self._buffer or not self._pending:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParallelGzipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(cancel_futures=True)
+
+    def _submit(self, block: bytes) -> None:
+        # bounded number of blocks in flight keeps the memory usage constant
+        while len(self._pending) >= 2 * self.workers:
+            self.fileobj.write(self._pending.popleft().result())
+        self._pending.append(
+            self._executor.submit(gzip.compress, block, self.compresslevel, mtime=0)
+        )
@@ -0,0 +1,59 @@
+from collections.abc import Iterable, Iterator
+from typing import Generic, Protocol, TypeVar
+
+
+class _Named(Protocol):
+    @property
+    def name(self) -> str: ...
+
+
+N = TypeVar("N", bound=_Named)
+
+
+class NameIndex(Generic[N]):
+    """
+    Models from wanna-ml config (images, jobs, pipelines, ...) indexed by their name.
+
+    The index is built once when the config is loaded, so looking models up by name
+    in loops does not scan the whole list and duplicate names are reported
+    before anything is built or deployed.
+
+    Args:
+        models: models with a `name` attribute, the order is preserved
+        kind: what the models are (docker image, job, ...) - used in error messages
+    """
+
+    def __init__(self, models: Iterable[N], kind: str):
+        self.kind = kind
+        self._models: dict[str, N] = {}
+        for model in models:
+            name = model.name.strip()
+            if name in self._models:
+                raise ValueError(
+                    f"Multiple {kind}s with name {name} found, please use unique names"
+                )
+            self._models[name] = model
+
+    def get(self, name: str) -> N:
+        """
+        Find the model with given name.
+
+        Args:
+            name: name to find
+
+        Returns:
+            the model
+        """
+        try:
+            return self._models[name.strip()]
+        except KeyError:
+            raise ValueError(f"No {self.kind} with name {name} found") from None
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.strip() in self._models
+
+    def __iter__(self) -> Iterator[N]:
+        return iter(self._models.values())
+
+    def __len__(self) -> int:
+        return len(self._models)
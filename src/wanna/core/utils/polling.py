@@ -0,0 +1,203 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from wanna.core.loggers.wanna_logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PollingTimeout(Exception):
+    pass
+
+
+@dataclass
+class PollTarget:
+    """
+    A resource awaited by Poller.
+
+    - `name` - name used in logs, eg. `log metric my-metric`
+    - `check` - returns a truthy value once the resource is ready
+    - `deadline` - time.monotonic() after which the resource is not awaited anymore
+    - `started_at` - time.monotonic() when the waiting started
+    - `result` - last value returned by check
+    - `error` - exception raised by check, the resource is not polled after that
+    - `done` - the check returned a truthy value
+    - `polls` - how many times the check was called
+    """
+
+    name: str
+    check: Callable[[], Any]
+    deadline: float | None
+    started_at: float
+    next_poll_at: float
+    delay: float
+    result: Any = None
+    error: BaseException | None = None
+    done: bool = False
+    polls: int = 0
+
+
+class Poller:
+    """
+    Waits for many resources with a single polling loop, no thread sleeps per resource.
+
+    Every resource is checked right after it is added, then the delay between its checks
+    grows exponentially from initial_delay up to max_delay. Each delay is randomized
+    by +-jitter, so resources created at the same time do not poll the API in lockstep.
+    The loop sleeps only until the next check or deadline of any resource.
+    Deadlines are absolute (time.monotonic), so a deadline computed when a resource
+    was submitted still holds when the waiting starts later or in another component.
+
+    Args:
+        initial_delay: seconds between the first and the second check of a resource
+        max_delay: maximal number of seconds between two checks of a resource
+        multiplier: growth of the delay between checks
+        jitter: relative randomization of the delays, 0 disables it
+        sleep: function used for waiting between checks
+        clock: monotonic clock, returns seconds
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 2.0,
+        max_delay: float = 30.0,
+        multiplier: float = 1.5,
+        jitter: float = 0.2,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.sleep = sleep
+        self.clock = clock
+        self.pending: list[PollTarget] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        name: str,
+        check: Callable[[], Any],
+        timeout: float | None = None,
+        deadline: float | None = None,
+    ) -> PollTarget:
+        """
+        Start waiting for a resource, safe to call from multiple threads.
+
+        Args:
+            name: name of the resource used in logs
+            check: returns a truthy value once the resource is ready
+            timeout: seconds to wait for the resource from now
+            deadline: time.monotonic() after which the resource is not awaited,
+                the earlier of timeout and deadline applies
+
+        Returns:
+            PollTarget, its result is set once the resource is ready
+        """
+        now = self.clock()
+        deadlines = [
+            d for d in (deadline, None if timeout is None else now + timeout) if d is not None
+        ]
+        target = PollTarget(
+            name=name,
+            check=check,
+            deadline=min(deadlines) if deadlines else None,
+            started_at=now,
+            next_poll_at=now,
+            delay=self.initial_delay,
+        )
+        with self._lock:
+            self.pending.append(target)
+        return target
+
+    def _poll(self, target: PollTarget) -> bool:
+        target.polls += 1
+        try:
+            target.result = target.check()
+        except Exception as e:  # pylint: disable=broad-except
+            target.error = e
+            logger.user_error(f"Failed waiting for {target.name}: {e}")
+            return True
+        now = self.clock()
+        elapsed = now - target.started_at
+        if target.result:
+            target.done = True
+            logger.user_info(f"Waited {elapsed:.1f}s for {target.name} ({target.polls} checks)")
+            return True
+        if target.deadline is not None and now >= target.deadline:
+            logger.user_error(f"Timed out after {elapsed:.1f}s waiting for {target.name}")
+            return True
+
+        delay = target.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+        target.next_poll_at = now + delay
+        if target.deadline is not None:
+            # the last check happens right at the deadline
+            target.next_poll_at = min(target.next_poll_at, target.deadline)
+        target.delay = min(target.delay * self.multiplier, self.max_delay)
+        return False
+
+    def wait(self) -> list[PollTarget]:
+        """
+        Wait until all resources are ready, timed out or their check failed.
+
+        Returns:
+            resources that timed out or whose check raised an exception
+        """
+        failed: list[PollTarget] = []
+        while True:
+            with self._lock:
+                targets = list(self.pending)
+            if not targets:
+                return failed
+
+            now = self.clock()
+            for target in targets:
+                if target.next_poll_at > now or not self._poll(target):
+                    continue
+                if not target.done:
+                    failed.append(target)
+                with self._lock:
+                    self.pending.remove(target)
+
+            with self._lock:
+                next_poll_at = min((t.next_poll_at for t in self.pending), default=None)
+            if next_poll_at is not None:
+                self.sleep(max(next_poll_at - self.clock(), 0))
+
+
+def wait_for(
+    name: str,
+    check: Callable[[], Any],
+    timeout: float | None = None,
+    deadline: float | None = None,
+    **poller_kwargs: Any,
+) -> Any:
+    """
+    Wait for a single resource, see Poller.
+
+    Args:
+        name: name of the resource used in logs
+        check: returns a truthy value once the resource is ready
+        timeout: seconds to wait for the resource
+        deadline: time.monotonic() after which the resource is not awaited
+        poller_kwargs: backoff settings of the Poller
+
+    Returns:
+        the truthy value returned by check
+
+    Raises:
+        PollingTimeout: the resource is not ready in time
+    """
+    poller = Poller(**poller_kwargs)
+    target = poller.add(name, check, timeout=timeout, deadline=deadline)
+    poller.wait()
+    if target.error is not None:
+        raise target.error
+    if not target.done:
+        raise PollingTimeout(f"Timed out waiting for {name}")
+    return target.result
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+import subprocess
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import requests
+from lazyimport import Import
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:  # pragma: no cover
+    import google.auth.transport.requests as google_auth_transport_requests
+    from google import auth as google_auth
+else:
+    google_auth = Import("google.auth")
+    google_auth_transport_requests = Import("google.auth.transport.requests")
+
+from wanna.core.loggers.wanna_logger import get_logger
+from wanna.core.utils.credentials import get_credentials
+
+logger = get_logger(__name__)
+
+DOCKER_HUB_REGISTRY = "registry-1.docker.io"
+# key of Docker Hub in ~/.docker/config.json
+DOCKER_HUB_CONFIG_KEY = "https://index.docker.io/v1/"
+
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+]
+
+Credentials = tuple[str, str] | None
+
+
+class RegistryException(Exception):
+    pass
+
+
+def parse_image_reference(image: str) -> tuple[str, str, str]:
+    """
+    Split a docker image reference into the registry host, the repository and tag or digest.
+
+    Args:
+        image: e.g. europe-west1-docker.pkg.dev/project/repository/image:tag
+
+    Returns:
+        tuple of registry, repository and reference
+    """
+    if "@" in image:
+        name, reference = image.split("@", 1)
+    else:
+        last = image.rsplit("/", 1)[-1]
+        name, reference = (image.rsplit(":", 1)) if ":" in last else (image, "latest")
+
+    first, _, rest = name.partition("/")
+    if rest and ("." in first or ":" in first or first == "localhost"):
+        return first, rest, reference
+    repository = name if "/" in name else f"library/{name}"
+    return DOCKER_HUB_REGISTRY, repository, reference
+
+
+def _credential_helper(helper: str, server: str) -> Credentials:
+    try:
+        result = subprocess.run(
+            [f"docker-credential-{helper}", "get"],
+            input=server,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"Docker credential helper {helper} failed for {server}: {e}")
+        return None
+    if result.returncode != 0:
+        # eg. "credentials not found in native keychain"
+        return None
+    credentials = json.loads(result.stdout)
+    return credentials["Username"], credentials["Secret"]
+
+
+def docker_config_credentials(registry: str) -> Credentials:
+    """
+    Credentials of a registry from the docker config (`$DOCKER_CONFIG/config.json`
+    or `~/.docker/config.json`), the same ones `docker login` stored for the docker CLI.
+    Registry specific credential helpers (credHelpers) take precedence over the stored
+    auths and the default credential store (credsStore).
+
+    Args:
+        registry: registry host, e.g. my-company.jfrog.io
+
+    Returns:
+        (username, password) or None if docker has no credentials for the registry
+    """
+    config_dir = os.getenv("DOCKER_CONFIG") or os.path.join(os.path.expanduser("~"), ".docker")
+    try:
+        with open(os.path.join(config_dir, "config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    servers = (
+        [DOCKER_HUB_CONFIG_KEY, "docker.io", "index.docker.io"]
+        if registry == DOCKER_HUB_REGISTRY
+        else [registry, f"https://{registry}", f"http://{registry}"]
+    )
+    for server in servers:
+        if helper := config.get("credHelpers", {}).get(server):
+            return _credential_helper(helper, server)
+    for server in servers:
+        auth = config.get("auths", {}).get(server)
+        if auth is None:
+            continue
+        if auth.get("auth"):
+            username, _, password = base64.b64decode(auth["auth"]).decode().partition(":")
+            return username, password
+        if auth.get("username"):
+            return auth["username"], auth.get("password", "")
+        if store := config.get("credsStore"):
+            # docker login with a credential store leaves an empty entry in auths
+            return _credential_helper(store, server)
+    if store := config.get("credsStore"):
+        return _credential_helper(store, servers[0])
+    return None
+
+
+def is_gcp_registry(registry: str) -> bool:
+    return registry.endswith("docker.pkg.dev") or registry.endswith("gcr.io")
+
+
+def registry_credentials(registry: str) -> Credentials:
+    """
+    Credentials of a registry, GCP credentials for GCP Artifact Registry and Container Registry,
+    the docker config and its credential helpers for the others (e.g. Artifactory mirrors).
+    """
+    if is_gcp_registry(registry):
+        return gcp_registry_credentials(registry)
+    return docker_config_credentials(registry)
+
+
+def gcp_registry_credentials(registry: str) -> Credentials:
+    """
+    Credentials for GCP Artifact Registry and Container Registry, None for other registries.
+    """
+    if not is_gcp_registry(registry):
+        return None
+    credentials = get_credentials()
+    if credentials is None:
+        credentials, _ = google_auth.default(
+            scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+    if not credentials.valid:
+        credentials.refresh(google_auth_transport_requests.Request())
+    return "oauth2accesstoken", credentials.token
+
+
+class RegistryClient:
+    """
+    Client of the Docker Registry HTTP API V2 checking which image tags exist and retagging
+    images directly in the registry.
+
+    All requests share one pooled HTTP session, the bearer tokens obtained from the registry
+    auth service are shared by all threads and the results are cached for the lifetime
+    of the client, so every tag is checked at most once per run.
+
+    Args:
+        credentials: function returning (username, password) for a registry host or None
+            to request anonymous tokens, defaults to registry_credentials
+        max_workers: how many tags are checked concurrently
+        timeout: seconds to wait for a registry response
+    """
+
+    def __init__(
+        self,
+        credentials: Callable[[str], Credentials] = registry_credentials,
+        max_workers: int = 8,
+        timeout: float = 30,
+    ):
+        self.credentials = credentials
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Authorization headers (bearer tokens or basic auth) by registry, repository and actions
+        self._tokens: dict[tuple[str, str, str], str] = {}
+        self._auth_locks: dict[tuple[str, str, str], threading.Lock] = {}
+        self._exists: dict[str, bool] = {}
+        self._digests: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _base_url(registry: str) -> str:
+        insecure = registry.split(":")[0] in ("localhost", "127.0.0.1")
+        return f"{'http' if insecure else 'https'}://{registry}/v2"
+
+    def _token(self, scope: tuple[str, str, str]) -> str | None:
+        with self._lock:
+            return self._tokens.get(scope)
+
+    def _authenticate(
+        self, scope: tuple[str, str, str], challenge: str, rejected_token: str | None
+    ) -> None:
+        registry, repository, actions = scope
+        with self._lock:
+            auth_lock = self._auth_locks.setdefault(scope, threading.Lock())
+
+        # only one thread requests a new token, the others wait for it and reuse it
+        with auth_lock:
+            if self._token(scope) != rejected_token:
+                return
+            if challenge.lower().startswith("basic"):
+                # registries without a token service (e.g. some Artifactory setups)
+                credentials = self.credentials(registry)
+                if credentials is None:
+                    raise RegistryException(
+                        f"No credentials for {registry}, run docker login {registry}"
+                    )
+                basic = base64.b64encode(":".join(credentials).encode()).decode()
+                with self._lock:
+                    self._tokens[scope] = f"Basic {basic}"
+                return
+            if not challenge.lower().startswith("bearer "):
+                raise RegistryException(f"Unsupported authentication of {registry}: {challenge}")
+            params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+            realm = params.pop("realm")
+            params["scope"] = f"repository:{repository}:{actions}"
+            response = self.session.get(
+                realm, params=params, auth=self.credentials(registry), timeout=self.timeout
+            )
+            if response.status_code != 200:
+                raise RegistryException(
+                    f"Failed to authenticate to {registry}: {response.status_code} {response.text}"
+                )
+            body = response.json()
+            with self._lock:
+                self._tokens[scope] = f"Bearer {body.get('token') or body['access_token']}"
+
+    def _manifest_request(
+        self, method: str, image: str, actions: str = "pull", **kwargs
+    ) -> requests.Response:
+        registry, repository, reference = parse_image_reference(image)
+        url = f"{self._base_url(registry)}/{repository}/manifests/{reference}"
+        scope = (registry, repository, actions)
+        headers = kwargs.pop("headers", {})
+
+        for attempt in range(2):
+            token = self._token(scope)
+            auth = {"Authorization": token} if token else {}
+            response = self.session.request(
+                method, url, headers={**headers, **auth}, timeout=self.timeout, **kwargs
+            )
+            if response.status_code == 401 and attempt == 0:
+                challenge = response.headers.get("WWW-Authenticate", "")
+                self._authenticate(scope, challenge, token)
+                continue
+            return response
+        return response
+
+    def _manifest_exists(self, image: str) -> bool:
+        response = self._manifest_request(
+            "HEAD", image, headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)}
+        )
+        if response.status_code == 200:
+            return True
+        if response.status_code == 404:
+            return False
+        raise RegistryException(f"Failed to check {image} in registry: {response.status_code}")
+
+    def digest(self, image: str) -> str:
+        """
+        Get the digest of the manifest an image tag points to, results are cached.
+
+        Args:
+            image: docker image tag or reference with a digest, e.g. python:3.12
+
+        Returns:
+            digest of the manifest, e.g. sha256:...
+        """
+        reference = parse_image_reference(image)[2]
+        if reference.startswith("sha256:"):
+            return reference
+        with self._lock:
+            if image in self._digests:
+                return self._digests[image]
+
+        response = self._manifest_request(
+            "HEAD", image, headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)}
+        )
+        digest = response.headers.get("Docker-Content-Digest")
+        if response.status_code != 200 or not digest:
+            raise RegistryException(f"Failed to get digest of {image}: {response.status_code}")
+        with self._lock:
+            self._digests[image] = digest
+        return digest
+
+    def retag(self, source: str, targets: list[str]) -> None:
+        """
+        Point the target tags to the manifest of the source tag without pulling or pushing
+        any layers. All tags must be in the same repository.
+
+        Args:
+            source: existing docker image tag
+            targets: docker image tags to create or overwrite
+        """
+        response = self._manifest_request(
+            "GET", source, headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)}
+        )
+        if response.status_code != 200:
+            raise RegistryException(f"Failed to get manifest of {source}: {response.status_code}")
+        manifest, media_type = response.content, response.headers["Content-Type"]
+
+        for target in targets:
+            if parse_image_reference(target)[:2] != parse_image_reference(source)[:2]:
+                raise RegistryException(f"Can not retag {source} to other repository {target}")
+            response = self._manifest_request(
+                "PUT",
+                target,
+                actions="pull,push",
+                data=manifest,
+                headers={"Content-Type": media_type},
+            )
+            if response.status_code not in (200, 201):
+                raise RegistryException(
+                    f"Failed to tag {source} as {target}: {response.status_code} {response.text}"
+                )
+            self.remember(target)
+
+    def tag_exists(self, image: str) -> bool:
+        """
+        Check if the image tag exists in the registry.
+
+        Args:
+            image: the docker image tag, e.g. europe-west1-docker.pkg.dev/project/repository/image:tag
+
+        Returns:
+            True if the tag exists
+        """
+        return self.tags_exist([image])[image]
+
+    def tags_exist(self, images: list[str]) -> dict[str, bool]:
+        """
+        Check concurrently which image tags exist in the registry.
+
+        Args:
+            images: docker image tags
+
+        Returns:
+            mapping of every image tag to True if it exists
+        """
+        with self._lock:
+            unknown = list(dict.fromkeys(i for i in images if i not in self._exists))
+
+        if unknown:
+            with ThreadPoolExecutor(
+                min(self.max_workers, len(unknown)), thread_name_prefix="wanna-registry"
+            ) as executor:
+                results = dict(zip(unknown, executor.map(self._manifest_exists, unknown)))
+            with self._lock:
+                self._exists.update(results)
+
+        with self._lock:
+            return {image: self._exists[image] for image in images}
+
+    def remember(self, image: str, exists: bool = True) -> None:
+        """
+        Update the cached state of an image tag, e.g. after it was pushed.
+        """
+        with self._lock:
+            self._exists[image] = exists
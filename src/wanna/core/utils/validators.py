@@ -10,21 +10,19 @@ from pydantic_core.core_schema import ValidationInfo
 
 if TYPE_CHECKING:  # pragma: no cover
     import google.cloud.notebooks_v1.types.instance as gcloud_notebooks_v1_types_instance
-    import google.cloud.storage as gcloud_storage
     from google.api_core import exceptions as gapi_core_exceptions
 else:
     gapi_core_exceptions = Import("google.api_core.exceptions")
     gcloud_notebooks_v1_types_instance = Import("google.cloud.notebooks_v1.types.instance")
-    gcloud_storage = Import("google.cloud.storage")
 
 from wanna.core.models.docker import DockerModel
-from wanna.core.utils.credentials import get_credentials
 from wanna.core.utils.env import should_validate
 from wanna.core.utils.gcp import (
     get_available_compute_machine_types,
     get_available_regions,
     get_available_zones,
     get_network_info,
+    storage_client,
 )
 
 
@@ -81,7 +79,7 @@ def validate_network_name(network_name: str | None):
 def validate_bucket_name(bucket_name):
     if should_validate:
         try:
-            _ = gcloud_storage.Client(credentials=get_credentials()).get_bucket(bucket_name)
+            _ = storage_client().get_bucket(bucket_name)
         except gapi_core_exceptions.NotFound:
             raise ValueError(f"Bucket with name {bucket_name} does not exist")
         except gapi_core_exceptions.Forbidden:
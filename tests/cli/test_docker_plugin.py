@@ -0,0 +1,35 @@
+import os
+import unittest
+from pathlib import Path
+
+from mock.mock import patch
+from typer.testing import CliRunner
+
+from wanna.cli import __main__
+
+
+class TestDockerPlugin(unittest.TestCase):
+    runner = CliRunner()
+    parent = Path(os.path.dirname(os.path.abspath(__file__))).parent.parent
+    sample_job_dir = parent / "samples" / "custom_job"
+
+    @patch("wanna.core.services.docker.delete_stale_context_archives")
+    def test_docker_gc_cli(self, delete_mock):
+        result = self.runner.invoke(
+            __main__.app,
+            [
+                "docker",
+                "gc",
+                "--file",
+                str(self.sample_job_dir / "wanna.yaml"),
+                "--profile",
+                "default",
+                "--max-age-days",
+                "7",
+                "--dry-run",
+            ],
+        )
+        self.assertEqual(0, result.exit_code)
+        delete_mock.assert_called_once_with(
+            bucket_name="your-staging-bucket-name", max_age_days=7, dry_run=True
+        )
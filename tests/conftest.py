@@ -50,20 +50,17 @@ def mock_upload_file():
 
 # Credentials patching
 @pytest.fixture(scope="session", autouse=True)
-def mock_validators_get_credentials():
+def mock_gcp_get_credentials():
     with mock.patch(
-        "wanna.core.utils.validators.get_credentials",
+        "wanna.core.utils.gcp.get_credentials",
         mocks.mock_get_credentials,
     ) as _fixture:
         yield _fixture
 
 
 @pytest.fixture(scope="session", autouse=True)
-def mock_gcp_get_credentials():
-    with mock.patch(
-        "wanna.core.utils.gcp.get_credentials",
-        mocks.mock_get_credentials,
-    ) as _fixture:
+def mock_default_credentials():
+    with mock.patch("google.auth.default", mocks.mock_default_credentials) as _fixture:
         yield _fixture
 
 
@@ -0,0 +1,113 @@
+import json
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+from mock import MagicMock
+
+from wanna.core.deployment.artifacts_push import ArtifactsPushException, ArtifactsPushMixin
+from wanna.core.deployment.models import (
+    ContainerArtifact,
+    JsonArtifact,
+    PathArtifact,
+    PushTask,
+)
+
+
+class RecordingPusher(ArtifactsPushMixin):
+    def __init__(self, fail_on: str | None = None):
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+        self.events: list[str] = []
+
+    def upload_file(self, source: str, destination: str, buffer_size: int | None = None) -> bool:
+        if destination == self.fail_on:
+            raise OSError("upload failed")
+        with self.lock:
+            self.events.append(destination)
+        return True
+
+    def copy(self, source: str, destination: str) -> bool:
+        with self.lock:
+            self.events.append(f"{source} -> {destination}")
+        return True
+
+    def write(self, destination: Path | str, body: str) -> bool:
+        json.loads(body)
+        with self.lock:
+            self.events.append(str(destination))
+        return True
+
+
+class TestArtifactsPush(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        spec = Path(self.tmp_dir.name) / "spec.json"
+        spec.write_text("{}")
+        self.push_tasks = [
+            PushTask(
+                container_artifacts=[ContainerArtifact(name="image", tags=[f"image:{version}"])],
+                manifest_artifacts=[
+                    PathArtifact(
+                        name="spec", source=str(spec), destination=f"gs://b/{version}/spec"
+                    )
+                ],
+                json_artifacts=[
+                    JsonArtifact(name="manifest", json_body={}, destination=f"gs://b/{version}/m")
+                ],
+            )
+            for version in ["v1", "latest"]
+        ]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_push_artifacts(self):
+        pusher = RecordingPusher()
+        docker_pusher = MagicMock(side_effect=lambda *_, **__: pusher.events.append("containers"))
+
+        result = pusher.push_artifacts(docker_pusher, self.push_tasks, max_workers=4)
+
+        docker_pusher.assert_called_once_with([["image:v1"], ["image:latest"]], max_workers=None)
+        self.assertEqual(
+            result,
+            [
+                (t.container_artifacts, t.manifest_artifacts, t.json_artifacts)
+                for t in self.push_tasks
+            ],
+        )
+        # manifests are written only after all specs and containers are pushed
+        self.assertEqual(set(pusher.events[-2:]), {"gs://b/v1/m", "gs://b/latest/m"})
+        self.assertEqual(len(pusher.events), 5)
+
+    def test_push_artifacts_aggregates_errors(self):
+        pusher = RecordingPusher(fail_on="gs://b/v1/spec")
+
+        with pytest.raises(ArtifactsPushException, match="Failed to push 1 artifacts"):
+            pusher.push_artifacts(MagicMock(), self.push_tasks)
+
+        # the other task is still pushed, the manifest of the failed one is not
+        self.assertEqual(set(pusher.events), {"gs://b/latest/spec", "gs://b/latest/m"})
+
+    def test_push_artifacts_skips_manifests_when_containers_fail(self):
+        pusher = RecordingPusher()
+        docker_pusher = MagicMock(side_effect=RuntimeError("push failed"))
+
+        with pytest.raises(ArtifactsPushException, match="containers: push failed"):
+            pusher.push_artifacts(docker_pusher, self.push_tasks)
+
+        self.assertEqual(set(pusher.events), {"gs://b/v1/spec", "gs://b/latest/spec"})
+
+    def test_push_artifacts_copies_aliases_after_upload(self):
+        pusher = RecordingPusher()
+        push_task = self.push_tasks[0]
+        push_task.manifest_artifacts[0].aliases = ["gs://b/latest/spec"]
+
+        pusher.push_artifacts(MagicMock(), [push_task])
+
+        self.assertEqual(
+            pusher.events,
+            ["gs://b/v1/spec", "gs://b/v1/spec -> gs://b/latest/spec", "gs://b/v1/m"],
+        )
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+import pytest
+
+from wanna.core.deployment.deploy_plan import DeployException, DeployPlan
+
+
+class TestDeployPlan(unittest.TestCase):
+    def test_dependencies_get_results_in_order(self):
+        plan = DeployPlan()
+        order: list[str] = []
+        plan.add("channel", lambda _: order.append("channel") or "channel-name")
+        plan.add(
+            "function",
+            lambda results: order.append("function") or f"function-{results['channel']}",
+            depends_on=["channel"],
+        )
+
+        results = plan.execute(max_workers=2)
+
+        self.assertEqual(order, ["channel", "function"])
+        self.assertEqual(results["function"], "function-channel-name")
+
+    def test_independent_steps_run_concurrently(self):
+        plan = DeployPlan()
+        barrier = threading.Barrier(3, timeout=5)
+        for key in ["a", "b", "c"]:
+            plan.add(key, lambda _: barrier.wait())
+
+        start = time.perf_counter()
+        plan.execute(max_workers=3)
+
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_same_key_is_deployed_once(self):
+        plan = DeployPlan()
+        calls: list[str] = []
+        plan.add("channel", lambda _: calls.append("first"))
+        plan.add("channel", lambda _: calls.append("second"))
+
+        plan.execute()
+
+        self.assertEqual(calls, ["first"])
+
+    def test_failures_skip_dependents_only(self):
+        plan = DeployPlan()
+        deployed: list[str] = []
+
+        def fail(_):
+            raise RuntimeError("quota exceeded")
+
+        plan.add("metric", fail)
+        plan.add("alert", lambda _: deployed.append("alert"), depends_on=["metric"])
+        plan.add("function", lambda _: deployed.append("function"))
+
+        with pytest.raises(DeployException, match="metric: quota exceeded") as e:
+            plan.execute()
+
+        self.assertIn("alert: skipped, metric failed", str(e.value))
+        self.assertEqual(deployed, ["function"])
+
+    def test_cyclic_dependencies(self):
+        plan = DeployPlan()
+        plan.add("a", lambda _: None, depends_on=["b"])
+        plan.add("b", lambda _: None, depends_on=["a"])
+
+        with pytest.raises(ValueError, match="cyclic"):
+            plan.execute()
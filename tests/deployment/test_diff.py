@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+
+from google.cloud.monitoring_v3 import AlertPolicy
+
+from wanna.core.deployment.diff import changed_fields, log_upsert, proto_to_dict
+
+
+class TestDiff(unittest.TestCase):
+    def test_proto_to_dict_skips_default_values(self):
+        policy = AlertPolicy(display_name="policy", user_labels={"a": "b"})
+
+        assert proto_to_dict(policy) == {"display_name": "policy", "user_labels": {"a": "b"}}
+
+    def test_changed_fields_ignores_fields_filled_in_by_gcp(self):
+        desired = {"display_name": "x", "conditions": [{"display_name": "c"}]}
+        existing = {
+            "name": "projects/p/alertPolicies/1",
+            "display_name": "x",
+            "conditions": [
+                {"name": "projects/p/alertPolicies/1/conditions/2", "display_name": "c"}
+            ],
+            "creation_record": {"mutated_by": "someone"},
+        }
+
+        assert changed_fields(desired, existing, fields=["display_name", "conditions"]) == []
+
+    def test_changed_fields_detects_changes(self):
+        desired = {"display_name": "x", "enabled": True, "conditions": [{"display_name": "c"}]}
+        existing = {"display_name": "y", "conditions": [{"display_name": "c"}, {}]}
+
+        assert changed_fields(
+            desired, existing, fields=["display_name", "enabled", "conditions", "combiner"]
+        ) == ["display_name", "enabled", "conditions"]
+
+    def test_changed_fields_exact_fields_detect_removed_keys(self):
+        desired = {"labels": {"a": "1"}}
+        existing = {"labels": {"a": "1", "b": "2"}}
+
+        assert changed_fields(desired, existing, fields=["labels"]) == []
+        assert changed_fields(desired, existing, fields=["labels"], exact_fields=["labels"]) == [
+            "labels"
+        ]
+        assert changed_fields({}, {"labels": {}}, fields=["labels"], exact_fields=["labels"]) == []
+
+    @patch("wanna.core.deployment.diff.logger")
+    def test_log_upsert(self, mock_logger):
+        log_upsert("alert policy", "policy", "update", ["labels", "enabled"])
+        log_upsert("alert policy", "policy", "unchanged")
+
+        mock_logger.user_info.assert_any_call("~ update alert policy policy (labels, enabled)")
+        mock_logger.user_info.assert_any_call("= unchanged alert policy policy")
@@ -3,8 +3,13 @@ import unittest
 from pathlib import Path
 from typing import Any
 
+from google.api_core.exceptions import NotFound
 from google.cloud import logging, scheduler_v1
-from google.cloud.functions_v1 import CloudFunctionsServiceClient
+from google.cloud.functions_v1 import (
+    CloudFunction,
+    CloudFunctionsServiceClient,
+    CloudFunctionStatus,
+)
 from google.cloud.monitoring_v3 import (
     AlertPolicyServiceClient,
     NotificationChannel,
@@ -12,15 +17,17 @@ from google.cloud.monitoring_v3 import (
 )
 from google.cloud.pubsub_v1 import PublisherClient
 from google.protobuf.duration_pb2 import Duration  # pylint: disable=no-name-in-module
-from mock import MagicMock
+from mock import ANY, MagicMock, patch
 
 from wanna.core.deployment.models import (
     CloudFunctionResource,
     CloudSchedulerResource,
     NotificationChannelResource,
+    PipelineResource,
 )
 from wanna.core.deployment.vertex_connector import VertexConnector
 from wanna.core.models.cloud_scheduler import CloudSchedulerModel
+from wanna.core.utils.hashing import hash_file
 
 
 class TestGCPConnector(unittest.TestCase):
@@ -33,7 +40,10 @@ class TestGCPConnector(unittest.TestCase):
     build_dir = parent / "build"
     version = "test"
     env = "test"
-    connector = VertexConnector[Any]()
+
+    def setUp(self) -> None:
+        # upserts without MonitoringInventories list the existing monitoring resources again
+        self.connector = VertexConnector[Any]()
 
     def test_upsert_pubsub_notification_channel(self):
         notification_channel_resource = NotificationChannelResource(
@@ -103,7 +113,7 @@ class TestGCPConnector(unittest.TestCase):
         )
 
     def test_upsert_cloud_function(self):
-        resource_root = "gs://wanna-ml/deployment/dev"
+        resource_root = "gs://wanna-ml/wanna-pipelines/test-function"
         resource = CloudFunctionResource(
             name="test-function",
             build_dir=self.build_dir,
@@ -123,7 +133,7 @@ class TestGCPConnector(unittest.TestCase):
         expected_function = {
             "name": expected_function_name,
             "description": "wanna test-function function for test pipeline",
-            "source_archive_url": f"{resource_root}/functions/package.zip",
+            "source_archive_url": None,
             "entry_point": "process_request",
             "runtime": "python312",
             "https_trigger": {
@@ -142,7 +152,7 @@ class TestGCPConnector(unittest.TestCase):
         AlertPolicyServiceClient.create_alert_policy = MagicMock()
         logging.Client.metrics_api.metric_create = MagicMock()
         logging.Client.metrics_api.metric_get = MagicMock()
-        CloudFunctionsServiceClient.get_function = MagicMock()
+        CloudFunctionsServiceClient.get_function = MagicMock(return_value=CloudFunction())
         CloudFunctionsServiceClient.update_function = MagicMock()
 
         function_path, function_url = self.connector.upsert_cloud_function(
@@ -158,6 +168,12 @@ class TestGCPConnector(unittest.TestCase):
             "https://europe-west-1-test-gcp-connector.cloudfunctions.net/test-function-test",
         )
 
+        # the package is stored under its content hash
+        package_hash = hash_file(self.build_dir / "functions" / "package.zip")
+        expected_function["source_archive_url"] = (
+            f"{resource_root}/functions/package-{package_hash}.zip"
+        )
+
         # Check cloudfunctions sdk methods were called with expected function params
         CloudFunctionsServiceClient.get_function.assert_called_with(
             {
@@ -171,6 +187,100 @@ class TestGCPConnector(unittest.TestCase):
         AlertPolicyServiceClient.list_alert_policies.assert_called()
         AlertPolicyServiceClient.create_alert_policy.assert_called()
 
+    def test_upsert_function_skips_unchanged_function(self):
+        parent = "projects/test-gcp-connector/locations/europe-west-1"
+        package = self.build_dir / "functions" / "package.zip"
+        function = {
+            "name": f"{parent}/functions/test-function-test",
+            "source_archive_url": "gs://wanna-ml/functions/package-abc.zip",
+            "entry_point": "process_request",
+            "labels": {"wanna_project": "test"},
+        }
+        CloudFunctionsServiceClient.get_function = MagicMock(
+            return_value=CloudFunction(function, status=CloudFunctionStatus.ACTIVE)
+        )
+        CloudFunctionsServiceClient.update_function = MagicMock()
+        CloudFunctionsServiceClient.create_function = MagicMock()
+
+        with patch.object(VertexConnector, "upload_file") as upload_file:
+            self.connector.upsert_function(parent, function, package)
+            upload_file.assert_not_called()
+
+            # a new source is uploaded and deployed
+            changed = {**function, "source_archive_url": "gs://wanna-ml/functions/package-def.zip"}
+            self.connector.upsert_function(parent, changed, package)
+            upload_file.assert_called_once_with(str(package), changed["source_archive_url"])
+
+        CloudFunctionsServiceClient.create_function.assert_not_called()
+        CloudFunctionsServiceClient.update_function.assert_called_once_with({"function": changed})
+
+    @patch("wanna.core.deployment.vertex_scheduling.wait_for")
+    def test_upsert_function_polls_the_deployment(self, mock_wait_for):
+        parent = "projects/test-gcp-connector/locations/europe-west-1"
+        function = {
+            "name": f"{parent}/functions/test-function-test",
+            "source_archive_url": "gs://wanna-ml/functions/package-abc.zip",
+        }
+        operation = MagicMock()
+        operation.result.side_effect = RuntimeError("build failed")
+        CloudFunctionsServiceClient.get_function = MagicMock(side_effect=NotFound("missing"))
+        CloudFunctionsServiceClient.create_function = MagicMock(return_value=operation)
+
+        with (
+            patch.object(VertexConnector, "upload_file"),
+            self.assertRaisesRegex(RuntimeError, "build failed"),
+        ):
+            self.connector.upsert_function(parent, function, Path("package.zip"))
+
+        self.assertIs(mock_wait_for.call_args.args[1], operation.done)
+        operation.result.assert_called_once_with()
+
+    def test_upsert_sla_function_creates_or_updates_function(self):
+        resource = PipelineResource(
+            name="pipeline test-pipeline",
+            pipeline_name="test-pipeline",
+            pipeline_bucket="gs://wanna-ml",
+            pipeline_root="gs://wanna-ml/pipeline-root",
+            pipeline_version=self.version,
+            json_spec_path="pipeline-spec.json",
+            labels={"wanna_sla_hours": "1_5"},
+            enable_caching=None,
+            schedule=None,
+            docker_refs=[],
+            compile_env_params={},
+            **self.common_resource_fields,
+        )
+        CloudFunctionsServiceClient.get_function = MagicMock(side_effect=NotFound("missing"))
+        CloudFunctionsServiceClient.create_function = MagicMock()
+        CloudFunctionsServiceClient.update_function = MagicMock()
+
+        with patch.object(VertexConnector, "upload_file") as upload_file:
+            self.connector.upsert_sla_function(resource, self.version, self.env)
+
+            function = CloudFunctionsServiceClient.create_function.call_args.args[0]["function"]
+            # the package path does not depend on the version
+            self.assertRegex(
+                function["source_archive_url"],
+                r"^gs://wanna-ml/wanna-pipelines/test-pipeline/functions/sla-[0-9a-f]+\.zip$",
+            )
+            upload_file.assert_called_once_with(ANY, function["source_archive_url"])
+            CloudFunctionsServiceClient.update_function.assert_not_called()
+
+            # a function deployed from an older source is updated instead of failing
+            CloudFunctionsServiceClient.get_function = MagicMock(
+                return_value=CloudFunction(
+                    {
+                        **function,
+                        "source_archive_url": "gs://wanna-ml/wanna-pipelines/test-pipeline/functions/sla-old.zip",
+                    },
+                    status=CloudFunctionStatus.ACTIVE,
+                )
+            )
+            self.connector.upsert_sla_function(resource, self.version, self.env)
+
+        CloudFunctionsServiceClient.create_function.assert_called_once()
+        CloudFunctionsServiceClient.update_function.assert_called_once_with({"function": function})
+
     def test_upsert_cloud_scheduler(self):
         function_refs = (
             "projects/test-gcp-connector/locations/europe-west-1/functions/test-function-test",
@@ -190,7 +300,7 @@ class TestGCPConnector(unittest.TestCase):
         AlertPolicyServiceClient.create_alert_policy = MagicMock()
         logging.Client.metrics_api.metric_create = MagicMock()
         logging.Client.metrics_api.metric_get = MagicMock()
-        scheduler_v1.CloudSchedulerClient.get_job = MagicMock()
+        scheduler_v1.CloudSchedulerClient.get_job = MagicMock(return_value=scheduler_v1.Job())
         scheduler_v1.CloudSchedulerClient.update_job = MagicMock()
         NotificationChannelServiceClient.list_notification_channels = MagicMock(return_value=[])
         NotificationChannelServiceClient.create_notification_channel = MagicMock()
@@ -0,0 +1,111 @@
+import os
+import tracemalloc
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from mock import MagicMock, patch
+
+from wanna.core.deployment.io import IOMixin, MiB
+from wanna.core.utils.hashing import crc32c_bytes
+
+
+class TestIO(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    @patch("wanna.core.deployment.io.storage_client")
+    @patch("wanna.core.deployment.io.gcloud_storage")
+    def test_copy_gcs_objects_server_side(self, storage_mock, _):
+        source_blob = MagicMock(crc32c="source")
+        remote = MagicMock(crc32c="old", generation=7)
+        destination_blob = storage_mock.Blob.from_string.return_value
+        destination_blob.rewrite.side_effect = [("token", 1, 2), (None, 2, 2)]
+        io = IOMixin()
+        io.upload_file = MagicMock()
+        io._get_blob = MagicMock(side_effect=[source_blob, remote])
+
+        self.assertTrue(io.copy("gs://b/v1/spec", "gs://b/latest/spec"))
+
+        destination_blob.rewrite.assert_called_with(
+            source_blob, token="token", if_generation_match=7
+        )
+        self.assertEqual(destination_blob.rewrite.call_count, 2)
+        io.upload_file.assert_not_called()
+
+    @patch("wanna.core.deployment.io.gcloud_storage")
+    def test_copy_skips_identical_objects(self, storage_mock):
+        io = IOMixin()
+        io._get_blob = MagicMock(return_value=MagicMock(crc32c="same"))
+
+        self.assertFalse(io.copy("gs://b/v1/spec", "gs://b/latest/spec"))
+
+        storage_mock.Blob.from_string.return_value.rewrite.assert_not_called()
+
+    def test_write_skips_identical_objects(self):
+        io = IOMixin()
+        io._get_blob = MagicMock(return_value=MagicMock(crc32c=crc32c_bytes(b"{}")))
+        io._open = MagicMock()
+
+        self.assertFalse(io.write("gs://b/v1/manifest.json", "{}"))
+
+        io._open.assert_not_called()
+
+    def test_write_with_generation_precondition(self):
+        io = IOMixin()
+        io._get_blob = MagicMock(return_value=None)
+        io._open = MagicMock()
+
+        self.assertTrue(io.write("gs://b/v1/manifest.json", "{}"))
+
+        io._open.assert_called_once_with(
+            "gs://b/v1/manifest.json",
+            "w",
+            gcs_params={"blob_open_kwargs": {"if_generation_match": 0}},
+        )
+        io._open.return_value.__enter__.return_value.write.assert_called_once_with("{}")
+
+    def test_copy_local_files(self):
+        io = IOMixin()
+        io.upload_file = MagicMock()
+
+        io.copy("build/v1/spec", "build/latest/spec")
+
+        io.upload_file.assert_called_once_with("build/v1/spec", "build/latest/spec")
+
+    def test_stream_file_is_memory_bounded(self):
+        io = IOMixin()
+        source = Path(self.tmp_dir.name) / "model.tar.gz"
+        destination = Path(self.tmp_dir.name) / "uploaded.tar.gz"
+        with open(source, "wb") as f:
+            for _ in range(64):
+                f.write(os.urandom(MiB))
+
+        tracemalloc.start()
+        try:
+            io._stream_file(str(source), str(destination), buffer_size=MiB)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(peak, 4 * MiB)
+        self.assertEqual(os.path.getsize(destination), 64 * MiB)
+
+    @patch("wanna.core.deployment.io.storage_client")
+    @patch("wanna.core.deployment.io.gcloud_storage")
+    @patch("wanna.core.deployment.io.gcloud_storage_transfer_manager")
+    def test_upload_file_concurrently(self, transfer_manager_mock, storage_mock, _):
+        io = IOMixin()
+
+        io._upload_file_concurrently("model.tar.gz", "gs://b/model.tar.gz", chunk_size=MiB)
+
+        transfer_manager_mock.upload_chunks_concurrently.assert_called_once_with(
+            "model.tar.gz",
+            storage_mock.Blob.from_string.return_value,
+            chunk_size=32 * MiB,
+            worker_type=transfer_manager_mock.THREAD,
+            max_workers=8,
+        )
@@ -4,8 +4,10 @@ from unittest.mock import MagicMock, patch
 
 from google.cloud import logging
 from google.cloud.exceptions import NotFound
+from google.cloud.monitoring_v3 import AlertPolicy
 
-from wanna.core.deployment.models import LogMetricResource
+from wanna.core.deployment.models import AlertPolicyResource, LogMetricResource
+from wanna.core.deployment.monitoring import MonitoringInventory
 from wanna.core.deployment.vertex_connector import VertexConnector
 
 
@@ -17,10 +19,10 @@ class TestMonitoring(unittest.TestCase):
     }
     connector = VertexConnector[Any]()
 
-    @patch("wanna.core.deployment.monitoring.waiting")
+    @patch("wanna.core.deployment.monitoring.wait_for")
     @patch("wanna.core.deployment.monitoring.gcloud_logging")
-    def test_upsert_log_metric_waits_after_creation(self, mock_logging_module, mock_waiting):
-        """Test that upsert_log_metric waits for metric creation using waiting.wait."""
+    def test_upsert_log_metric_waits_after_creation(self, mock_logging_module, mock_wait_for):
+        """Test that upsert_log_metric waits for metric creation using wait_for."""
         # Setup resource
         resource = LogMetricResource(
             name="test-log-metric",
@@ -36,17 +38,15 @@ class TestMonitoring(unittest.TestCase):
         mock_logging_module.Client.return_value = mock_client
 
         # First call to metric_get raises NotFound (metric doesn't exist)
-        # Second call (inside wait lambda) returns the metric (metric created)
-        # Third call (after wait) returns the metric
+        # Second call (inside the check) raises NotFound (metric not created yet)
+        # Third call (inside the check) returns the metric (metric created)
         created_metric = {"name": "test-log-metric", "filter": "resource.type=cloud_function"}
         mock_metrics_api.metric_get.side_effect = [
             NotFound("Metric not found"),  # First call - triggers creation
-            created_metric,  # Second call - inside wait lambda
-            created_metric,  # Third call - after wait
+            NotFound("Metric not found"),  # Second call - inside the check
+            created_metric,  # Third call - inside the check
         ]
-
-        # Mock waiting.wait
-        mock_waiting.wait = MagicMock()
+        mock_wait_for.return_value = created_metric
 
         # Execute
         result = self.connector.upsert_log_metric(resource)
@@ -59,18 +59,137 @@ class TestMonitoring(unittest.TestCase):
             description=resource.description,
         )
 
-        # Verify waiting.wait was called with correct parameters (lines 171-178)
-        mock_waiting.wait.assert_called_once()
-        call_args = mock_waiting.wait.call_args
+        # Verify wait_for was called with correct parameters
+        mock_wait_for.assert_called_once()
+        call_args = mock_wait_for.call_args
+        assert call_args[0][0] == "log metric test-log-metric"
+        assert call_args[1]["timeout"] == 120
 
-        # Verify the lambda function calls metric_get with correct parameters
-        lambda_func = call_args[0][0]
-        lambda_result = lambda_func()
-        assert lambda_result == created_metric
-        assert call_args[1]["timeout_seconds"] == 120
-        assert call_args[1]["sleep_seconds"] == 5
-        assert call_args[1]["waiting_for"] == "Log metric"
+        # Verify the check calls metric_get with correct parameters
+        check = call_args[0][1]
+        assert check() is None
+        assert check() == created_metric
+        mock_metrics_api.metric_get.assert_called_with(
+            project=resource.project, metric_name=resource.name
+        )
 
-        # Verify final metric_get was called
         assert mock_metrics_api.metric_get.call_count == 3
         assert result == created_metric
+
+    @patch("wanna.core.deployment.monitoring.gcloud_monitoring_v3")
+    def test_alert_policies_are_listed_once_per_project(self, mock_monitoring):
+        """Test that upserts of one run share one listing of the project and see created policies."""
+        mock_monitoring.AlertPolicy = AlertPolicy
+        policy_client = mock_monitoring.AlertPolicyServiceClient.return_value
+        policy_client.list_alert_policies.return_value = [
+            AlertPolicy(
+                name="projects/test-project/alertPolicies/1", display_name="existing-policy"
+            ),
+        ]
+        policy_client.create_alert_policy.side_effect = lambda **kwargs: kwargs["alert_policy"]
+        connector = VertexConnector[Any]()
+        inventories = connector.monitoring_inventories()
+
+        def upsert(name: str) -> None:
+            connector.upsert_alert_policy(
+                AlertPolicyResource(
+                    name=name,
+                    project="test-project",
+                    location="europe-west-1",
+                    logging_metric_type="metric",
+                    resource_type="cloud_function",
+                    display_name=name,
+                    labels={},
+                    notification_channels=[],
+                ),
+                inventories,
+            )
+
+        upsert("existing-policy")
+        upsert("new-policy")
+        # the created policy is already up to date
+        upsert("new-policy")
+
+        policy_client.list_alert_policies.assert_called_once_with(name="projects/test-project")
+        policy_client.create_alert_policy.assert_called_once()
+        policy_client.update_alert_policy.assert_called_once()
+        updated = policy_client.update_alert_policy.call_args.kwargs["alert_policy"]
+        assert updated.name == "projects/test-project/alertPolicies/1"
+
+        # nothing is cached on the connector, the next run lists the policies again
+        connector.upsert_alert_policy(
+            AlertPolicyResource(
+                name="new-policy",
+                project="test-project",
+                location="europe-west-1",
+                logging_metric_type="metric",
+                resource_type="cloud_function",
+                display_name="new-policy",
+                labels={},
+                notification_channels=[],
+            )
+        )
+        assert policy_client.list_alert_policies.call_count == 2
+
+    @patch("wanna.core.deployment.monitoring.gcloud_monitoring_v3")
+    def test_alert_policy_with_normalized_filter_is_unchanged(self, mock_monitoring):
+        """Test that a policy as returned by GCP (single-line filter) is not updated."""
+        mock_monitoring.AlertPolicy = AlertPolicy
+        policy_client = mock_monitoring.AlertPolicyServiceClient.return_value
+        existing = AlertPolicy(
+            name="projects/test-project/alertPolicies/1",
+            display_name="policy",
+            conditions=[
+                {
+                    "name": "projects/test-project/alertPolicies/1/conditions/2",
+                    "display_name": "Error detected",
+                    "condition_threshold": {
+                        "filter": 'metric.type="logging.googleapis.com/user/metric" '
+                        'AND resource.type="cloud_function"',
+                        "aggregations": [
+                            {
+                                "alignment_period": "600s",
+                                "cross_series_reducer": "REDUCE_SUM",
+                                "per_series_aligner": "ALIGN_DELTA",
+                            }
+                        ],
+                        "comparison": "COMPARISON_GT",
+                        "duration": "0s",
+                        "trigger": {"count": 1},
+                    },
+                }
+            ],
+            alert_strategy={"auto_close": "604800s"},
+            combiner="OR",
+            enabled=True,
+        )
+        policy_client.list_alert_policies.return_value = [existing]
+
+        self.connector.upsert_alert_policy(
+            AlertPolicyResource(
+                name="policy",
+                project="test-project",
+                location="europe-west-1",
+                logging_metric_type="metric",
+                resource_type="cloud_function",
+                display_name="policy",
+                labels={},
+                notification_channels=[],
+            )
+        )
+
+        policy_client.update_alert_policy.assert_not_called()
+        policy_client.create_alert_policy.assert_not_called()
+
+    def test_inventory_indexes_by_display_name(self):
+        """Test that the inventory keeps the first resource with a display name."""
+        first, duplicate = MagicMock(display_name="channel"), MagicMock(display_name="channel")
+        list_resources = MagicMock(return_value=[first, duplicate])
+        inventory = MonitoringInventory(list_resources)
+
+        assert inventory.get("project", "channel") is first
+        assert inventory.get("project", "missing") is None
+        created = MagicMock()
+        inventory.put("project", "missing", created)
+        assert inventory.get("project", "missing") is created
+        list_resources.assert_called_once_with("project")
@@ -1,7 +1,8 @@
 import shutil
 from pathlib import Path
 
-from google.auth.credentials import Credentials
+from google.auth.credentials import AnonymousCredentials, Credentials
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud.aiplatform_v1.types import Tensorboard
 from google.cloud.compute_v1.types import Image
 from google.cloud.compute_v1.types.compute import (
@@ -72,8 +73,11 @@ class MockMachineTypesClient:
 
 
 class MockStorageClient:
-    def __init__(self, credentials: Credentials | None = None):
+    def __init__(
+        self, credentials: Credentials | None = None, _http: AuthorizedSession | None = None
+    ):
         self.credentials = credentials
+        self._http = _http
 
     def get_bucket(self, bucket_name: str):
         return Bucket(client=self, name=bucket_name)
@@ -83,6 +87,10 @@ def mock_get_credentials() -> Credentials | None:
     return None
 
 
+def mock_default_credentials(*args, **kwargs) -> tuple[Credentials, str]:  # noqa: ARG001
+    return AnonymousCredentials(), "test-project"
+
+
 def mock_convert_project_id_to_project_number(project_id: str) -> int:  # noqa
     return 123456789
 
@@ -98,7 +106,7 @@ def mock_upload_file(any, src: str, dest: str):  # noqa
     if _is_local_path(src) and _is_local_path(dest) and src != dest:
         shutil.copy(src, dest)
 
-    return None
+    return True
 
 
 def upload_string_to_gcs(filename: Path, bucket_name: str, blob_name: str):  # noqa
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from wanna.core.services.pipeline import PipelineCompileTask, compile_pipelines
+from wanna.core.utils.compile_cache import PipelineCompileCache
+
+PIPELINE_MODULE = """
+import os
+
+from kfp import dsl
+
+IMAGE = os.environ["{prefix}_DOCKER_URI"]
+
+
+@dsl.container_component
+def echo():
+    return dsl.ContainerSpec(image=IMAGE, command=["echo"], args=[os.environ["{prefix}_NAME"]])
+
+
+@dsl.pipeline(name="{name}")
+def pipeline(x: int = 1):
+    echo()
+"""
+
+
+@pytest.fixture
+def pipeline_modules(tmp_path, monkeypatch):
+    for name in ["alpha", "beta", "gamma", "shared"]:
+        prefix = name.upper()
+        (tmp_path / f"compile_test_{name}.py").write_text(
+            PIPELINE_MODULE.format(prefix=prefix, name=name)
+        )
+    # spawned workers start with sys.path of this process
+    monkeypatch.setattr(sys, "path", [str(tmp_path), *sys.path])
+    return tmp_path
+
+
+def _task(tmp_path, name: str) -> PipelineCompileTask:
+    prefix = name.upper()
+    (tmp_path / name).mkdir()
+    return PipelineCompileTask(
+        pipeline_function=f"compile_test_{name}.pipeline",
+        pipeline_params={"x": 2},
+        package_path=str(tmp_path / name / "pipeline-spec.json"),
+        env={f"{prefix}_DOCKER_URI": f"registry/{name}:v1", f"{prefix}_NAME": name},
+        manifest=MagicMock(),
+        manifest_path=str(tmp_path / name / "wanna-manifest.json"),
+    )
+
+
+def _spec_image(path: str) -> str:
+    with open(path) as f:
+        spec = json.load(f)
+    (executor,) = spec["deploymentSpec"]["executors"].values()
+    return executor["container"]["image"]
+
+
+def test_compile_pipelines_in_process_pool(pipeline_modules):
+    tasks = [_task(pipeline_modules, name) for name in ["alpha", "beta", "gamma"]]
+
+    compile_pipelines(tasks, workers=2)
+
+    for task, name in zip(tasks, ["alpha", "beta", "gamma"]):
+        assert _spec_image(task.package_path) == f"registry/{name}:v1"
+    # env params were exported only in the workers
+    assert "ALPHA_DOCKER_URI" not in os.environ
+
+
+def test_compile_pipelines_in_process_isolates_pipelines(pipeline_modules):
+    tasks = [_task(pipeline_modules, "shared"), _task(pipeline_modules, "alpha")]
+    # second pipeline defined by the same module, imported with other env params
+    tasks[1].pipeline_function = "compile_test_shared.pipeline"
+    tasks[1].env = {"SHARED_DOCKER_URI": "registry/shared:v2", "SHARED_NAME": "shared"}
+
+    compile_pipelines(tasks)
+
+    assert _spec_image(tasks[0].package_path) == "registry/shared:v1"
+    assert _spec_image(tasks[1].package_path) == "registry/shared:v2"
+    assert "SHARED_DOCKER_URI" not in os.environ
+    assert "compile_test_shared" not in sys.modules
+
+
+def test_compile_pipelines_reuses_cached_spec(pipeline_modules):
+    tasks = [_task(pipeline_modules, name) for name in ["alpha", "beta"]]
+    for task in tasks:
+        task.cache = PipelineCompileCache(
+            pipeline_modules / Path(task.package_path).parent.name / ".cache"
+        )
+        task.fingerprint = PipelineCompileCache.fingerprint(
+            task.pipeline_function, task.pipeline_params, task.env
+        )
+
+    with patch("wanna.core.services.pipeline.compile_pipeline_spec") as compile_mock:
+        compile_mock.side_effect = lambda *args: Path(args[2]).write_text("{}")
+        compile_pipelines(tasks)
+        assert compile_mock.call_count == 2
+
+        os.remove(tasks[0].package_path)
+        tasks[1].env["BETA_DOCKER_URI"] = "registry/beta:v2"
+        tasks[1].fingerprint = PipelineCompileCache.fingerprint(
+            tasks[1].pipeline_function, tasks[1].pipeline_params, tasks[1].env
+        )
+        compile_pipelines(tasks)
+
+    # only the changed pipeline is compiled again, the other spec is restored
+    assert compile_mock.call_count == 3
+    assert compile_mock.call_args.args[0] == "compile_test_beta.pipeline"
+    assert Path(tasks[0].package_path).read_text() == "{}"
@@ -1,4 +1,5 @@
 import copy
+import json
 import os
 import shutil
 import sys
@@ -9,6 +10,7 @@ from pathlib import Path
 from google import auth
 from google.cloud import aiplatform, logging, scheduler_v1
 from google.cloud.aiplatform.pipeline_jobs import PipelineJob
+from google.cloud.functions_v1 import CloudFunction
 from google.cloud.functions_v1.services.cloud_functions_service import (
     CloudFunctionsServiceClient,
 )
@@ -38,6 +40,7 @@ from wanna.core.models.docker import (
 from wanna.core.services.pipeline import PipelineService
 from wanna.core.services.tensorboard import TensorboardService
 from wanna.core.utils.config_loader import load_config_from_yaml
+from wanna.core.utils.hashing import hash_file
 
 
 @dataclass
@@ -120,11 +123,16 @@ class TestPipelineService(unittest.TestCase):
     def test_run_pipeline(self, find_image_mock, push_mock, docker_mock):
         docker_mock.build = MagicMock(return_value=None)
         docker_mock.pull = MagicMock(return_value=None)
+        docker_mock.image.inspect = MagicMock(
+            return_value=MagicMock(id="sha256:train", size=0, root_fs=None)
+        )
 
         config = load_config_from_yaml(self.sample_pipeline_dir / "wanna.yaml", "default")
         pipeline_service = PipelineService(
             config=config, workdir=self.sample_pipeline_dir, version="test"
         )
+        # registry is not reachable in tests
+        pipeline_service.docker_service.remote_build_cache = False
         # Setup expected data/fixtures
         expected_train_docker_image_model = LocalBuildImageModel(
             name="train",
@@ -265,14 +273,12 @@ class TestPipelineService(unittest.TestCase):
             expected_images,
         )
 
-        # Check expected env vars are set
-        self.assertTrue(os.environ.get("WANNA_SKLEARN_SAMPLE_PIPELINE_NAME"))
-        self.assertTrue(os.environ.get("WANNA_SKLEARN_SAMPLE_PIPELINE_ROOT"))
-        self.assertTrue(os.environ.get("WANNA_SKLEARN_SAMPLE_REGION"))
-        self.assertTrue(os.environ.get("WANNA_SKLEARN_SAMPLE_BUCKET"))
-        self.assertTrue(os.environ.get("WANNA_SKLEARN_SAMPLE_PIPELINE_LABELS"))
-        self.assertTrue(os.environ.get("TRAIN_DOCKER_URI"))
-        self.assertTrue(os.environ.get("SERVE_DOCKER_URI"))
+        # Env vars are exported only for the compilation of each pipeline
+        self.assertIsNone(os.environ.get("WANNA_SKLEARN_SAMPLE_PIPELINE_NAME"))
+        self.assertIsNone(os.environ.get("TRAIN_DOCKER_URI"))
+        # and pipelines sharing a module are compiled with their own env params
+        with open(expected_json_spec_eval_path) as f:
+            self.assertEqual(json.load(f)["pipelineInfo"]["name"], "wanna-sklearn-sample-eval")
 
         # Check Kubeflow V2 pipelines json spec was created and exists
         self.assertTrue(expected_json_spec_path.exists())
@@ -324,11 +330,7 @@ class TestPipelineService(unittest.TestCase):
                         name="Kubeflow V2 pipeline spec",
                         source=str(expected_json_spec_path),
                         destination=expected_train.pipeline_spec_path,
-                    ),
-                    PathArtifact(
-                        name="Kubeflow V2 pipeline spec",
-                        source=str(expected_json_spec_path),
-                        destination=expected_train.latest_pipeline_spec_path,
+                        aliases=[expected_train.latest_pipeline_spec_path],
                     ),
                 ],
                 [
@@ -353,11 +355,7 @@ class TestPipelineService(unittest.TestCase):
                         name="Kubeflow V2 pipeline spec",
                         source=str(expected_json_spec_eval_path),
                         destination=expected_eval.pipeline_spec_path,
-                    ),
-                    PathArtifact(
-                        name="Kubeflow V2 pipeline spec",
-                        source=str(expected_json_spec_eval_path),
-                        destination=expected_eval.latest_pipeline_spec_path,
+                        aliases=[expected_eval.latest_pipeline_spec_path],
                     ),
                 ],
                 [
@@ -390,13 +388,8 @@ class TestPipelineService(unittest.TestCase):
         # === Deploy ===
         parent = "projects/your-gcp-project-id/locations/europe-west1"
         local_cloud_functions_package = expected_train.release_path / "functions" / "package.zip"
-        copied_cloud_functions_package = (
-            "gs://your-staging-bucket-name/"
-            "wanna-pipelines/wanna-sklearn-sample/deployment/test/functions/package.zip"
-        )
-        copied_cloud_functions_eval_package = (
-            "gs://your-staging-bucket-name/"
-            "wanna-pipelines/wanna-sklearn-sample-eval/deployment/test/functions/package.zip"
+        local_cloud_functions_eval_package = (
+            expected_eval.release_path / "functions" / "package.zip"
         )
 
         expected_function_name = "wanna-sklearn-sample-local"
@@ -405,7 +398,7 @@ class TestPipelineService(unittest.TestCase):
         expected_function = {
             "name": expected_function_name_resoure,
             "description": "wanna wanna-sklearn-sample function for local pipeline",
-            "source_archive_url": copied_cloud_functions_package,
+            "source_archive_url": None,
             "entry_point": "process_request",
             "runtime": "python312",
             "https_trigger": {
@@ -438,7 +431,6 @@ class TestPipelineService(unittest.TestCase):
             "timeout": Duration(seconds=120),
         }
         expected_function_eval = copy.deepcopy(expected_function)
-        expected_function_eval["source_archive_url"] = copied_cloud_functions_eval_package
 
         # Set Mocks
         NotificationChannelServiceClient.list_notification_channels = MagicMock(return_value=[])
@@ -448,42 +440,50 @@ class TestPipelineService(unittest.TestCase):
             )
         )
         AlertPolicyServiceClient.list_alert_policies = MagicMock(return_value=[])
-        AlertPolicyServiceClient.update_alert_policy = MagicMock()
-        AlertPolicyServiceClient.create_alert_policy = MagicMock()
+        AlertPolicyServiceClient.update_alert_policy = MagicMock(
+            side_effect=lambda alert_policy: alert_policy
+        )
+        AlertPolicyServiceClient.create_alert_policy = MagicMock(
+            side_effect=lambda **kwargs: kwargs["alert_policy"]
+        )
 
         logging.Client.metrics_api.metric_create = MagicMock()
         logging.Client.metrics_api.metric_get = MagicMock()
 
         PublisherClient.get_topic = MagicMock()
 
-        CloudFunctionsServiceClient.get_function = MagicMock()
+        CloudFunctionsServiceClient.get_function = MagicMock(return_value=CloudFunction())
         CloudFunctionsServiceClient.update_function = MagicMock()
-        scheduler_v1.CloudSchedulerClient.get_job = MagicMock()
-        scheduler_v1.CloudSchedulerClient.update_job = MagicMock()
+        scheduler_v1.CloudSchedulerClient.get_job = MagicMock(return_value=scheduler_v1.Job())
         scheduler_v1.CloudSchedulerClient.update_job = MagicMock()
         wanna.core.services.path_utils.PipelinePaths.get_gcs_wanna_manifest_path = MagicMock(
             return_value=expected_train.manifest_json_path
         )
 
-        # Deploy the thing
-        pipeline_service.deploy("all", env="local")
+        # Deploy the thing, one resource at a time, the shared mocks do not count calls
+        # from concurrent threads reliably
+        with patch.dict(os.environ, {"WANNA_DEPLOY_MAX_WORKERS": "1"}):
+            pipeline_service.deploy("all", env="local")
 
-        # Check cloud functions packaged was copied to pipeline-root
+        # Check cloud functions packaged was stored under its content hash, the same for all versions
         self.assertTrue(os.path.exists(local_cloud_functions_package))
+        expected_function["source_archive_url"] = (
+            "gs://your-staging-bucket-name/wanna-pipelines/wanna-sklearn-sample/"
+            f"functions/package-{hash_file(local_cloud_functions_package)}.zip"
+        )
+        expected_function_eval["source_archive_url"] = (
+            "gs://your-staging-bucket-name/wanna-pipelines/wanna-sklearn-sample-eval/"
+            f"functions/package-{hash_file(local_cloud_functions_eval_package)}.zip"
+        )
 
-        # Check pubsub topic existence was checked
-        PublisherClient.get_topic.assert_has_calls(
-            [
-                call(
-                    topic="projects/your-gcp-project-id/topics/wanna-sample-pipeline-pubsub-channel"
-                ),
-                call(
-                    topic="projects/your-gcp-project-id/topics/wanna-sample-pipeline-pubsub-channel"
-                ),
-            ]
+        # Check pubsub topic existence was checked, once for the channel shared by both pipelines
+        PublisherClient.get_topic.assert_called_once_with(
+            topic="projects/your-gcp-project-id/topics/wanna-sample-pipeline-pubsub-channel"
         )
+        NotificationChannelServiceClient.create_notification_channel.assert_called_once()
 
         # Check cloudfunctions sdk methods were called with expected function params
+        # pipelines are deployed concurrently, in any order
         CloudFunctionsServiceClient.get_function.assert_has_calls(
             [
                 call({"name": f"{parent}/functions/wanna-sklearn-sample-local"}),
@@ -493,10 +493,12 @@ class TestPipelineService(unittest.TestCase):
         CloudFunctionsServiceClient.update_function.assert_has_calls(
             [
                 call({"function": expected_function}),
-                call().result(),
                 call({"function": expected_function_eval}),
-                call().result(),
-            ]
+            ],
+            any_order=True,
+        )
+        self.assertEqual(
+            CloudFunctionsServiceClient.update_function.return_value.result.call_count, 2
         )
         NotificationChannelServiceClient.create_notification_channel.assert_called_with(
             name="projects/your-gcp-project-id",
@@ -526,8 +528,12 @@ class TestPipelineService(unittest.TestCase):
         self.assertEqual(scheduler_v1.CloudSchedulerClient.update_job.call_count, 2)
         scheduler_v1.CloudSchedulerClient.get_job.assert_called_with({"name": job_name})
 
-        self.assertEqual(AlertPolicyServiceClient.list_alert_policies.call_count, 6)
-        self.assertEqual(AlertPolicyServiceClient.create_alert_policy.call_count, 6)
+        # alert policies of the project are listed once for all upserts, both pipelines
+        # are deployed from the same manifest, so the policies created by the first one
+        # are already up to date for the second one
+        self.assertEqual(AlertPolicyServiceClient.list_alert_policies.call_count, 1)
+        self.assertEqual(AlertPolicyServiceClient.create_alert_policy.call_count, 3)
+        self.assertEqual(AlertPolicyServiceClient.update_alert_policy.call_count, 0)
 
         push_network = pipeline_service._get_resource_network(
             project_id="test-project-id",
@@ -35,6 +35,16 @@ class TestBaseService(unittest.TestCase):
         self.instance2 = MockInstanceModel(name="instance2", project_id="test-project")
         self.service.instances = [self.instance1, self.instance2]
 
+    def test_filter_instances_by_name(self):
+        self.assertEqual(self.service._filter_instances_by_name("instance2"), [self.instance2])
+        self.assertEqual(
+            self.service._filter_instances_by_name("all"), [self.instance1, self.instance2]
+        )
+
+    def test_duplicate_instance_names_fail_when_loaded(self):
+        with self.assertRaisesRegex(ValueError, "Multiple tests with name instance1"):
+            self.service.instances = [self.instance1, self.instance1]
+
     @patch("wanna.core.services.base.logger")
     def test_report_method_signature(self, mock_logger):
         """Test that report method can be called with correct parameters (lines 120-121)."""
@@ -1,10 +1,22 @@
+import os
+import tempfile
+import threading
 import unittest
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from google.cloud.devtools.cloudbuild_v1.types import Build
+
 from wanna.core.models.docker import DockerModel, ImageBuildType, LocalBuildImageModel
 from wanna.core.models.gcp_profile import GCPProfileModel
-from wanna.core.services.docker import DockerService
+from wanna.core.services.docker import (
+    DockerService,
+    delete_stale_context_archives,
+    dockerfile_base_images,
+)
+from wanna.core.utils.cloud_build import CloudBuildException
+from wanna.core.utils.registry import RegistryException
 
 
 class TestDockerService(unittest.TestCase):
@@ -30,6 +42,8 @@ class TestDockerService(unittest.TestCase):
             docker_registry="europe-west1-docker.pkg.dev",
             docker_repository="test-repo",
         )
+        self.docker_model = docker_model
+        self.gcp_profile = gcp_profile
         self.docker_service = DockerService(
             docker_model=docker_model,
             gcp_profile=gcp_profile,
@@ -37,15 +51,15 @@ class TestDockerService(unittest.TestCase):
             work_dir=Path("."),
             wanna_project_name="test-project",
         )
+        self.docker_service.registry = MagicMock()
+        self.docker_service.registry.tag_exists.return_value = False
 
     @patch("wanna.core.services.docker.gcloud_devtools_cloudbuild_v1_services_cloud_build")
     @patch("wanna.core.services.docker.get_credentials")
-    @patch("wanna.core.services.docker.gapi_core_future_polling")
     @patch("wanna.core.services.docker.gprotobuf_duration_pb2")
     def test_build_image_on_gcp_cloud_build_method_signature(
         self,
         mock_duration_pb2,
-        mock_polling,
         mock_get_credentials,
         mock_cloud_build_client,
     ):
@@ -57,13 +71,12 @@ class TestDockerService(unittest.TestCase):
         from google.protobuf.duration_pb2 import Duration
 
         mock_duration_pb2.Duration = Duration
-        mock_polling.DEFAULT_POLLING._timeout = 3600
 
         mock_client = MagicMock()
         mock_operation = MagicMock()
         mock_operation.metadata.build.id = "build-123"
-        mock_operation.result = MagicMock()
         mock_client.create_build.return_value = mock_operation
+        mock_client.get_build.return_value = Build(status=Build.Status.SUCCESS)
         mock_cloud_build_client.CloudBuildClient.return_value = mock_client
 
         # Mock the upload method
@@ -126,3 +139,530 @@ class TestDockerService(unittest.TestCase):
 
         # Verify push was called for each tag
         assert mock_push.call_count == 2
+
+    @patch("wanna.core.services.docker.python_on_whales.docker.image.push")
+    def test_push_image_checks_existing_tags_in_one_batch(self, mock_push):
+        self.docker_service.cloud_build = False
+        self.docker_service.overwrite_images = False
+        self.docker_service.registry = MagicMock()
+        self.docker_service.registry.tags_exist.return_value = {"img:v1": True, "img:v2": False}
+
+        self.docker_service.push_image(image_or_tags=["img:v1", "img:latest", "img:v2"])
+
+        # latest is always overwritten, so it is not checked
+        self.docker_service.registry.tags_exist.assert_called_once_with(["img:v1", "img:v2"])
+        self.assertEqual([c.args[0] for c in mock_push.call_args_list], ["img:latest", "img:v2"])
+        self.docker_service.registry.remember.assert_any_call("img:v2")
+
+    def test_push_images_pushes_distinct_images_concurrently(self):
+        self.docker_service.cloud_build = False
+        local_images = {
+            "train:v1": ("sha256:train", 3 * 1024 * 1024),
+            "train:dup": ("sha256:train", 3 * 1024 * 1024),
+            "eval:v1": ("sha256:eval", 1024),
+            "serve:v1": ("sha256:serve", 1024),
+        }
+        self.docker_service._inspect_local_image = MagicMock(side_effect=local_images.get)
+        # images built from a common base are pushed at the same time too
+        started = threading.Barrier(3, timeout=5)
+
+        def push_image(tags, quiet=False):
+            started.wait()
+
+        self.docker_service.push_image = MagicMock(side_effect=push_image)
+
+        self.docker_service.push_images(
+            [["train:v1", "train:latest"], ["train:dup"], ["eval:v1"], ["serve:v1"]],
+            max_workers=4,
+        )
+
+        calls = [c.args[0] for c in self.docker_service.push_image.call_args_list]
+        # tags of the same image id are pushed together, in order
+        self.assertCountEqual(
+            calls, [["train:v1", "train:latest", "train:dup"], ["eval:v1"], ["serve:v1"]]
+        )
+        self.assertEqual(self.docker_service.push_stats["train:v1"][0], 3 * 1024 * 1024)
+        self.assertEqual(set(self.docker_service.push_stats), {"train:v1", "eval:v1", "serve:v1"})
+
+    @patch("wanna.core.services.docker.python_on_whales.docker.image.push")
+    def test_push_images_in_cloud_build_mode_does_nothing(self, mock_push):
+        self.docker_service.cloud_build = True
+        self.docker_service.push_images([["train:v1"]])
+        mock_push.assert_not_called()
+        self.docker_service.registry.retag.assert_not_called()
+
+    @patch("wanna.core.services.docker.python_on_whales.docker.build")
+    def test_build_image_hashes_context_once(self, mock_build):
+        """The context checksum is computed once and reused for the skip check and the write."""
+        self.docker_service.cloud_build = False
+        self.docker_service.quick_mode = False
+        self.docker_service._get_dirhash = MagicMock(return_value="abc")
+        self.docker_service._should_skip_build = MagicMock(return_value=False)
+        self.docker_service._write_context_dir_checksum = MagicMock()
+
+        self.docker_service._build_image(
+            Path("test_context"),
+            file_path=Path("Dockerfile"),
+            tags=["test-image:test"],
+            docker_image_ref="test-image",
+        )
+
+        self.docker_service._get_dirhash.assert_called_once()
+        hash_cache_dir = self.docker_service.build_dir / "test-image"
+        self.docker_service._should_skip_build.assert_called_once_with(hash_cache_dir, "abc")
+        self.docker_service._write_context_dir_checksum.assert_called_once_with(
+            hash_cache_dir, "abc"
+        )
+        mock_build.assert_called_once()
+
+    @patch("wanna.core.services.docker.list_docker_context")
+    def test_build_image_lists_context_once_for_hash_and_upload(self, mock_list):
+        """Cloud Build uploads exactly the files the context checksum was computed from."""
+        mock_list.return_value = ["Dockerfile", "src/main.py"]
+        self.docker_service.cloud_build = True
+        self.docker_service.quick_mode = False
+        self.docker_service._get_dirhash = MagicMock(return_value="abc")
+        self.docker_service._should_skip_build = MagicMock(return_value=False)
+        self.docker_service._build_image_on_gcp_cloud_build = MagicMock()
+
+        self.docker_service._build_image(
+            Path("test_context"),
+            file_path=Path("Dockerfile"),
+            tags=["test-image:test"],
+            docker_image_ref="test-image",
+        )
+
+        hash_cache_dir = self.docker_service.build_dir / "test-image"
+        mock_list.assert_called_once_with(
+            Path("test_context"),
+            [],
+            exclude=[
+                hash_cache_dir / "context-index.json",
+                hash_cache_dir / "context-index.tmp",
+            ],
+        )
+        self.assertEqual(
+            self.docker_service._get_dirhash.call_args.args[3], mock_list.return_value
+        )
+        self.assertEqual(
+            self.docker_service._build_image_on_gcp_cloud_build.call_args.kwargs["context_files"],
+            mock_list.return_value,
+        )
+
+    def _build_with_remote_cache(self, **build_args) -> MagicMock:
+        self.docker_service.cloud_build = False
+        self.docker_service.quick_mode = False
+        self.docker_service.remote_build_cache = True
+        self.docker_service.registry.digest.return_value = "sha256:base"
+        self.docker_service._get_dirhash = MagicMock(return_value="abc")
+        self.docker_service._should_skip_build = MagicMock(return_value=False)
+        self.docker_service._write_context_dir_checksum = MagicMock()
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("wanna.core.services.docker.python_on_whales.docker.build") as mock_build,
+        ):
+            dockerfile = Path(tmp) / "Dockerfile"
+            dockerfile.write_text("FROM python:3.12\n")
+            self.docker_service._build_image(
+                Path("test_context"),
+                file_path=dockerfile,
+                tags=["reg/test-image:test", "reg/test-image:latest"],
+                docker_image_ref="test-image",
+                **build_args,
+            )
+        return mock_build
+
+    def _cache_tag(self, dockerfile: str = "FROM python:3.12\n", **build_args) -> str | None:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "Dockerfile"
+            file_path.write_text(dockerfile)
+            return self.docker_service._context_cache_tag(
+                "reg/test-image:test", "abc", file_path, build_args, "test-image"
+            )
+
+    def test_build_image_reuses_image_with_same_inputs_from_registry(self):
+        """An image built from the same inputs in any run is pulled instead of rebuilt."""
+        self.docker_service.overwrite_images = False
+        self.docker_service.registry.tag_exists.return_value = True
+        self.docker_service.registry.tags_exist.return_value = {"reg/test-image:test": True}
+
+        with (
+            patch("wanna.core.services.docker.python_on_whales.docker.image.pull") as mock_pull,
+            patch("wanna.core.services.docker.python_on_whales.docker.image.tag") as mock_tag,
+            patch("wanna.core.services.docker.python_on_whales.docker.image.inspect"),
+        ):
+            mock_build = self._build_with_remote_cache()
+
+        mock_build.assert_not_called()
+        cache_tag = self.docker_service.registry.tag_exists.call_args.args[0]
+        self.assertTrue(cache_tag.startswith("reg/test-image:ctx-"))
+        mock_pull.assert_called_once_with(cache_tag, quiet=True)
+        self.assertEqual(
+            [c.args for c in mock_tag.call_args_list],
+            [(cache_tag, "reg/test-image:test"), (cache_tag, "reg/test-image:latest")],
+        )
+        # the registry is changed only by the push
+        self.docker_service.registry.retag.assert_not_called()
+        self.docker_service._write_context_dir_checksum.assert_not_called()
+
+        with patch("wanna.core.services.docker.python_on_whales.docker.image.push") as mock_push:
+            self.docker_service.push_image(
+                ["reg/test-image:test", "reg/test-image:latest", cache_tag]
+            )
+        mock_push.assert_not_called()
+        # existing tags are not overwritten, except latest
+        self.docker_service.registry.retag.assert_called_once_with(
+            cache_tag, ["reg/test-image:latest"]
+        )
+
+    def test_push_images_tags_remote_builds_in_cloud_build_mode(self):
+        """In cloud build mode only the images reused from the registry are tagged on push."""
+        self.docker_service.cloud_build = True
+        self.docker_service._remote_builds = {"reg/train:v1": "reg/train:ctx-abc"}
+
+        self.docker_service.push_images([["reg/train:v1"], ["reg/serve:v1"]])
+
+        self.docker_service.registry.retag.assert_called_once_with(
+            "reg/train:ctx-abc", ["reg/train:v1"]
+        )
+
+    def test_build_image_tags_and_labels_image_with_context_checksum(self):
+        """A local build is tagged by the checksum of its inputs and pushed with it."""
+        mock_build = self._build_with_remote_cache()
+
+        self.docker_service.registry.retag.assert_not_called()
+        mock_build.assert_called_once()
+        cache_tag = mock_build.call_args.kwargs["tags"][2]
+        self.assertEqual(
+            mock_build.call_args.kwargs["tags"],
+            ["reg/test-image:test", "reg/test-image:latest", cache_tag],
+        )
+        self.assertTrue(cache_tag.startswith("reg/test-image:ctx-"))
+        self.assertEqual(mock_build.call_args.kwargs["labels"], {"wanna.context-digest": "abc"})
+        self.docker_service.registry.digest.assert_called_once_with("python:3.12")
+
+        self.docker_service.registry.tags_exist.return_value = {
+            "reg/test-image:test": False,
+            "reg/test-image:latest": False,
+            cache_tag: False,
+        }
+        with patch("wanna.core.services.docker.python_on_whales.docker.image.push") as mock_push:
+            self.docker_service.push_image(["reg/test-image:test", "reg/test-image:latest"])
+        self.assertEqual(
+            [c.args[0] for c in mock_push.call_args_list],
+            ["reg/test-image:test", "reg/test-image:latest", cache_tag],
+        )
+
+        # the built image already carries the cache tag, it is still pushed once
+        with patch("wanna.core.services.docker.python_on_whales.docker.image.push") as mock_push:
+            self.docker_service.push_image(mock_build.call_args.kwargs["tags"])
+        self.assertEqual(
+            [c.args[0] for c in mock_push.call_args_list],
+            ["reg/test-image:test", "reg/test-image:latest", cache_tag],
+        )
+
+    def test_remote_build_cache_is_opt_in(self):
+        """Without WANNA_DOCKER_REMOTE_BUILD_CACHE the registry is not contacted on build."""
+        self.assertFalse(self.docker_service.remote_build_cache)
+        with patch.dict(os.environ, {"WANNA_DOCKER_REMOTE_BUILD_CACHE": "true"}):
+            service = DockerService(
+                docker_model=self.docker_model,
+                gcp_profile=self.gcp_profile,
+                version="test",
+                work_dir=Path("."),
+                wanna_project_name="test-project",
+            )
+        self.assertTrue(service.remote_build_cache)
+
+    def test_context_cache_tag_covers_all_build_inputs(self):
+        """The cache tag changes with the Dockerfile, the build config and the base image."""
+        self.docker_service.registry.digest.return_value = "sha256:base"
+        cache_tag = self._cache_tag()
+
+        self.assertEqual(self._cache_tag(), cache_tag)
+        self.assertNotEqual(self._cache_tag("FROM python:3.12\nRUN true\n"), cache_tag)
+        self.assertNotEqual(self._cache_tag(build_args={"VERSION": "2"}), cache_tag)
+        self.docker_service.registry.digest.return_value = "sha256:updated"
+        self.assertNotEqual(self._cache_tag(), cache_tag)
+
+        self.docker_service.registry.digest.side_effect = RegistryException("unavailable")
+        self.assertIsNone(self._cache_tag())
+
+    def test_dockerfile_base_images(self):
+        """Base images of all stages are listed with the global ARGs substituted."""
+        dockerfile = """
+# syntax=docker/dockerfile:1
+ARG BASE=python:3.11
+ARG TAG
+FROM --platform=linux/amd64 ${BASE} AS builder
+FROM scratch
+FROM builder
+FROM \\
+    gcr.io/distroless/base:$TAG
+"""
+        self.assertEqual(
+            dockerfile_base_images(dockerfile, {"TAG": "nonroot"}),
+            ["python:3.11", "gcr.io/distroless/base:nonroot"],
+        )
+        self.assertIsNone(dockerfile_base_images(dockerfile))
+
+    def test_build_image_builds_when_registry_lookup_fails(self):
+        """Errors of the registry never fail the build, the image is built as without cache."""
+        self.docker_service.registry.tag_exists.side_effect = RegistryException("unavailable")
+
+        mock_build = self._build_with_remote_cache()
+
+        mock_build.assert_called_once()
+        self.docker_service._write_context_dir_checksum.assert_called_once()
+
+    def test_should_skip_build_compares_cached_checksum(self):
+        """Build is skipped only when the stored checksum matches the current one."""
+        with tempfile.TemporaryDirectory() as tmp:
+            hash_cache_dir = Path(tmp)
+            self.docker_service.quick_mode = False
+            self.assertFalse(self.docker_service._should_skip_build(hash_cache_dir, "abc"))
+
+            self.docker_service._write_context_dir_checksum(hash_cache_dir, "abc")
+            self.assertTrue(self.docker_service._should_skip_build(hash_cache_dir, "abc"))
+            self.assertFalse(self.docker_service._should_skip_build(hash_cache_dir, "def"))
+
+            self.docker_service.quick_mode = True
+            self.assertTrue(self.docker_service._should_skip_build(hash_cache_dir, None))
+
+    def _local_image(self, name: str) -> LocalBuildImageModel:
+        return LocalBuildImageModel(
+            name=name,
+            build_type=ImageBuildType.local_build_image,
+            dockerfile=Path("Dockerfile"),
+            context_dir=Path("."),
+        )
+
+    def test_get_images_builds_images_concurrently_once(self):
+        """Each distinct image is built once, in parallel, and results keep the requested order."""
+        self.docker_service.image_models = [self._local_image(n) for n in ["img-a", "img-b"]]
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_get_image(docker_image_ref, docker_image_model=None):
+            # both builds must be running at the same time to pass the barrier
+            barrier.wait()
+            return docker_image_model, None, [f"{docker_image_ref}:test"]
+
+        self.docker_service._get_image = MagicMock(side_effect=fake_get_image)
+
+        images = self.docker_service.get_images(["img-b", "img-a", "img-b"], max_workers=2)
+
+        self.assertEqual([tags for _, _, tags in images], [["img-b:test"], ["img-a:test"]])
+        self.assertEqual(self.docker_service._get_image.call_count, 2)
+        self.assertEqual(set(self.docker_service.image_timings), {"img-a", "img-b"})
+
+        # served from the image store
+        self.docker_service.get_image("img-a")
+        self.assertEqual(self.docker_service._get_image.call_count, 2)
+
+    def test_get_images_raises_build_error(self):
+        """A failing build is reported after the other builds finish."""
+        self.docker_service.image_models = [self._local_image(n) for n in ["img-a", "img-b"]]
+
+        def fake_get_image(docker_image_ref, docker_image_model=None):
+            if docker_image_ref == "img-a":
+                raise RuntimeError("build failed")
+            return docker_image_model, None, [f"{docker_image_ref}:test"]
+
+        self.docker_service._get_image = MagicMock(side_effect=fake_get_image)
+
+        with self.assertRaises(RuntimeError):
+            self.docker_service.get_images(["img-a", "img-b"], max_workers=2)
+        self.assertIn("img-b", self.docker_service.image_store)
+
+    def test_get_images_unknown_image_fails_before_build(self):
+        self.docker_service._get_image = MagicMock()
+
+        with self.assertRaises(ValueError):
+            self.docker_service.get_images(["test-image", "unknown-image"])
+        self.docker_service._get_image.assert_not_called()
+
+    @patch("wanna.core.services.docker.gcloud_devtools_cloudbuild_v1_services_cloud_build")
+    @patch("wanna.core.services.docker.get_credentials")
+    @patch("wanna.core.utils.cloud_build.time.sleep")
+    def test_get_images_submits_cloud_builds_before_polling(
+        self, mock_sleep, mock_get_credentials, mock_cloud_build_client
+    ):
+        """All Cloud Build builds are submitted first and then awaited by one poller."""
+        fake_client = FakeCloudBuildClient(
+            {"build-img-a": ["QUEUED", "WORKING", "SUCCESS"], "build-img-b": ["SUCCESS"]}
+        )
+        mock_cloud_build_client.CloudBuildClient.return_value = fake_client
+        self.docker_service.cloud_build = True
+        self.docker_service.quick_mode = False
+        self.docker_service.image_models = [self._local_image(n) for n in ["img-a", "img-b"]]
+        self.docker_service._get_dirhash = MagicMock(return_value="abc")
+        self.docker_service._write_context_dir_checksum = MagicMock()
+        mock_blob = MagicMock()
+        mock_blob.bucket.name = "test-bucket"
+        mock_blob.name = "test.tar.gz"
+        self.docker_service._upload_context_dir_to_gcs = MagicMock(return_value=mock_blob)
+
+        self.docker_service.get_images(["img-a", "img-b"], max_workers=2)
+
+        # one client for the global endpoint, every build submitted before the first poll
+        mock_cloud_build_client.CloudBuildClient.assert_called_once()
+        self.assertEqual(fake_client.calls[:2], ["create", "create"])
+        self.assertEqual(self.docker_service._write_context_dir_checksum.call_count, 2)
+        # timings cover the builds, not only their submission
+        self.assertEqual(set(self.docker_service.image_timings), {"img-a", "img-b"})
+
+    @patch("wanna.core.services.docker.gcloud_devtools_cloudbuild_v1_services_cloud_build")
+    @patch("wanna.core.services.docker.get_credentials")
+    @patch("wanna.core.utils.cloud_build.time.sleep")
+    def test_get_images_reports_failed_cloud_build(
+        self, mock_sleep, mock_get_credentials, mock_cloud_build_client
+    ):
+        fake_client = FakeCloudBuildClient({"build-img-a": ["WORKING", "FAILURE"]})
+        mock_cloud_build_client.CloudBuildClient.return_value = fake_client
+        self.docker_service.cloud_build = True
+        self.docker_service.quick_mode = False
+        self.docker_service.image_models = [self._local_image("img-a")]
+        self.docker_service._get_dirhash = MagicMock(return_value="abc")
+        self.docker_service._write_context_dir_checksum = MagicMock()
+        mock_blob = MagicMock()
+        mock_blob.bucket.name = "test-bucket"
+        mock_blob.name = "test.tar.gz"
+        self.docker_service._upload_context_dir_to_gcs = MagicMock(return_value=mock_blob)
+
+        with self.assertRaises(CloudBuildException):
+            self.docker_service.get_images(["img-a"])
+        self.assertNotIn("img-a", self.docker_service.image_store)
+        self.docker_service._write_context_dir_checksum.assert_not_called()
+        self.assertNotIn("img-a", self.docker_service.image_timings)
+
+    @patch("wanna.core.services.docker.upload_file_to_gcs")
+    @patch("wanna.core.services.docker.upload_stream_to_gcs")
+    def test_upload_context_dir_to_gcs_streams_by_default(self, mock_stream, mock_upload_file):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.docker_service.work_dir = Path(tmp)
+            context_dir = Path(tmp) / "context"
+            context_dir.mkdir()
+            (context_dir / "Dockerfile").write_text("FROM python:3.12\n")
+
+            blob = self.docker_service._upload_context_dir_to_gcs(context_dir, "img-a", ["*.log"])
+
+            self.assertIs(blob, mock_stream.return_value)
+            mock_upload_file.assert_not_called()
+            _, kwargs = mock_stream.call_args
+            self.assertEqual(kwargs["bucket_name"], "test-bucket")
+            self.assertEqual(kwargs["blob_name"], "build/docker/img-a.tar.gz")
+            self.assertFalse((Path(tmp) / "build" / "docker" / "img-a.tar.gz").exists())
+
+    @patch("wanna.core.services.docker.upload_file_to_gcs")
+    @patch("wanna.core.services.docker.upload_stream_to_gcs")
+    def test_upload_context_dir_to_gcs_without_streaming(self, mock_stream, mock_upload_file):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.docker_service.work_dir = Path(tmp)
+            self.docker_service.stream_context_upload = False
+            context_dir = Path(tmp) / "context"
+            context_dir.mkdir()
+            (context_dir / "Dockerfile").write_text("FROM python:3.12\n")
+
+            self.docker_service._upload_context_dir_to_gcs(context_dir, "img-a")
+
+            mock_stream.assert_not_called()
+            tar_filename = Path(tmp) / "build" / "docker" / "img-a.tar.gz"
+            self.assertTrue(tar_filename.exists())
+            mock_upload_file.assert_called_once_with(
+                filename=tar_filename,
+                bucket_name="test-bucket",
+                blob_name="build/docker/img-a.tar.gz",
+            )
+
+    @patch("wanna.core.services.docker.upload_stream_to_gcs")
+    @patch("wanna.core.services.docker.storage_client")
+    def test_upload_context_dir_to_gcs_reuses_archive_with_same_hash(
+        self, mock_storage_client, mock_stream
+    ):
+        existing = MagicMock()
+        existing.custom_time = datetime.now(timezone.utc)
+        bucket = mock_storage_client.return_value.bucket.return_value
+        bucket.get_blob.return_value = existing
+
+        blob = self.docker_service._upload_context_dir_to_gcs(Path("."), "img-a", [], "abc")
+
+        self.assertIs(blob, existing)
+        mock_storage_client.return_value.bucket.assert_called_with("test-bucket")
+        bucket.get_blob.assert_called_once_with("build/docker/ctx/abc.tar.gz")
+        mock_stream.assert_not_called()
+        existing.patch.assert_not_called()
+
+    @patch("wanna.core.services.docker.upload_stream_to_gcs")
+    @patch("wanna.core.services.docker.storage_client")
+    def test_upload_context_dir_to_gcs_uploads_new_hash_once(
+        self, mock_storage_client, mock_stream
+    ):
+        bucket = mock_storage_client.return_value.bucket.return_value
+        bucket.get_blob.side_effect = [None, mock_stream.return_value]
+        mock_stream.return_value.custom_time = None
+
+        first = self.docker_service._upload_context_dir_to_gcs(Path("."), "img-a", [], "abc")
+        second = self.docker_service._upload_context_dir_to_gcs(Path("."), "img-b", [], "abc")
+
+        self.assertIs(first, second)
+        mock_stream.assert_called_once()
+        self.assertEqual(mock_stream.call_args.kwargs["blob_name"], "build/docker/ctx/abc.tar.gz")
+        mock_stream.return_value.patch.assert_called_once()
+
+    @patch("wanna.core.services.docker.storage_client")
+    def test_delete_stale_context_archives(self, mock_storage_client):
+        now = datetime.now(timezone.utc)
+
+        def archive(name, time_created, custom_time=None):
+            blob = MagicMock(time_created=time_created, custom_time=custom_time)
+            blob.name = f"build/docker/ctx/{name}.tar.gz"
+            return blob
+
+        fresh = archive("fresh", now - timedelta(days=1))
+        reused = archive("reused", now - timedelta(days=90), now - timedelta(days=2))
+        stale = archive("stale", now - timedelta(days=90), now - timedelta(days=40))
+        never_reused = archive("never-reused", now - timedelta(days=31))
+        mock_storage_client.return_value.list_blobs.return_value = [
+            fresh,
+            reused,
+            stale,
+            never_reused,
+        ]
+
+        deleted = delete_stale_context_archives("test-bucket", max_age_days=30, dry_run=True)
+        self.assertEqual(deleted, [stale.name, never_reused.name])
+        stale.delete.assert_not_called()
+
+        deleted = delete_stale_context_archives("test-bucket", max_age_days=30)
+        mock_storage_client.return_value.list_blobs.assert_called_with(
+            "test-bucket", prefix="build/docker/ctx/"
+        )
+        self.assertEqual(deleted, [stale.name, never_reused.name])
+        stale.delete.assert_called_once()
+        never_reused.delete.assert_called_once()
+        fresh.delete.assert_not_called()
+        reused.delete.assert_not_called()
+
+
+class FakeCloudBuildClient:
+    """Local stand-in for CloudBuildClient replaying scripted build statuses."""
+
+    def __init__(self, statuses: dict[str, list[str]]):
+        self.statuses = statuses
+        self.calls: list[str] = []
+        self._lock = threading.Lock()
+
+    def create_build(self, request):
+        image_name = request.build.steps[0].args[0].split("/")[-1].split(":")[0]
+        with self._lock:
+            self.calls.append("create")
+        operation = MagicMock()
+        operation.metadata.build.id = f"build-{image_name}"
+        return operation
+
+    def get_build(self, request):
+        with self._lock:
+            self.calls.append("get")
+        statuses = self.statuses[request["id"]]
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        return Build(status=Build.Status[status])
@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from wanna.core.deployment.models import PushMode
+from wanna.core.services.jobs import JobService
+from wanna.core.services.pipeline import PipelineService
+from wanna.core.services.session import BuildSession
+from wanna.core.utils.config_loader import load_config_from_yaml
+
+SAMPLE_DIR = Path(__file__).parent.parent.parent / "samples" / "custom_job"
+
+
+@pytest.fixture
+def config():
+    return load_config_from_yaml(SAMPLE_DIR / "wanna.yaml", "default")
+
+
+def test_services_of_one_session_share_images(config):
+    session = BuildSession(config, SAMPLE_DIR, "v1")
+    jobs = JobService(config=config, workdir=SAMPLE_DIR, version="v1", session=session)
+    pipelines = PipelineService(config=config, workdir=SAMPLE_DIR, version="v1", session=session)
+
+    assert jobs.session is pipelines.session is session
+    assert jobs.docker_service is pipelines.docker_service
+    assert jobs.tensorboard_service is pipelines.tensorboard_service
+
+
+def test_services_of_one_session_resolve_image_once(config):
+    session = BuildSession(config, SAMPLE_DIR, "v1")
+    jobs = JobService(config=config, workdir=SAMPLE_DIR, version="v1", session=session)
+    pipelines = PipelineService(config=config, workdir=SAMPLE_DIR, version="v1", session=session)
+    resolved = (MagicMock(), None, ["gcr.io/google-containers/debian-base:1.0.0"])
+
+    with patch.object(session.docker_service(), "_get_image", return_value=resolved) as get_image:
+        assert jobs.docker_service.get_image("debian") == resolved
+        assert pipelines.docker_service.get_image("debian") == resolved
+
+    get_image.assert_called_once_with(docker_image_ref="debian", docker_image_model=None)
+
+
+def test_docker_service_per_quick_mode(config):
+    session = BuildSession(config, SAMPLE_DIR, "v1")
+    jobs = JobService(config=config, workdir=SAMPLE_DIR, version="v1", session=session)
+    quick = PipelineService(
+        config=config,
+        workdir=SAMPLE_DIR,
+        version="v1",
+        push_mode=PushMode.quick,
+        session=session,
+    )
+
+    assert quick.docker_service is not jobs.docker_service
+    assert quick.docker_service.quick_mode
+
+
+def test_services_without_session_do_not_share_state(config):
+    first = JobService(config=config, workdir=SAMPLE_DIR, version="v1")
+    second = JobService(config=config, workdir=SAMPLE_DIR, version="v1")
+
+    assert first.session is not second.session
+    assert first.docker_service is not second.docker_service
+
+
+def test_tensorboard_is_looked_up_once(config):
+    session = BuildSession(config, SAMPLE_DIR)
+    session.tensorboard_service = MagicMock()
+    session.tensorboard_service.get_or_create_tensorboard_instance_by_name.return_value = (
+        "projects/123/locations/europe-west1/tensorboards/456"
+    )
+
+    for _ in range(3):
+        assert session.get_tensorboard("board") == (
+            "projects/123/locations/europe-west1/tensorboards/456"
+        )
+    session.tensorboard_service.get_or_create_tensorboard_instance_by_name.assert_called_once_with(
+        "board"
+    )
@@ -0,0 +1,125 @@
+from typing import Any
+
+from google.cloud.devtools.cloudbuild_v1.types import Build
+
+from wanna.core.utils.cloud_build import CloudBuildJob, CloudBuildPoller
+
+
+class FakeCloudBuildClient:
+    """Local stand-in for CloudBuildClient replaying scripted build statuses."""
+
+    def __init__(self, statuses: dict[str, list[str]]):
+        self.statuses = statuses
+        self.requests: list[dict[str, Any]] = []
+
+    def get_build(self, request):
+        self.requests.append(request)
+        statuses = self.statuses[request["id"]]
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        return Build(status=Build.Status[status])
+
+
+class FakeClock:
+    """Monotonic clock advanced only by sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _job(client, build_id, timeout=600.0, on_success=None, **kwargs):
+    return CloudBuildJob(
+        name=build_id,
+        client=client,
+        project_id="project",
+        build_id=build_id,
+        build_name=f"projects/project/locations/global/builds/{build_id}",
+        link=f"https://console.cloud.google.com/cloud-build/builds/{build_id}",
+        timeout=timeout,
+        on_success=on_success,
+        **kwargs,
+    )
+
+
+def test_poller_waits_for_all_builds():
+    client = FakeCloudBuildClient(
+        {
+            "a": ["QUEUED", "WORKING", "WORKING", "SUCCESS"],
+            "b": ["WORKING", "SUCCESS"],
+        }
+    )
+    clock = FakeClock()
+    succeeded: list[str] = []
+    poller = CloudBuildPoller(
+        initial_delay=1, max_delay=2, multiplier=1.5, jitter=0, sleep=clock.sleep, clock=clock
+    )
+    poller.add(_job(client, "a", on_success=lambda: succeeded.append("a"), submitted_at=0))
+    poller.add(_job(client, "b", on_success=lambda: succeeded.append("b"), submitted_at=0))
+
+    assert poller.wait() == []
+    assert sorted(succeeded) == ["a", "b"]
+    assert clock.sleeps == [1, 1.5, 2]
+    assert client.requests[0] == {
+        "name": "projects/project/locations/global/builds/a",
+        "project_id": "project",
+        "id": "a",
+    }
+
+
+def test_poller_returns_failed_builds():
+    client = FakeCloudBuildClient({"ok": ["SUCCESS"], "bad": ["WORKING", "FAILURE"]})
+    succeeded: list[str] = []
+    clock = FakeClock()
+    poller = CloudBuildPoller(sleep=clock.sleep, clock=clock)
+    poller.add(_job(client, "ok", on_success=lambda: succeeded.append("ok"), submitted_at=0))
+    bad = _job(client, "bad", on_success=lambda: succeeded.append("bad"), submitted_at=0)
+    poller.add(bad)
+
+    assert poller.wait() == [bad]
+    assert succeeded == ["ok"]
+    assert bad.status == "FAILURE"
+
+
+def test_poller_logs_status_transitions(capsys):
+    client = FakeCloudBuildClient({"a": ["QUEUED", "QUEUED", "WORKING", "SUCCESS"]})
+    clock = FakeClock()
+    poller = CloudBuildPoller(sleep=clock.sleep, clock=clock)
+    poller.add(_job(client, "a", submitted_at=0))
+    poller.wait()
+
+    out = capsys.readouterr().out
+    assert "STATUS_UNKNOWN -> QUEUED" in out
+    assert "QUEUED -> WORKING" in out
+    assert "WORKING -> SUCCESS" in out
+    assert out.count("-> QUEUED") == 1
+
+
+def test_poller_fails_build_after_timeout():
+    client = FakeCloudBuildClient({"a": ["WORKING"]})
+    poller = CloudBuildPoller(sleep=lambda _: None)
+    job = _job(client, "a", timeout=-1)
+    poller.add(job)
+
+    assert poller.wait() == [job]
+    assert job.status == "WORKING"
+
+
+def test_poller_timeout_counts_from_submission():
+    client = FakeCloudBuildClient({"a": ["WORKING"]})
+    clock = FakeClock()
+    clock.now = 100
+    poller = CloudBuildPoller(initial_delay=4, jitter=0, sleep=clock.sleep, clock=clock)
+    # submitted 95s ago with a 100s timeout, only 5s are left
+    job = _job(client, "a", timeout=100, submitted_at=5)
+    poller.add(job)
+
+    assert poller.wait() == [job]
+    assert clock.sleeps == [4, 1]
+    assert len(client.requests) == 3
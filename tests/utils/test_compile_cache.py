@@ -0,0 +1,76 @@
+import os
+import sys
+
+from wanna.core.utils.compile_cache import PipelineCompileCache, local_source_roots
+
+
+def _write(path, content=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def _project(tmp_path):
+    _write(tmp_path / "app" / "__init__.py")
+    _write(
+        tmp_path / "app" / "pipeline.py",
+        "import json\nfrom . import config\nfrom app.components import train\nimport shared\n",
+    )
+    _write(tmp_path / "app" / "config.py")
+    _write(tmp_path / "app" / "components" / "__init__.py")
+    _write(tmp_path / "app" / "components" / "train.py", "from ..config import X\n")
+    _write(tmp_path / "app" / "components" / "train.yaml", "name: train")
+    _write(tmp_path / "shared.py", "import os\n")
+    _write(tmp_path / "unused.py")
+    return [str(tmp_path)]
+
+
+def test_local_source_roots_follows_imports(tmp_path):
+    search_paths = _project(tmp_path)
+
+    assert local_source_roots("app.pipeline", search_paths) == {
+        "app": tmp_path / "app",
+        "shared": tmp_path / "shared.py",
+    }
+
+
+def test_fingerprint_covers_sources_params_and_env(tmp_path, monkeypatch):
+    monkeypatch.setattr("sys.path", [*_project(tmp_path), *sys.path])
+
+    def fingerprint(params=None, env=None):
+        return PipelineCompileCache.fingerprint(
+            "app.pipeline.pipeline", params or {"x": 1}, env or {"APP_DOCKER_URI": "img:v1"}
+        )
+
+    original = fingerprint()
+    assert fingerprint() == original
+    assert fingerprint(params={"x": 2}) != original
+    assert fingerprint(env={"APP_DOCKER_URI": "img:v2"}) != original
+
+    _write(tmp_path / "unused.py", "x = 1")
+    assert fingerprint() == original
+    _write(tmp_path / "app" / "components" / "train.yaml", "name: train2")
+    assert fingerprint() != original
+
+
+def test_restore_stored_spec(tmp_path):
+    cache = PipelineCompileCache(tmp_path / ".cache")
+    spec = tmp_path / "spec.json"
+    spec.write_text('{"pipelineInfo": {}}')
+
+    assert not cache.restore("abc", str(tmp_path / "restored" / "spec.json"))
+    cache.store("abc", str(spec))
+    assert cache.restore("abc", str(tmp_path / "restored" / "spec.json"))
+    assert (tmp_path / "restored" / "spec.json").read_text() == '{"pipelineInfo": {}}'
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = PipelineCompileCache(tmp_path / ".cache", max_entries=2)
+    spec = tmp_path / "spec.json"
+    spec.write_text("{}")
+
+    for i, fingerprint in enumerate(["a", "b", "c"]):
+        cache.store(fingerprint, str(spec))
+        os.utime(cache.cache_dir / f"{fingerprint}.json", ns=(i * 10**9, i * 10**9))
+    cache.store("d", str(spec))
+
+    assert sorted(p.name for p in cache.cache_dir.iterdir()) == ["c.json", "d.json"]
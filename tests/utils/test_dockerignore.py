@@ -0,0 +1,115 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from wanna.core.utils.dockerignore import DockerIgnore
+from wanna.core.utils.hashing import hash_context_dir
+from wanna.core.utils.io import list_docker_context
+
+
+@pytest.mark.parametrize(
+    "patterns, path, is_dir, expected",
+    [
+        (["*.log"], "notes.log", False, True),
+        # like in Docker, patterns are anchored to the context root
+        (["*.log"], "logs/notes.log", False, False),
+        (["**/*.log"], "logs/notes.log", False, True),
+        (["**/*.log"], "notes.log", False, True),
+        (["src/**/test_*.py"], "src/a/b/test_x.py", False, True),
+        (["src/**/test_*.py"], "src/test_x.py", False, True),
+        (["src/*.py"], "src/a/x.py", False, False),
+        (["/build"], "build/lib/x.py", False, True),
+        (["./build"], "build", True, True),
+        (["data"], "data/x.bin", False, True),
+        # directory-only rules
+        (["data/"], "data", False, False),
+        (["data/"], "data", True, True),
+        (["data/"], "data/x.bin", False, True),
+        (["file?.txt"], "file1.txt", False, True),
+        (["file?.txt"], "file10.txt", False, False),
+        (["file[0-9].txt"], "file5.txt", False, True),
+        (["file[!0-9].txt"], "file5.txt", False, False),
+        # the last matching rule wins
+        (["*.md", "!README.md"], "README.md", False, False),
+        (["*.md", "!README.md"], "CHANGELOG.md", False, True),
+        (["!README.md", "*.md"], "README.md", False, True),
+        (["docs", "!docs/index.md"], "docs/index.md", False, False),
+        (["docs", "!docs/index.md"], "docs/api.md", False, True),
+        (["  ", "# not a comment here"], "x", False, False),
+    ],
+)
+def test_matches(patterns, path, is_dir, expected):
+    assert DockerIgnore(patterns).matches(path, is_dir=is_dir) is expected
+
+
+def _make_context(root: Path) -> None:
+    for path in [
+        "Dockerfile",
+        "README.md",
+        "docs/index.md",
+        "docs/api.md",
+        "docs/img/logo.png",
+        "src/main.py",
+        "src/pkg/util.py",
+        "src/pkg/util.pyc",
+        "node_modules/a/index.js",
+        "node_modules/b/index.js",
+    ]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(path)
+
+
+def test_patterns_are_anchored_unlike_gitignore(tmp_path):
+    """Breaking change: `*.pyc` no longer excludes files in subdirectories, as in Docker."""
+    _make_context(tmp_path)
+
+    assert "src/pkg/util.pyc" in DockerIgnore(["*.pyc"]).walk(tmp_path)
+    assert "src/pkg/util.pyc" not in DockerIgnore(["**/*.pyc"]).walk(tmp_path)
+
+
+def test_walk_agrees_with_matches(tmp_path):
+    _make_context(tmp_path)
+    patterns = ["**/*.pyc", "docs", "!docs/index.md", "node_modules/", "*.md", "!README.md"]
+    ignore = DockerIgnore(patterns)
+
+    all_files = sorted(
+        p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_file()
+    )
+    expected = [p for p in all_files if not ignore.matches(p, is_dir=False)]
+
+    assert ignore.walk(tmp_path) == expected
+    assert expected == [
+        "Dockerfile",
+        "README.md",
+        "docs/index.md",
+        "src/main.py",
+        "src/pkg/util.py",
+    ]
+
+
+def test_walk_prunes_excluded_directories(tmp_path):
+    _make_context(tmp_path)
+    ignore = DockerIgnore(["node_modules/", "docs", "!docs/index.md"])
+
+    with patch.object(ignore, "_match_vector", wraps=ignore._match_vector) as match:
+        ignore.walk(tmp_path)
+
+    visited = [call.args[0] for call in match.call_args_list]
+    assert "node_modules" in visited
+    assert not any(path.startswith("node_modules/") for path in visited)
+    # docs may contain the re-included file, so it has to be entered
+    assert "docs/index.md" in visited
+    assert "docs/img" in visited
+    assert not any(path.startswith("docs/img/") for path in visited)
+
+
+def test_hash_and_tar_use_the_same_files(tmp_path):
+    _make_context(tmp_path)
+    patterns = ["**/*.pyc", "node_modules/"]
+    files = list_docker_context(tmp_path, patterns)
+
+    assert hash_context_dir(tmp_path, patterns) == hash_context_dir(tmp_path, files=files)
+    (tmp_path / "src" / "pkg" / "other.pyc").write_text("ignored")
+    (tmp_path / "node_modules" / "c.js").write_text("ignored")
+    assert hash_context_dir(tmp_path, patterns) == hash_context_dir(tmp_path, files=files)
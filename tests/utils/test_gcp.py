@@ -0,0 +1,126 @@
+import io
+import tarfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.auth.transport.requests import AuthorizedSession
+
+from wanna.core.utils.gcp import StorageClientPool, upload_stream_to_gcs
+from wanna.core.utils.io import stream_docker_context
+
+
+class FakeBlobWriter:
+    """Local stand-in for storage.fileio.BlobWriter recording the uploaded chunks."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.chunks: list[bytes] = []
+        self.closed = False
+        self.fail_after = fail_after
+
+    def write(self, data: bytes) -> int:
+        if self.fail_after is not None and len(self.chunks) >= self.fail_after:
+            raise ConnectionError("upload failed")
+        self.chunks.append(data)
+        return len(data)
+
+    def close(self):
+        self.closed = True
+
+
+def _patch_storage(writer: FakeBlobWriter):
+    client = MagicMock()
+    blob = client.get_bucket.return_value.blob.return_value
+    blob.open.return_value = writer
+    return patch("wanna.core.utils.gcp.storage_client", return_value=client), blob
+
+
+def test_upload_stream_to_gcs_streams_tar_in_chunks(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "Dockerfile").write_text("FROM python:3.12\n")
+    (tmp_path / "src" / "main.py").write_text("print('hello')\n")
+    (tmp_path / "src" / "big.bin").write_bytes(bytes(range(256)) * 4096)
+    (tmp_path / "notes.log").write_text("ignored\n")
+    writer = FakeBlobWriter()
+    patcher, blob = _patch_storage(writer)
+
+    with patcher:
+        result = upload_stream_to_gcs(
+            lambda f: stream_docker_context(tmp_path, f, ["*.log"]),
+            bucket_name="bucket",
+            blob_name="build/docker/image.tar.gz",
+            chunk_size=1024,
+            max_buffered_chunks=2,
+        )
+
+    assert result is blob
+    blob.open.assert_called_once_with("wb", chunk_size=1024)
+    assert writer.closed
+    assert len(writer.chunks) > 1
+    assert all(len(chunk) == 1024 for chunk in writer.chunks[:-1])
+    with tarfile.open(fileobj=io.BytesIO(b"".join(writer.chunks)), mode="r:gz") as tar:
+        assert sorted(tar.getnames()) == ["Dockerfile", "src/big.bin", "src/main.py"]
+        big = tar.extractfile("src/big.bin")
+        assert big is not None and big.read() == bytes(range(256)) * 4096
+    assert list(tmp_path.glob("*.tar.gz")) == []
+
+
+def test_upload_stream_to_gcs_does_not_finalize_failed_stream():
+    def write_stream(f):
+        f.write(b"x" * 4096)
+        raise ValueError("tar failed")
+
+    writer = FakeBlobWriter()
+    patcher, _ = _patch_storage(writer)
+
+    with patcher, pytest.raises(ValueError, match="tar failed"):
+        upload_stream_to_gcs(write_stream, "bucket", "blob", chunk_size=1024)
+    assert not writer.closed
+
+
+def test_upload_stream_to_gcs_stops_writer_when_upload_fails():
+    written: list[int] = []
+
+    def write_stream(f):
+        for _ in range(1000):
+            written.append(f.write(b"x" * 1024))
+
+    writer = FakeBlobWriter(fail_after=2)
+    patcher, _ = _patch_storage(writer)
+
+    with patcher, pytest.raises(ConnectionError):
+        upload_stream_to_gcs(
+            write_stream, "bucket", "blob", chunk_size=1024, max_buffered_chunks=1
+        )
+    assert not writer.closed
+    assert len(written) < 1000
+
+
+@patch("wanna.core.utils.gcp.google_auth")
+@patch("wanna.core.utils.gcp.gcloud_storage")
+def test_storage_client_pool_shares_clients_per_credentials(storage_mock, auth_mock):
+    storage_mock.Client.side_effect = lambda **kwargs: MagicMock(**kwargs)
+    default_credentials = object()
+    auth_mock.default.return_value = (default_credentials, "project")
+    pool = StorageClientPool(pool_size=4)
+    credentials = object()
+
+    client = pool.get(credentials)
+
+    assert pool.get(credentials) is client
+    assert pool.get(None).credentials is default_credentials
+    assert storage_mock.Client.call_count == 2
+    assert isinstance(client._http, AuthorizedSession)
+    assert client._http.credentials is credentials
+    adapter = client._http.get_adapter("https://storage.googleapis.com")
+    assert adapter._pool_maxsize == 4
+
+
+@patch("wanna.core.utils.gcp.gcloud_storage")
+def test_storage_client_pool_stats(storage_mock):
+    storage_mock.Client.side_effect = lambda **kwargs: MagicMock(**kwargs)
+    pool = StorageClientPool(pool_size=4)
+    adapter = pool.get(object())._http.get_adapter("https://storage.googleapis.com")
+    connection_pool = adapter.poolmanager.connection_from_url("https://storage.googleapis.com")
+    connection_pool.num_connections, connection_pool.num_requests = 2, 10
+
+    assert pool.stats() == {"opened": 2, "requests": 10, "reused": 8}
@@ -0,0 +1,110 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from dirhash import dirhash
+
+from wanna.core.utils import hashing
+from wanna.core.utils.hashing import FileHashIndex, crc32c_bytes, crc32c_file, hash_context_dir
+
+
+def _make_context(root: Path) -> None:
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "data").mkdir()
+    (root / "Dockerfile").write_text("FROM python:3.12\n")
+    (root / "src" / "main.py").write_text("print('hello')\n")
+    (root / "src" / "pkg" / "util.py").write_text("X = 1\n")
+    (root / "data" / "model.bin").write_bytes(b"\x00" * 1024)
+    (root / "notes.log").write_text("ignored\n")
+
+
+def test_hash_context_dir_matches_dirhash(tmp_path):
+    _make_context(tmp_path)
+    ignore = ["*.log", "data/"]
+
+    assert hash_context_dir(tmp_path, ignore) == dirhash(tmp_path, "sha256", ignore=set(ignore))
+    assert hash_context_dir(tmp_path) == dirhash(tmp_path, "sha256")
+
+
+def test_hash_context_dir_with_index_matches_dirhash(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    index_path = tmp_path / "build" / "context-index.json"
+
+    assert hash_context_dir(context, [], index_path) == dirhash(context, "sha256")
+    assert index_path.exists()
+
+
+def test_index_inside_context_dir_is_not_hashed(tmp_path):
+    _make_context(tmp_path)
+    expected = dirhash(tmp_path, "sha256")
+
+    assert hash_context_dir(tmp_path, [], tmp_path / "context-index.json") == expected
+    assert hash_context_dir(tmp_path, [], tmp_path / "context-index.json") == expected
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    index_path = tmp_path / "context-index.json"
+    first = hash_context_dir(context, [], index_path)
+
+    with patch.object(hashing, "hash_file", wraps=hashing.hash_file) as hash_file_mock:
+        second = hash_context_dir(context, [], index_path)
+        assert hash_file_mock.call_count == 0
+    assert first == second
+
+    (context / "src" / "main.py").write_text("print('changed')\n")
+    with patch.object(hashing, "hash_file", wraps=hashing.hash_file) as hash_file_mock:
+        third = hash_context_dir(context, [], index_path)
+        hash_file_mock.assert_called_once_with(context / "src/main.py")
+    assert third == dirhash(context, "sha256")
+    assert third != first
+
+
+def test_exec_bit_changes_hash(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    index_path = tmp_path / "context-index.json"
+    first = hash_context_dir(context, [], index_path)
+
+    (context / "src" / "main.py").chmod(0o755)
+    # the content is unchanged, but the file is executable now
+    assert hash_context_dir(context, [], index_path) != first
+    assert hash_context_dir(context, []) == hash_context_dir(context, [], index_path)
+
+    (context / "src" / "main.py").chmod(0o644)
+    assert hash_context_dir(context, [], index_path) == first
+
+
+def test_removed_files_are_pruned_from_index(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    index_path = tmp_path / "context-index.json"
+    hash_context_dir(context, [], index_path)
+
+    (context / "notes.log").unlink()
+    assert hash_context_dir(context, [], index_path) == dirhash(context, "sha256")
+    assert "notes.log" not in FileHashIndex(index_path).entries
+
+
+def test_corrupted_index_is_ignored(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    index_path = tmp_path / "context-index.json"
+    index_path.write_text("{not json")
+
+    assert hash_context_dir(context, [], index_path) == dirhash(context, "sha256")
+
+
+def test_crc32c_matches_gcs_metadata_format(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_bytes(b"hello")
+
+    # crc32c of b"hello", as GCS reports it in object metadata
+    assert crc32c_file(path) == "mnG7TA=="
+    assert crc32c_bytes(b"hello") == "mnG7TA=="
@@ -0,0 +1,133 @@
+import gzip
+import io
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from wanna.core.utils.hashing import hash_file
+from wanna.core.utils.io import (
+    ParallelGzipWriter,
+    list_docker_context,
+    stream_docker_context,
+    tar_docker_context,
+    write_reproducible_zip,
+)
+
+
+def _make_context(root: Path) -> None:
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "data" / "nested").mkdir(parents=True)
+    (root / "Dockerfile").write_text("FROM python:3.12\n")
+    (root / "src" / "main.py").write_text("print('hello')\n")
+    (root / "src" / "pkg" / "util.py").write_text("X = 1\n")
+    (root / "src" / "pkg" / "util.pyc").write_bytes(b"\x00")
+    (root / "data" / "nested" / "model.bin").write_bytes(os.urandom(300_000))
+    (root / "notes.log").write_text("ignored\n")
+
+
+def test_tar_docker_context_skips_ignored_files(tmp_path):
+    context = tmp_path / "context"
+    context.mkdir()
+    _make_context(context)
+    target = tmp_path / "build" / "context.tar.gz"
+
+    tar_docker_context(context, target, ["*.log", "**/*.pyc"])
+
+    with tarfile.open(target, "r:gz") as tar:
+        assert tar.getnames() == [
+            "Dockerfile",
+            "data/nested/model.bin",
+            "src/main.py",
+            "src/pkg/util.py",
+        ]
+        member = tar.getmember("src/main.py")
+        assert (member.mtime, member.uid, member.gid, member.uname) == (0, 0, 0, "")
+        extracted = tar.extractfile(member)
+        assert extracted is not None
+        assert extracted.read() == b"print('hello')\n"
+
+
+def test_tar_docker_context_is_reproducible(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    _make_context(first)
+    (first / "notes.log").unlink()
+    second.mkdir()
+    # same content created in a different order and at a different time
+    for path in sorted(first.rglob("*"), reverse=True):
+        target = second / path.relative_to(first)
+        if path.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(path.read_bytes())
+            os.utime(target, (1_000_000, 1_000_000))
+
+    outputs = []
+    for context, workers in [(first, 1), (second, 4)]:
+        buffer = io.BytesIO()
+        stream_docker_context(context, buffer, ["**/*.pyc"], workers=workers)
+        outputs.append(buffer.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def test_list_docker_context_is_shared_by_tar(tmp_path):
+    _make_context(tmp_path)
+    files = list_docker_context(tmp_path, ["data/", "*.log"])
+    assert files == ["Dockerfile", "src/main.py", "src/pkg/util.py", "src/pkg/util.pyc"]
+
+    buffer = io.BytesIO()
+    with patch("wanna.core.utils.io.list_docker_context") as list_mock:
+        stream_docker_context(tmp_path, buffer, ["data/", "*.log"], files=files[:2])
+        list_mock.assert_not_called()
+    with tarfile.open(fileobj=io.BytesIO(buffer.getvalue()), mode="r:gz") as tar:
+        assert tar.getnames() == ["Dockerfile", "src/main.py"]
+
+
+def test_list_docker_context_excludes_files(tmp_path):
+    _make_context(tmp_path)
+    (tmp_path / "context-index.json").write_text("{}")
+
+    files = list_docker_context(
+        tmp_path, ["data/", "*.log"], exclude=[tmp_path / "context-index.json"]
+    )
+
+    assert "context-index.json" not in files
+    assert "Dockerfile" in files
+
+
+def test_parallel_gzip_writer_output_is_valid_gzip():
+    data = os.urandom(100_000) + b"a" * 200_000
+    outputs = []
+    for workers in [1, 3]:
+        buffer = io.BytesIO()
+        with ParallelGzipWriter(buffer, block_size=64 * 1024, workers=workers) as gz:
+            for i in range(0, len(data), 10_000):
+                gz.write(data[i : i + 10_000])
+        outputs.append(buffer.getvalue())
+
+    assert outputs[0] == outputs[1]
+    assert gzip.decompress(outputs[0]) == data
+
+
+def test_parallel_gzip_writer_empty_input():
+    buffer = io.BytesIO()
+    with ParallelGzipWriter(buffer):
+        pass
+    assert gzip.decompress(buffer.getvalue()) == b""
+
+
+def test_write_reproducible_zip(tmp_path):
+    first, second = tmp_path / "first.zip", tmp_path / "second" / "second.zip"
+
+    first_hash = write_reproducible_zip(first, {"main.py": "x = 1\n", "requirements.txt": ""})
+    second_hash = write_reproducible_zip(second, {"requirements.txt": "", "main.py": "x = 1\n"})
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first_hash == second_hash == hash_file(first)
+    with zipfile.ZipFile(first) as z:
+        assert z.namelist() == ["main.py", "requirements.txt"]
+        assert z.read("main.py") == b"x = 1\n"
+    assert write_reproducible_zip(first, {"main.py": "x = 2\n"}) != first_hash
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+import pytest
+
+from wanna.core.utils.name_index import NameIndex
+
+
+@dataclass
+class Model:
+    name: str
+
+
+def test_get_by_name():
+    models = [Model("train"), Model("serve ")]
+    index = NameIndex(models, "docker image")
+
+    assert index.get("train") is models[0]
+    assert index.get(" serve") is models[1]
+    assert "serve" in index
+    assert "eval" not in index
+    assert list(index) == models
+    assert len(index) == 2
+
+
+def test_get_unknown_name_raises():
+    index = NameIndex([Model("train")], "docker image")
+    with pytest.raises(ValueError, match="No docker image with name eval found"):
+        index.get("eval")
+
+
+def test_duplicate_names_raise_when_built():
+    with pytest.raises(ValueError, match="Multiple jobs with name train found"):
+        NameIndex([Model("train"), Model("eval"), Model("train ")], "job")
@@ -0,0 +1,100 @@
+import pytest
+
+from wanna.core.utils.polling import Poller, PollingTimeout, wait_for
+
+
+class FakeClock:
+    """Monotonic clock advanced only by sleeping."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _ready_after(clock: FakeClock, seconds: float, result="ready"):
+    return lambda: result if clock.now >= seconds else None
+
+
+def test_poller_backs_off_exponentially():
+    clock = FakeClock()
+    poller = Poller(
+        initial_delay=1, max_delay=4, multiplier=2, jitter=0, sleep=clock.sleep, clock=clock
+    )
+    target = poller.add("resource", _ready_after(clock, 10))
+
+    assert poller.wait() == []
+    assert target.done and target.result == "ready"
+    assert clock.sleeps == [1, 2, 4, 4]
+    assert target.polls == 5
+
+
+def test_poller_multiplexes_resources_in_one_loop():
+    clock = FakeClock()
+    poller = Poller(
+        initial_delay=1, max_delay=8, multiplier=2, jitter=0, sleep=clock.sleep, clock=clock
+    )
+    slow = poller.add("slow", _ready_after(clock, 7))
+    fast = poller.add("fast", _ready_after(clock, 1))
+
+    assert poller.wait() == []
+    assert fast.done and fast.polls == 2
+    assert slow.done and slow.polls == 4
+    # checks of both resources share the sleeps: t=0, 1, 3, 7
+    assert clock.sleeps == [1, 2, 4]
+
+
+def test_poller_applies_jitter():
+    clock = FakeClock()
+    poller = Poller(initial_delay=10, max_delay=10, jitter=0.5, sleep=clock.sleep, clock=clock)
+    poller.add("resource", _ready_after(clock, 100))
+    poller.wait()
+
+    assert all(5 <= delay <= 15 for delay in clock.sleeps)
+    assert len(set(clock.sleeps)) > 1
+
+
+def test_poller_stops_at_the_earliest_deadline():
+    clock = FakeClock()
+    poller = Poller(initial_delay=4, jitter=0, sleep=clock.sleep, clock=clock)
+    target = poller.add("resource", lambda: False, timeout=100, deadline=6)
+
+    assert poller.wait() == [target]
+    # the last check happens right at the deadline
+    assert clock.sleeps == [4, 2]
+    assert target.polls == 3 and not target.done
+
+
+def test_poller_returns_resources_whose_check_failed():
+    clock = FakeClock()
+    poller = Poller(sleep=clock.sleep, clock=clock)
+    error = RuntimeError("api error")
+    failing = poller.add("failing", lambda: (_ for _ in ()).throw(error))
+    ok = poller.add("ok", lambda: True)
+
+    assert poller.wait() == [failing]
+    assert failing.error is error
+    assert ok.done
+
+
+def test_wait_for():
+    clock = FakeClock()
+
+    assert wait_for("resource", _ready_after(clock, 3), sleep=clock.sleep, clock=clock) == "ready"
+    with pytest.raises(PollingTimeout, match="Timed out waiting for missing"):
+        wait_for("missing", lambda: None, timeout=10, sleep=clock.sleep, clock=clock)
+    with pytest.raises(ZeroDivisionError):
+        wait_for("broken", lambda: 1 / 0, sleep=clock.sleep, clock=clock)
+
+
+def test_wait_for_logs_wait_time(capsys):
+    clock = FakeClock()
+    wait_for("log metric x", _ready_after(clock, 3), jitter=0, sleep=clock.sleep, clock=clock)
+
+    assert "Waited 5.0s for log metric x (3 checks)" in capsys.readouterr().out
@@ -0,0 +1,308 @@
+import base64
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs
+
+import pytest
+
+from wanna.core.utils.registry import (
+    RegistryClient,
+    RegistryException,
+    docker_config_credentials,
+    parse_image_reference,
+)
+
+MANIFEST_TYPE = "application/vnd.oci.image.manifest.v1+json"
+
+
+class FakeRegistry(ThreadingHTTPServer):
+    """Local stand-in for a `registry:2` with token authentication."""
+
+    daemon_threads = True
+
+    def __init__(self, manifests: set[str], delay: float = 0.0, basic_auth: bool = False):
+        super().__init__(("127.0.0.1", 0), FakeRegistryHandler)
+        self.manifests = manifests
+        self.basic_auth = basic_auth
+        self.delay = delay
+        self.tokens: dict[str, str] = {}
+        self.token_requests: list[str] = []
+        self.manifest_requests: list[str] = []
+        self.scopes: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self.server_address[1]}"
+
+
+class FakeRegistryHandler(BaseHTTPRequestHandler):
+    server: FakeRegistry
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path.startswith("/v2/"):
+            if self._authorized():
+                manifest = b'{"schemaVersion": 2}'
+                self.send_response(200)
+                self.send_header("Content-Type", MANIFEST_TYPE)
+                self.send_header("Content-Length", str(len(manifest)))
+                self.end_headers()
+                self.wfile.write(manifest)
+            return
+        assert path == "/token"
+        auth = self.headers.get("Authorization", "")
+        if auth != "Basic " + base64.b64encode(b"user:secret").decode():
+            self.send_response(401)
+            self.end_headers()
+            return
+        scope = parse_qs(query)["scope"][0]
+        repository = scope.split(":")[1]
+        with self.server.lock:
+            self.server.token_requests.append(repository)
+            self.server.scopes.append(scope)
+            token = f"token-{len(self.server.token_requests)}"
+            self.server.tokens[token] = repository
+        body = f'{{"token": "{token}"}}'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        repository = self.path.removeprefix("/v2/").partition("/manifests/")[0]
+        auth = self.headers.get("Authorization", "")
+        if self.server.basic_auth:
+            if auth == "Basic " + base64.b64encode(b"user:secret").decode():
+                return True
+            challenge = 'Basic realm="fake-registry"'
+        else:
+            if self.server.tokens.get(auth.removeprefix("Bearer ")) == repository:
+                return True
+            challenge = f'Bearer realm="http://{self.server.host}/token",service="fake-registry"'
+        self.send_response(401)
+        self.send_header("WWW-Authenticate", challenge)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return False
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if not self._authorized():
+            return
+        repository, _, reference = self.path.removeprefix("/v2/").partition("/manifests/")
+        assert self.headers["Content-Type"] == MANIFEST_TYPE
+        assert body == b'{"schemaVersion": 2}'
+        with self.server.lock:
+            self.server.manifests.add(f"{repository}:{reference}")
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        repository, _, reference = self.path.removeprefix("/v2/").partition("/manifests/")
+        if not self._authorized():
+            return
+
+        with self.server.lock:
+            self.server.manifest_requests.append(f"{repository}:{reference}")
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        exists = f"{repository}:{reference}" in self.server.manifests
+        self.send_response(200 if exists else 404)
+        if exists:
+            digest = hashlib.sha256(f"{repository}:{reference}".encode()).hexdigest()
+            self.send_header("Docker-Content-Digest", f"sha256:{digest}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def registry():
+    server = FakeRegistry({"team/app:v1", "team/app:latest", "team/other:v1"}, delay=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def basic_registry():
+    server = FakeRegistry({"team/app:v1"}, basic_auth=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(**kwargs) -> RegistryClient:
+    return RegistryClient(credentials=lambda _: ("user", "secret"), **kwargs)
+
+
+def test_tags_exist_checks_all_tags_concurrently(registry):
+    client = _client(max_workers=4)
+    tags = [f"{registry.host}/team/app:{tag}" for tag in ["v1", "v2", "latest", "v3"]]
+
+    assert client.tags_exist(tags) == dict(zip(tags, [True, False, True, False]))
+    assert registry.max_in_flight > 1
+    # one token for the repository shared by all threads
+    assert registry.token_requests == ["team/app"]
+
+
+def test_tags_exist_caches_results(registry):
+    client = _client()
+    tag = f"{registry.host}/team/app:v1"
+
+    assert client.tag_exists(tag)
+    assert client.tags_exist([tag, tag]) == {tag: True}
+    assert registry.manifest_requests == ["team/app:v1"]
+
+    assert not client.tag_exists(f"{registry.host}/team/app:v2")
+    client.remember(f"{registry.host}/team/app:v2")
+    assert client.tag_exists(f"{registry.host}/team/app:v2")
+    assert registry.manifest_requests == ["team/app:v1", "team/app:v2"]
+
+
+def test_token_is_reused_across_calls(registry):
+    client = _client()
+    client.tag_exists(f"{registry.host}/team/app:v1")
+    client.tag_exists(f"{registry.host}/team/app:v2")
+    client.tag_exists(f"{registry.host}/team/other:v1")
+
+    assert registry.token_requests == ["team/app", "team/other"]
+
+
+def test_failed_authentication_raises(registry):
+    client = RegistryClient(credentials=lambda _: ("user", "wrong"))
+    with pytest.raises(RegistryException, match="Failed to authenticate"):
+        client.tag_exists(f"{registry.host}/team/app:v1")
+
+
+def test_basic_authentication(basic_registry):
+    client = _client()
+    assert client.tag_exists(f"{basic_registry.host}/team/app:v1")
+    assert not client.tag_exists(f"{basic_registry.host}/team/app:v2")
+    assert basic_registry.token_requests == []
+
+
+def test_basic_authentication_without_credentials_raises(basic_registry):
+    client = RegistryClient(credentials=lambda _: None)
+    with pytest.raises(RegistryException, match="No credentials"):
+        client.tag_exists(f"{basic_registry.host}/team/app:v1")
+
+
+def _write_docker_config(tmp_path, monkeypatch, config: dict[str, Any]) -> None:
+    (tmp_path / "config.json").write_text(json.dumps(config))
+    monkeypatch.setenv("DOCKER_CONFIG", str(tmp_path))
+
+
+def test_docker_config_credentials_from_auths(tmp_path, monkeypatch):
+    auth = base64.b64encode(b"user:secret").decode()
+    _write_docker_config(
+        tmp_path,
+        monkeypatch,
+        {
+            "auths": {
+                "https://mirror.example.com": {"auth": auth},
+                "https://index.docker.io/v1/": {"auth": auth},
+            }
+        },
+    )
+
+    assert docker_config_credentials("mirror.example.com") == ("user", "secret")
+    assert docker_config_credentials("registry-1.docker.io") == ("user", "secret")
+    assert docker_config_credentials("other.example.com") is None
+
+
+def test_docker_config_credentials_from_helper(tmp_path, monkeypatch):
+    helper = tmp_path / "bin" / "docker-credential-fake"
+    helper.parent.mkdir()
+    helper.write_text(
+        "#!/bin/sh\n"
+        "read server\n"
+        '[ "$server" = "mirror.example.com" ] || { echo "credentials not found"; exit 1; }\n'
+        'echo \'{"Username": "helper-user", "Secret": "helper-secret"}\'\n'
+    )
+    helper.chmod(helper.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{helper.parent}{os.pathsep}{os.environ['PATH']}")
+    _write_docker_config(
+        tmp_path,
+        monkeypatch,
+        {"credHelpers": {"mirror.example.com": "fake"}, "credsStore": "fake"},
+    )
+
+    assert docker_config_credentials("mirror.example.com") == ("helper-user", "helper-secret")
+    # the default store has no credentials for the registry
+    assert docker_config_credentials("other.example.com") is None
+
+
+def test_docker_config_credentials_without_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOCKER_CONFIG", str(tmp_path))
+    assert docker_config_credentials("mirror.example.com") is None
+
+
+def test_retag_puts_source_manifest_to_targets(registry):
+    client = _client()
+    targets = [f"{registry.host}/team/app:v2", f"{registry.host}/team/app:latest"]
+
+    client.retag(f"{registry.host}/team/app:v1", targets)
+
+    assert "team/app:v2" in registry.manifests
+    assert registry.scopes == ["repository:team/app:pull", "repository:team/app:pull,push"]
+    # pushed tags are known to exist without asking the registry
+    assert client.tags_exist(targets) == dict.fromkeys(targets, True)
+    assert registry.manifest_requests == []
+
+
+def test_digest_of_tag(registry):
+    client = _client()
+    image = f"{registry.host}/team/app:v1"
+
+    digest = client.digest(image)
+
+    assert digest == "sha256:" + hashlib.sha256(b"team/app:v1").hexdigest()
+    assert client.digest(image) == digest
+    assert registry.manifest_requests == ["team/app:v1"]
+    assert client.digest(f"{registry.host}/team/app@sha256:abc") == "sha256:abc"
+    with pytest.raises(RegistryException, match="digest"):
+        client.digest(f"{registry.host}/team/app:missing")
+
+
+def test_retag_to_other_repository_raises(registry):
+    client = _client()
+    with pytest.raises(RegistryException, match="other repository"):
+        client.retag(f"{registry.host}/team/app:v1", [f"{registry.host}/team/other:v2"])
+
+
+@pytest.mark.parametrize(
+    "image, expected",
+    [
+        (
+            "europe-west1-docker.pkg.dev/project/repo/image:dev",
+            ("europe-west1-docker.pkg.dev", "project/repo/image", "dev"),
+        ),
+        ("localhost:5000/image", ("localhost:5000", "image", "latest")),
+        ("python:3.12", ("registry-1.docker.io", "library/python", "3.12")),
+        ("team/image", ("registry-1.docker.io", "team/image", "latest")),
+        ("gcr.io/p/image@sha256:abc", ("gcr.io", "p/image", "sha256:abc")),
+    ],
+)
+def test_parse_image_reference(image, expected):
+    assert parse_image_reference(image) == expected